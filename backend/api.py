@@ -1,183 +1,448 @@
-from flask import Blueprint, jsonify, request, current_app
-import logging
-from scraper import scrape_awwwards
-from models import Website, ColorPalette
+from flask import Blueprint, Response, g, jsonify, request, current_app, send_from_directory
+from werkzeug.exceptions import NotFound
+import base64
+import binascii
 import json
+import logging
+import math
 import os
+import time
+from models import Website, ColorPalette
+from catalog import get_catalog
+from color_index import METRICS as COLOR_METRICS
+from config import Config
+from images import DERIVED_DIR, image_dir
+from jobs import get_job_manager
+from metrics import REGISTRY, REQUEST_SECONDS
+from response_cache import cached_response
+import re
 
 logger = logging.getLogger(__name__)
 
+# Records per chunk written by the NDJSON export endpoints
+EXPORT_CHUNK_SIZE = 500
+
+# Cache lifetime of content-addressed image derivatives (one year)
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
 # Create API blueprint
 api = Blueprint('api', __name__)
 
-@api.route('/websites', methods=['GET'])
-def get_websites():
-    """Get all websites with their color palettes"""
+class InvalidCursor(ValueError):
+    """Raised for a malformed cursor or one naming an unknown website"""
+
+def encode_cursor(website_id):
+    """Opaque cursor pointing after the given website"""
+    raw = json.dumps({'after': website_id}, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Website id a cursor points after"""
     try:
-        # In a real application, this would query a database
-        # For now, we'll read from a JSON file
-        data_file = os.path.join(current_app.config['DATA_DIR'], 'websites.json')
-        
-        if not os.path.exists(data_file):
-            return jsonify([]), 200
-        
-        with open(data_file, 'r') as f:
-            websites = json.load(f)
-        
-        # Add pagination
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        return json.loads(raw)['after']
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise InvalidCursor("Invalid cursor")
+
+def get_per_page(default=20):
+    """per_page query parameter, clamped to 1..Config.MAX_PER_PAGE"""
+    per_page = request.args.get('per_page', default, type=int)
+    return max(1, min(per_page, Config.MAX_PER_PAGE))
+
+def paginate(catalog, items, with_palette=False):
+    """
+    Paginate a catalog listing from the request's query parameters
+    
+    With a ``cursor`` parameter (empty for the first page) the page starts
+    after the website the cursor points to, so deep pages cost the same as
+    the first one and don't shift when websites are added. Without one the
+    ``page`` number is used. Either way ``next_cursor`` continues the listing.
+    
+    Returns:
+        Tuple of (page of website dicts, dict of pagination fields)
+    """
+    per_page = get_per_page()
+    total = len(items)
+    
+    cursor = request.args.get('cursor')
+    if cursor is not None:
+        after = decode_cursor(cursor) if cursor else None
+        try:
+            websites, more = catalog.page_after(after, per_page, with_palette=with_palette)
+        except KeyError:
+            raise InvalidCursor("Invalid cursor")
+        fields = {'total': total, 'per_page': per_page}
+    else:
+        page = max(1, request.args.get('page', 1, type=int))
         start = (page - 1) * per_page
-        end = start + per_page
-        
-        return jsonify({
-            'websites': websites[start:end],
-            'total': len(websites),
+        websites = items[start:start + per_page]
+        more = start + per_page < total
+        fields = {
+            'total': total,
             'page': page,
             'per_page': per_page,
-            'total_pages': (len(websites) + per_page - 1) // per_page
-        }), 200
+            'total_pages': (total + per_page - 1) // per_page
+        }
+    
+    fields['next_cursor'] = encode_cursor(websites[-1]['id']) if websites and more else None
+    return websites, fields
+
+def get_limit(value, default=10):
+    """Result limit, clamped to 1..Config.MAX_PER_PAGE"""
+    try:
+        limit = int(value) if value is not None else default
+    except (TypeError, ValueError):
+        limit = default
+    return max(1, min(limit, Config.MAX_PER_PAGE))
+
+def similar_response(catalog, results, **fields):
+    """JSON body for a palette similarity query"""
+    return {
+        **fields,
+        'results': [{**catalog.serialize(w), 'distance': round(distance, 2)} for w, distance in results]
+    }
+
+def palette_record(catalog, website):
+    """Palette fields of a catalog website"""
+    return {
+        'id': website['id'],
+        'url': website['url'],
+        'colors': catalog.palette(website),
+        **catalog.accessibility(website)
+    }
+
+def ndjson_response(records, filename):
+    """
+    Stream records as newline-delimited JSON
+    
+    Records are serialized lazily in chunks, so the response is never
+    built in memory as a whole.
+    """
+    def generate():
+        lines = []
+        for record in records:
+            lines.append(json.dumps(record, separators=(',', ':')))
+            if len(lines) >= EXPORT_CHUNK_SIZE:
+                yield '\n'.join(lines) + '\n'
+                lines = []
+        if lines:
+            yield '\n'.join(lines) + '\n'
+    
+    return Response(generate(), mimetype='application/x-ndjson', headers={
+        'Content-Disposition': f'attachment; filename={filename}'
+    })
+
+@api.route('/websites', methods=['GET'])
+@cached_response
+def get_websites():
+    """
+    Get all websites with their color palettes
+    
+    Paginated by ``page`` or ``cursor``, see paginate().
+    """
+    try:
+        catalog = get_catalog(current_app.config['DATA_DIR'])
+        websites, fields = paginate(catalog, catalog.websites)
+        
+        return jsonify({'websites': [catalog.serialize(w) for w in websites], **fields}), 200
+    
+    except InvalidCursor as e:
+        return jsonify({"error": str(e)}), 400
     
     except Exception as e:
         logger.exception("Error retrieving websites")
         return jsonify({"error": str(e)}), 500
 
+@api.route('/websites/export', methods=['GET'])
+@cached_response
+def export_websites():
+    """Stream all websites as newline-delimited JSON"""
+    try:
+        # The snapshot is immutable, so the generator can outlive the request context
+        catalog = get_catalog(current_app.config['DATA_DIR'])
+        return ndjson_response((catalog.serialize(w) for w in catalog.websites), 'websites.ndjson')
+    
+    except Exception as e:
+        logger.exception("Error exporting websites")
+        return jsonify({"error": str(e)}), 500
+
 @api.route('/websites/<website_id>', methods=['GET'])
+@cached_response
 def get_website(website_id):
     """Get a specific website by ID"""
     try:
-        data_file = os.path.join(current_app.config['DATA_DIR'], 'websites.json')
-        
-        if not os.path.exists(data_file):
-            return jsonify({"error": "Website not found"}), 404
-        
-        with open(data_file, 'r') as f:
-            websites = json.load(f)
-        
         # Find website by ID
-        website = next((w for w in websites if w['id'] == website_id), None)
+        catalog = get_catalog(current_app.config['DATA_DIR'])
+        website = catalog.by_id.get(website_id)
         
         if not website:
             return jsonify({"error": "Website not found"}), 404
         
-        return jsonify(website), 200
+        return jsonify(catalog.serialize(website)), 200
     
     except Exception as e:
         logger.exception(f"Error retrieving website {website_id}")
         return jsonify({"error": str(e)}), 500
 
+@api.route('/websites/<website_id>/similar', methods=['GET'])
+@cached_response
+def get_similar_websites(website_id):
+    """
+    Get the websites whose palettes are closest to this website's palette
+    
+    Palettes are compared by the mean ΔE76 of their best one-to-one color
+    matching. ``limit`` sets the number of results.
+    """
+    try:
+        catalog = get_catalog(current_app.config['DATA_DIR'])
+        if website_id not in catalog.by_id:
+            return jsonify({"error": "Website not found"}), 404
+        
+        limit = get_limit(request.args.get('limit'))
+        try:
+            results = catalog.similar(website_id=website_id, limit=limit)
+        except ValueError:
+            return jsonify({"error": "Website has no palette"}), 400
+        
+        return jsonify(similar_response(catalog, results, website_id=website_id)), 200
+    
+    except Exception as e:
+        logger.exception(f"Error finding websites similar to {website_id}")
+        return jsonify({"error": str(e)}), 500
+
+@api.route('/images/<path:filename>', methods=['GET'])
+def get_image(filename):
+    """
+    Serve a downloaded image or one of its derivatives
+    
+    Files are sent by send_file with conditional and Range request
+    handling, so the WSGI server can hand them to sendfile() (or a front
+    server to X-Sendfile with USE_X_SENDFILE) without copying the bytes
+    through Python. Derivatives under ``derived/`` are content-addressed
+    and cached as immutable; originals are named after their website and
+    revalidated after CACHE_TIMEOUT.
+    """
+    immutable = filename.startswith(f"{DERIVED_DIR}/")
+    try:
+        response = send_from_directory(
+            os.path.abspath(image_dir(current_app.config['DATA_DIR'])), filename,
+            conditional=True,
+            etag=True,
+            max_age=IMMUTABLE_MAX_AGE if immutable else Config.CACHE_TIMEOUT
+        )
+    except NotFound:
+        return jsonify({"error": "Image not found"}), 404
+    
+    response.cache_control.public = True
+    if immutable:
+        response.cache_control.immutable = True
+    return response
+
 @api.route('/palettes', methods=['GET'])
+@cached_response
 def get_palettes():
-    """Get all color palettes"""
+    """
+    Get all color palettes
+    
+    Paginated by ``page`` or ``cursor``, see paginate().
+    """
     try:
-        # In a real application, this would query a database
-        # For now, we'll extract palettes from the websites data
-        data_file = os.path.join(current_app.config['DATA_DIR'], 'websites.json')
+        catalog = get_catalog(current_app.config['DATA_DIR'])
+        websites, fields = paginate(catalog, catalog.with_palette, with_palette=True)
         
-        if not os.path.exists(data_file):
-            return jsonify([]), 200
+        # Extract only the palettes
+        palettes = [palette_record(catalog, w) for w in websites]
         
-        with open(data_file, 'r') as f:
-            websites = json.load(f)
+        return jsonify({'palettes': palettes, **fields}), 200
+    
+    except InvalidCursor as e:
+        return jsonify({"error": str(e)}), 400
+    
+    except Exception as e:
+        logger.exception("Error retrieving palettes")
+        return jsonify({"error": str(e)}), 500
+
+@api.route('/palettes/export', methods=['GET'])
+@cached_response
+def export_palettes():
+    """Stream all color palettes as newline-delimited JSON"""
+    try:
+        catalog = get_catalog(current_app.config['DATA_DIR'])
+        return ndjson_response((palette_record(catalog, w) for w in catalog.with_palette), 'palettes.ndjson')
+    
+    except Exception as e:
+        logger.exception("Error exporting palettes")
+        return jsonify({"error": str(e)}), 500
+
+@api.route('/palettes/similar', methods=['POST'])
+def find_similar_palettes():
+    """
+    Get the websites whose palettes are closest to a given palette
+    
+    Takes ``colors`` (a list of hex colors, or a comma-separated string)
+    and an optional ``limit`` as JSON or form fields.
+    """
+    try:
+        data = request.get_json(silent=True)
+        if data is not None:
+            colors = data.get('colors') if isinstance(data, dict) else None
+            limit = data.get('limit') if isinstance(data, dict) else None
+        else:
+            colors = request.form.getlist('colors')
+            limit = request.form.get('limit')
         
-        # Extract only the palettes
-        palettes = [{'id': w['id'], 'url': w['url'], 'colors': w['palette']} for w in websites if 'palette' in w]
+        if isinstance(colors, str):
+            colors = colors.split(',')
+        if not isinstance(colors, list) or not colors:
+            return jsonify({"error": "colors must be a non-empty list of hex colors"}), 400
         
-        # Add pagination
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
-        start = (page - 1) * per_page
-        end = start + per_page
+        colors = [str(c).strip().lower().lstrip('#') for c in colors]
+        if not all(re.fullmatch(r'[0-9a-f]{6}', c) for c in colors):
+            return jsonify({"error": "colors must be 6-digit hex values"}), 400
         
-        return jsonify({
-            'palettes': palettes[start:end],
-            'total': len(palettes),
-            'page': page,
-            'per_page': per_page,
-            'total_pages': (len(palettes) + per_page - 1) // per_page
-        }), 200
+        catalog = get_catalog(current_app.config['DATA_DIR'])
+        try:
+            results = catalog.similar(colors=colors, limit=get_limit(limit))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        return jsonify(similar_response(catalog, results, colors=[f"#{c}" for c in colors])), 200
     
     except Exception as e:
-        logger.exception("Error retrieving palettes")
+        logger.exception("Error finding similar palettes")
         return jsonify({"error": str(e)}), 500
 
+def check_api_key():
+    """Whether the request carries the API key for protected endpoints"""
+    return request.headers.get('X-API-Key') == current_app.config['API_KEY']
+
 @api.route('/trigger-scrape', methods=['POST'])
 def trigger_scrape():
-    """Manually trigger scraping (protected by API key)"""
+    """
+    Queue a scrape (protected by API key)
+    
+    Scrapes run one at a time on the job queue. If an identical scrape is
+    already queued, that job is returned instead of a new one.
+    """
     try:
         # Check for API key in headers
-        api_key = request.headers.get('X-API-Key')
-        if api_key != current_app.config['API_KEY']:
+        if not check_api_key():
             return jsonify({"error": "Unauthorized"}), 401
         
         # Get optional parameters
-        pages = request.json.get('pages', 1)
-        section = request.json.get('section', 'websites')
+        data = request.get_json(silent=True) or {}
+        pages = data.get('pages', 1)
+        section = data.get('section', 'websites')
+        incremental = data.get('incremental')
+        
+        # bool is a subclass of int, so reject true/false explicitly
+        if isinstance(pages, bool) or not isinstance(pages, int) or pages < 1:
+            return jsonify({"error": "pages must be a positive integer"}), 400
+        # A slug, so the section can't turn the listing URL into another host or path
+        if not isinstance(section, str) or not re.fullmatch(r'[a-z0-9-]+', section):
+            return jsonify({"error": "section must be a slug of lowercase letters, digits and hyphens"}), 400
+        if incremental is not None and not isinstance(incremental, bool):
+            return jsonify({"error": "incremental must be true or false"}), 400
         
-        # Trigger scraping in a background thread to not block the response
-        import threading
-        thread = threading.Thread(target=scrape_awwwards, kwargs={
+        job, created = get_job_manager().submit('scrape', {
             'pages': pages,
-            'section': section
+            'section': section,
+            'incremental': incremental
         })
-        thread.daemon = True
-        thread.start()
         
-        return jsonify({"message": "Scraping initiated"}), 202
+        response = jsonify({
+            "message": "Scraping queued" if created else "An identical scrape is already queued",
+            "job": job.to_dict()
+        })
+        response.headers['Location'] = f"/api/jobs/{job.id}"
+        return response, 202
     
     except Exception as e:
         logger.exception("Error triggering scrape")
         return jsonify({"error": str(e)}), 500
 
+@api.route('/jobs', methods=['GET'])
+def get_jobs():
+    """Get recent background jobs, newest first"""
+    try:
+        return jsonify({'jobs': [job.to_dict() for job in get_job_manager().list()]}), 200
+    
+    except Exception as e:
+        logger.exception("Error retrieving jobs")
+        return jsonify({"error": str(e)}), 500
+
+@api.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get the status, progress and throughput of a background job"""
+    try:
+        job = get_job_manager().get(job_id)
+        if job is None:
+            return jsonify({"error": "Job not found"}), 404
+        
+        return jsonify(job.to_dict()), 200
+    
+    except Exception as e:
+        logger.exception(f"Error retrieving job {job_id}")
+        return jsonify({"error": str(e)}), 500
+
+@api.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """Cancel a queued or running job (protected by API key)"""
+    try:
+        if not check_api_key():
+            return jsonify({"error": "Unauthorized"}), 401
+        
+        job = get_job_manager().cancel(job_id)
+        if job is None:
+            return jsonify({"error": "Job not found"}), 404
+        
+        return jsonify(job.to_dict()), 202
+    
+    except Exception as e:
+        logger.exception(f"Error cancelling job {job_id}")
+        return jsonify({"error": str(e)}), 500
+
 @api.route('/search', methods=['GET'])
+@cached_response
 def search():
-    """Search websites by tags, title, or colors"""
+    """
+    Search websites by tags, title, or colors
+    
+    Text matches are ranked by relevance unless ``sort=catalog`` is given.
+    The color filter accepts optional ``metric`` (rgb, de76, de2000) and
+    ``threshold`` parameters.
+    """
     try:
         # Get search parameters
         query = request.args.get('q', '').lower()
         tag = request.args.get('tag', '').lower()
         color = request.args.get('color', '').lower().lstrip('#')
+        metric = request.args.get('metric')
+        threshold = request.args.get('threshold', type=float)
+        sort = request.args.get('sort')
         
-        data_file = os.path.join(current_app.config['DATA_DIR'], 'websites.json')
-        
-        if not os.path.exists(data_file):
-            return jsonify([]), 200
+        if color and not re.fullmatch(r'[0-9a-f]{6}', color):
+            return jsonify({"error": "color must be a 6-digit hex value"}), 400
+        if threshold is not None and not (math.isfinite(threshold) and threshold >= 0):
+            return jsonify({"error": "threshold must be a finite, non-negative number"}), 400
+        if metric and metric not in COLOR_METRICS:
+            return jsonify({"error": f"metric must be one of {', '.join(COLOR_METRICS)}"}), 400
+        if sort and sort not in ('relevance', 'catalog'):
+            return jsonify({"error": "sort must be relevance or catalog"}), 400
         
-        with open(data_file, 'r') as f:
-            websites = json.load(f)
-        
-        # Filter websites
-        results = websites
-        
-        if query:
-            results = [w for w in results if query in w.get('title', '').lower() or 
-                      any(query in tag.lower() for tag in w.get('tags', []))]
-        
-        if tag:
-            results = [w for w in results if tag in [t.lower() for t in w.get('tags', [])]]
-        
-        if color:
-            # Match websites with a color similar to the search color
-            def is_color_similar(hex_color1, hex_color2, threshold=30):
-                # Convert hex to RGB
-                r1, g1, b1 = int(hex_color1[0:2], 16), int(hex_color1[2:4], 16), int(hex_color1[4:6], 16)
-                r2, g2, b2 = int(hex_color2[0:2], 16), int(hex_color2[2:4], 16), int(hex_color2[4:6], 16)
-                
-                # Calculate Euclidean distance
-                distance = ((r1 - r2) ** 2 + (g1 - g2) ** 2 + (b1 - b2) ** 2) ** 0.5
-                return distance <= threshold
-            
-            results = [w for w in results if any(is_color_similar(color, c.lstrip('#').lower()) 
-                                               for c in w.get('palette', []))]
+        # Intersect the catalog's text, tag and color indexes
+        catalog = get_catalog(current_app.config['DATA_DIR'])
+        results = catalog.search(query=query, tag=tag, color=color, threshold=threshold,
+                                 metric=metric, sort=sort)
         
         # Add pagination
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
+        page = max(1, request.args.get('page', 1, type=int))
+        per_page = get_per_page()
         start = (page - 1) * per_page
         end = start + per_page
         
         return jsonify({
-            'websites': results[start:end],
+            'websites': [catalog.serialize(w) for w in results[start:end]],
             'total': len(results),
             'page': page,
             'per_page': per_page,
@@ -188,6 +453,24 @@ def search():
         logger.exception("Error searching websites")
         return jsonify({"error": str(e)}), 500
 
+@api.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@api.after_request
+def record_request_latency(response):
+    """Observe the request latency by endpoint (streamed bodies: until the first byte)"""
+    start = g.pop('request_start', None)
+    if start is not None:
+        REQUEST_SECONDS.observe(time.perf_counter() - start, request.endpoint or 'unknown',
+                                request.method, str(response.status_code))
+    return response
+
+def metrics():
+    """Stage timings, request latencies and counters in the Prometheus text format"""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
 def setup_routes(app):
-    """Register API blueprint with the app"""
+    """Register API blueprint and the /metrics endpoint with the app"""
     app.register_blueprint(api, url_prefix='/api')
+    app.add_url_rule('/metrics', 'metrics', metrics)
@@ -1,12 +1,14 @@
 from flask import Flask, jsonify
+from flask.helpers import get_debug_flag
 from flask_cors import CORS
+from werkzeug.serving import is_running_from_reloader
 from apscheduler.schedulers.background import BackgroundScheduler
 import os
 import logging
 from datetime import datetime
 
 from api import setup_routes
-from scraper import scrape_awwwards
+from jobs import claim_job_queue, get_job_manager
 from config import Config
 
 # Configure logging
@@ -24,6 +26,11 @@ def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
     
+    # One process per data directory, the job queue lives in its memory. In
+    # debug mode the reloader's watcher process loads the app but never serves.
+    if not get_debug_flag() or is_running_from_reloader():
+        claim_job_queue(app.config['DATA_DIR'])
+    
     # Enable CORS
     CORS(app)
     
@@ -42,12 +49,16 @@ def create_app(config_class=Config):
     
     return app
 
+def queue_scheduled_scrape():
+    """Queue a scrape on the job queue, so it never overlaps an API-triggered one"""
+    get_job_manager().submit('scrape', source='scheduler')
+
 def schedule_scraping():
     """Schedule periodic scraping of Awwwards websites"""
     logger.info("Setting up scheduled scraping")
     scheduler = BackgroundScheduler()
     # Run scraping job once a day at midnight
-    scheduler.add_job(func=scrape_awwwards, trigger="cron", hour=0)
+    scheduler.add_job(func=queue_scheduled_scrape, trigger="cron", hour=0)
     scheduler.start()
     logger.info("Scheduled scraping initialized")
 
@@ -57,8 +68,8 @@ if __name__ == "__main__":
     # Run initial scraping if database is empty
     # This could be checked against a database condition
     if os.environ.get("RUN_INITIAL_SCRAPE", "false").lower() == "true":
-        logger.info("Running initial scrape")
-        scrape_awwwards()
+        logger.info("Queueing initial scrape")
+        get_job_manager().submit('scrape', source='startup')
     
     # Set up scheduled scraping
     if os.environ.get("ENABLE_SCHEDULED_SCRAPING", "true").lower() == "true":
@@ -0,0 +1,342 @@
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+from color_index import ColorIndex
+from color_math import contrast_matrix, hex_to_rgb_array, text_colors
+from config import Config
+from palette_store import PaletteArray, load_palettes
+from search_index import TextIndex
+from similarity_index import SimilarityIndex
+from storage import get_store
+
+logger = logging.getLogger(__name__)
+
+class Catalog:
+    """
+    Read-only in-memory snapshot of the website catalog
+    
+    Snapshots are never modified after they are built, so request handlers
+    can use one without locking while a newer snapshot is being prepared.
+    
+    Palettes are held in a columnar PaletteArray rather than in the website
+    dicts, together with their swatch text colors and contrast matrices;
+    serialize() adds them back when a website is returned to a client.
+    """
+    
+    def __init__(self, websites, version, palettes=None, accessibility=None, color_index=None,
+                 text_index=None, similarity_index=None, updated_at=None):
+        if palettes is None:
+            palettes = PaletteArray.build(websites)
+        websites = [_without_palette(w) for w in websites]
+        
+        self.websites = websites
+        self.palettes = palettes
+        # Accessibility data of every palette row: contrast ratios in hundredths
+        # and whether each swatch needs white text
+        self.contrast, self.white_text = accessibility or _accessibility(palettes.colors)
+        self.version = version
+        # Unix time of the store write this snapshot reflects, if known
+        self.updated_at = updated_at
+        self.by_id = {w['id']: w for w in websites}
+        # Catalog positions follow the store's insertion order and never move
+        self.positions = {w['id']: i for i, w in enumerate(websites)}
+        self.palette_positions = palettes.positions()
+        self.with_palette = [websites[i] for i in self.palette_positions]
+        self.color_index = color_index or ColorIndex.build(palettes)
+        self.text_index = text_index or TextIndex.build(websites)
+        self.similarity_index = similarity_index or SimilarityIndex.build(palettes)
+    
+    def with_changes(self, changed, version, updated_at=None):
+        """
+        Build the next snapshot from websites written since this one
+        
+        Updated websites keep their position, new ones are appended. When
+        websites were only appended, the indexes are extended rather than
+        rebuilt. Accessibility data is only computed for the changed rows.
+        """
+        websites = list(self.websites)
+        updated, appended = {}, []
+        
+        for website in changed:
+            if website['id'] in self.positions:
+                updated[self.positions[website['id']]] = website
+            else:
+                appended.append(website)
+        
+        for position, website in updated.items():
+            websites[position] = website
+        websites.extend(appended)
+        palettes = self.palettes.with_changes(updated, appended)
+        
+        # Wider palettes change the embedding size, so they need a rebuild too
+        if palettes.width != self.palettes.width:
+            return Catalog(websites, version, palettes=palettes, updated_at=updated_at)
+        
+        start = len(self.websites)
+        added_contrast, added_white_text = _accessibility(palettes.colors[start:])
+        contrast = np.concatenate([self.contrast, added_contrast])
+        white_text = np.concatenate([self.white_text, added_white_text])
+        if updated:
+            # The concatenated arrays are new, so the rows can be replaced in place
+            rows = np.fromiter(updated.keys(), dtype=np.int64, count=len(updated))
+            contrast[rows], white_text[rows] = _accessibility(palettes.colors[rows])
+            return Catalog(websites, version, palettes=palettes, accessibility=(contrast, white_text),
+                           updated_at=updated_at)
+        
+        return Catalog(
+            websites, version,
+            palettes=palettes,
+            accessibility=(contrast, white_text),
+            color_index=self.color_index.extend(palettes.rows(start), start),
+            text_index=self.text_index.extend(websites[start:], start),
+            similarity_index=self.similarity_index.extend(palettes.rows(start), start),
+            updated_at=updated_at,
+        )
+    
+    def page_after(self, website_id=None, limit=20, with_palette=False):
+        """
+        Keyset page of websites in catalog order
+        
+        Args:
+            website_id: Last website of the previous page, None for the first page
+            limit: Maximum number of websites to return
+            with_palette: Only include websites that have a palette
+        
+        Returns:
+            Tuple of (list of website dicts, whether more websites follow)
+        
+        Raises:
+            KeyError: If website_id is not in the catalog
+        """
+        start = 0 if website_id is None else self.positions[website_id] + 1
+        if with_palette:
+            websites = self.with_palette
+            start = int(np.searchsorted(self.palette_positions, start))
+        else:
+            websites = self.websites
+        
+        end = start + limit
+        return websites[start:end], end < len(websites)
+    
+    def palette(self, website):
+        """Palette of a catalog website as a list of '#rrggbb' strings"""
+        return self.palettes.hex(self.positions[website['id']])
+    
+    def accessibility(self, website):
+        """
+        Text color for each swatch and the swatches' contrast matrix
+        
+        Read from the snapshot's precomputed arrays, contrast ratios are
+        rounded to two decimals.
+        """
+        position = self.positions[website['id']]
+        count = self.palettes.counts[position]
+        return {
+            'text_colors': ['#ffffff' if white else '#000000'
+                            for white in self.white_text[position, :count].tolist()],
+            'contrast': (self.contrast[position, :count, :count] / 100).tolist()
+        }
+    
+    def serialize(self, website):
+        """Website dict as returned to clients, with its palette"""
+        position = self.positions[website['id']]
+        if not self.palettes.counts[position]:
+            return website
+        return {**website, 'palette': self.palettes.hex(position), **self.accessibility(website)}
+    
+    def similar(self, colors=None, website_id=None, limit=10):
+        """
+        Websites with the palettes closest to a palette
+        
+        Args:
+            colors: Query palette as hex strings
+            website_id: Use this website's palette instead (and leave it out)
+            limit: Maximum number of results
+        
+        Returns:
+            List of (website dict, distance) tuples, closest first
+        
+        Raises:
+            KeyError: If website_id is not in the catalog
+            ValueError: If the palette is empty or has more colors than the catalog's palettes
+        """
+        exclude = None
+        if website_id is not None:
+            exclude = self.positions[website_id]
+            rgb = self.palettes.colors[exclude, :self.palettes.counts[exclude]]
+        else:
+            rgb = hex_to_rgb_array(colors or [])
+        
+        if not 1 <= len(rgb) <= self.similarity_index.width:
+            raise ValueError(f"Palette must have 1 to {self.similarity_index.width} colors")
+        
+        matches = self.similarity_index.query(self.palettes, rgb, limit, exclude=exclude)
+        return [(self.websites[position], distance) for position, distance in matches]
+    
+    def search(self, query=None, tag=None, color=None, threshold=None, metric=None, sort=None):
+        """
+        Search websites through the text, tag and color indexes
+        
+        Each filter produces a set of catalog positions and the result is
+        their intersection.
+        
+        Args:
+            query: Free text matched against title and tag tokens
+            tag: Exact tag (case-insensitive)
+            color: Hex color matched against palette colors
+            threshold: Color distance threshold, see ColorIndex.query
+            metric: Color distance metric, see ColorIndex.query
+            sort: 'relevance' (default when there is a query) or 'catalog'
+        
+        Returns:
+            List of matching website dicts
+        """
+        positions = None
+        scores = None
+        
+        if query:
+            scores = self.text_index.score(query)
+            positions = set(scores)
+        
+        if tag:
+            tagged = self.text_index.with_tag(tag)
+            positions = tagged if positions is None else positions & tagged
+        
+        if color:
+            matched = set(self.color_index.query(color, threshold, metric).tolist())
+            positions = matched if positions is None else positions & matched
+        
+        if positions is None:
+            return self.websites
+        
+        sort = sort or ('relevance' if scores else 'catalog')
+        if sort == 'relevance' and scores:
+            ordered = sorted(positions, key=lambda p: (-scores[p], p))
+        else:
+            ordered = sorted(positions)
+        return [self.websites[p] for p in ordered]
+
+def _accessibility(colors):
+    """
+    Accessibility data of a batch of palette rows
+    
+    Args:
+        colors: (N, width, 3) uint8 RGB palettes
+    
+    Returns:
+        Tuple of ((N, width, width) uint16 contrast ratios in hundredths,
+        (N, width) bool mask of the swatches that need white text)
+    """
+    contrast = np.rint(contrast_matrix(colors) * 100).astype(np.uint16)
+    white_text = (text_colors(colors) == 255).all(axis=-1)
+    return contrast, white_text
+
+# Fields served from the snapshot's palette arrays instead of the website dicts.
+# Records written before the catalog derived text_colors and contrast still carry them.
+_PALETTE_FIELDS = ('palette', 'text_colors', 'contrast')
+
+def _without_palette(website):
+    if not website.get('palette'):
+        return website
+    return {key: value for key, value in website.items() if key not in _PALETTE_FIELDS}
+
+class CatalogCache:
+    """
+    Keeps the current Catalog snapshot for one data directory
+    
+    The snapshot is reloaded only when the store's files change on disk
+    (mtime or size), when invalidate() is called, or after
+    Config.CACHE_TIMEOUT seconds. A reload only reads the websites written
+    since the previous snapshot.
+    
+    The first load memory-maps the palette file of the store version,
+    writing it if it is missing. Later snapshots hold their palettes in RAM
+    and aren't written back, the next process to start writes the file for
+    the then current version.
+    """
+    
+    def __init__(self, data_dir, timeout=None):
+        self.data_dir = data_dir
+        self.timeout = timeout if timeout is not None else Config.CACHE_TIMEOUT
+        self._lock = threading.Lock()
+        self._catalog = None
+        self._signature = None
+        self._checked_at = 0.0
+        self._stale = True
+    
+    def _file_signature(self):
+        """mtime and size of the store database and its write-ahead log"""
+        store_path = get_store(self.data_dir).db_path
+        signature = []
+        for path in (store_path, f"{store_path}-wal"):
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+    
+    def invalidate(self):
+        """Force the next get() to check the store for changes"""
+        self._stale = True
+    
+    def get(self):
+        """Return an up-to-date Catalog snapshot"""
+        signature = self._file_signature()
+        expired = time.monotonic() - self._checked_at > self.timeout
+        
+        if self._catalog is not None and not self._stale and not expired and signature == self._signature:
+            return self._catalog
+        
+        with self._lock:
+            # Another thread may have refreshed while we waited for the lock
+            if self._catalog is None or self._stale or expired or signature != self._signature:
+                self._refresh(signature)
+            return self._catalog
+    
+    def _refresh(self, signature):
+        store = get_store(self.data_dir)
+        # Clear the flag first so a write during the reload triggers another
+        self._stale = False
+        version = store.version()
+        updated_at = store.updated_at()
+        
+        if self._catalog is None:
+            start = time.perf_counter()
+            websites = list(store.iter_all())
+            palettes = load_palettes(self.data_dir, version, websites)
+            self._catalog = Catalog(websites, version, palettes=palettes, updated_at=updated_at)
+            logger.info(f"Loaded catalog of {len(self._catalog.websites)} websites "
+                        f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+        elif version != self._catalog.version:
+            changed = store.changes_since(self._catalog.version)
+            # Not persisted: the palette file is only written on a full load, so
+            # requests never wait on it. Until then the snapshot's palettes are in RAM
+            self._catalog = self._catalog.with_changes(changed, version, updated_at)
+            logger.info(f"Refreshed catalog with {len(changed)} changed websites")
+        
+        self._signature = signature
+        self._checked_at = time.monotonic()
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def _get_cache(data_dir=None):
+    data_dir = data_dir or Config.DATA_DIR
+    with _caches_lock:
+        cache = _caches.get(data_dir)
+        if cache is None:
+            cache = _caches[data_dir] = CatalogCache(data_dir)
+        return cache
+
+def get_catalog(data_dir=None):
+    """Return the current Catalog snapshot for a data directory"""
+    return _get_cache(data_dir).get()
+
+def invalidate(data_dir=None):
+    """Signal that the catalog changed, e.g. after the scraper wrote websites"""
+    _get_cache(data_dir).invalidate()
@@ -0,0 +1,138 @@
+import argparse
+import logging
+import os
+
+import catalog
+from config import Config
+from color_extractor import algorithm_version, extract_colors_batch
+from images import build_derivatives, image_dir
+from palette_cache import get_palette_cache
+from storage import get_store, migrate_json
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp'}
+
+def reextract(workers=None, num_colors=None):
+    """
+    Re-extract palettes for every image in the data directory
+    
+    Images are matched to websites through their ``local_image`` field and
+    the updated palettes and algorithm version are written back to the store.
+    
+    Args:
+        workers: Number of worker processes (defaults to the CPU count)
+        num_colors: Number of colors to extract per image
+    
+    Returns:
+        Tuple of (updated, failed) counts
+    """
+    num_colors = num_colors or Config.NUM_COLORS
+    images_path = image_dir()
+    store = get_store()
+    by_image = {w['local_image']: w for w in store.iter_all() if w.get('local_image')}
+    
+    paths = [
+        os.path.join(images_path, name)
+        for name in sorted(os.listdir(images_path))
+        if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS
+    ]
+    logger.info(f"Re-extracting palettes for {len(paths)} images with algorithm {algorithm_version()}")
+    
+    updated_websites = []
+    failed = 0
+    for result in extract_colors_batch(paths, workers=workers, num_colors=num_colors):
+        if result.error:
+            failed += 1
+            logger.error(f"Failed to extract {result.path}: {result.error}")
+            continue
+        
+        website = by_image.get(os.path.basename(result.path))
+        if website is None:
+            logger.warning(f"No website references {result.path}")
+            continue
+        
+        website['palette'] = result.colors
+        website['palette_version'] = algorithm_version()
+        updated_websites.append(website)
+    
+    updated = store.upsert_many(updated_websites)
+    catalog.invalidate()
+    logger.info(f"Re-extraction complete. {updated} palettes updated, {failed} failed.")
+    
+    cache = get_palette_cache()
+    if cache is not None:
+        logger.info(f"Palette cache: {cache.stats()}")
+    return updated, failed
+
+def derivatives():
+    """
+    Build the image derivatives of every stored website that has an image
+    
+    Derivatives already on disk are reused, so this mainly fills in
+    websites scraped before derivatives existed.
+    
+    Returns:
+        Tuple of (updated, failed) counts
+    """
+    store = get_store()
+    updated_websites = []
+    failed = 0
+    for website in store.iter_all():
+        if not website.get('local_image'):
+            continue
+        
+        try:
+            names = build_derivatives(os.path.join(image_dir(), website['local_image']))
+        except Exception as e:
+            failed += 1
+            logger.error(f"Failed to build derivatives of {website['local_image']}: {e}")
+            continue
+        
+        if website.get('images') != names:
+            website['images'] = names
+            updated_websites.append(website)
+    
+    updated = store.upsert_many(updated_websites)
+    catalog.invalidate()
+    logger.info(f"Image derivatives complete. {updated} websites updated, {failed} failed.")
+    return updated, failed
+
+def migrate(json_file=None):
+    """
+    Import websites.json into the website store
+    
+    Existing websites with the same id are overwritten, so the command can be
+    re-run safely.
+    
+    Returns:
+        Number of websites imported
+    """
+    json_file = json_file or os.path.join(Config.DATA_DIR, 'websites.json')
+    return migrate_json(get_store(), json_file)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Awwwards color palette maintenance commands")
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    reextract_parser = commands.add_parser('reextract', help="Re-extract palettes for all stored images")
+    reextract_parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    reextract_parser.add_argument('--num-colors', type=int, default=None, help="Colors per palette")
+    
+    commands.add_parser('derivatives', help="Build resized image derivatives for all stored images")
+    
+    migrate_parser = commands.add_parser('migrate', help="Import websites.json into the website store")
+    migrate_parser.add_argument('json_file', nargs='?', default=None, help="Path to websites.json (default: DATA_DIR)")
+    
+    args = parser.parse_args(argv)
+    
+    if args.command == 'reextract':
+        reextract(workers=args.workers, num_colors=args.num_colors)
+    elif args.command == 'derivatives':
+        derivatives()
+    elif args.command == 'migrate':
+        migrate(args.json_file)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -1,20 +1,340 @@
 from PIL import Image
 import numpy as np
-from sklearn.cluster import KMeans
+from sklearn.cluster import KMeans, MiniBatchKMeans
+import hashlib
+import io
 import logging
 import os
 import colorsys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from config import Config
+from metrics import Stopwatch
+from palette_cache import get_palette_cache
+from utils import calculate_file_hash
 
 logger = logging.getLogger(__name__)
 
-def extract_colors_from_image(image_path, num_colors=5, resize_width=200):
+# Bump whenever a change alters the palettes produced for the same image
+ALGORITHM_VERSION = 3
+
+# Other Config settings that change the palette produced for an image
+PALETTE_SETTINGS = (
+    'FILTER_WHITE_THRESHOLD', 'FILTER_BLACK_THRESHOLD', 'FILTER_MIN_PIXELS',
+    'SAMPLE_PIXEL_BUDGET', 'MINIBATCH_SIZE', 'HISTOGRAM_BITS',
+)
+
+def algorithm_version():
+    """
+    Identifier of the palette algorithm and of every setting that changes its output
+    
+    Reads ``<version>-<quantizer>-<sampling mode>-<hash>``, the hash covering
+    PALETTE_SETTINGS, so palettes extracted with other settings never share
+    a cache key or a ``palette_version``.
+    """
+    settings = ','.join(f"{name}={getattr(Config, name)}" for name in PALETTE_SETTINGS)
+    digest = hashlib.md5(settings.encode()).hexdigest()[:8]
+    return f"{ALGORITHM_VERSION}-{Config.QUANTIZER}-{Config.SAMPLING_MODE}-{digest}"
+
+def filter_pixels(pixels, white_threshold=None, black_threshold=None, min_pixels=None):
+    """
+    Drop near-white and near-black pixels before clustering
+    
+    The whole (N, 3) array is filtered with boolean masks, so no per-pixel
+    Python objects are created.
+    
+    Args:
+        pixels: (N, 3) uint8 array of RGB pixels
+        white_threshold: Pixels above this on every channel are dropped
+        black_threshold: Pixels below this on every channel are dropped
+        min_pixels: Return the unfiltered pixels if fewer than this survive
+    
+    Returns:
+        (M, 3) array of the remaining pixels
+    """
+    if white_threshold is None:
+        white_threshold = Config.FILTER_WHITE_THRESHOLD
+    if black_threshold is None:
+        black_threshold = Config.FILTER_BLACK_THRESHOLD
+    if min_pixels is None:
+        min_pixels = Config.FILTER_MIN_PIXELS
+    
+    near_white = (pixels > white_threshold).all(axis=1)
+    near_black = (pixels < black_threshold).all(axis=1)
+    keep = ~(near_white | near_black)
+    
+    if np.count_nonzero(keep) < min_pixels:
+        # Not enough pixels after filtering, use original pixels
+        return pixels
+    
+    return pixels[keep]
+
+def quantize_kmeans(pixels, num_colors):
+    """Full K-means with ten restarts (the original extractor)"""
+    kmeans = KMeans(n_clusters=num_colors, random_state=42, n_init=10)
+    kmeans.fit(pixels)
+    return kmeans.cluster_centers_
+
+def quantize_minibatch(pixels, num_colors):
+    """Mini-batch K-means, a few restarts on small random batches"""
+    kmeans = MiniBatchKMeans(n_clusters=num_colors, random_state=42, n_init=3,
+                             batch_size=Config.MINIBATCH_SIZE)
+    kmeans.fit(pixels)
+    return kmeans.cluster_centers_
+
+def color_histogram(pixels, bits=None):
+    """
+    Bucket pixels into a 3D RGB histogram
+    
+    Args:
+        pixels: (N, 3) uint8 array
+        bits: Bits kept per channel (so 2**(3*bits) buckets)
+    
+    Returns:
+        Tuple of (mean color of each occupied bucket as an (M, 3) float
+        array, pixel count of each bucket as an (M,) array)
+    """
+    if bits is None:
+        bits = Config.HISTOGRAM_BITS
+    
+    pixels = np.asarray(pixels)
+    shift = 8 - bits
+    q = (pixels >> shift).astype(np.int64)
+    bucket = (q[:, 0] << (2 * bits)) | (q[:, 1] << bits) | q[:, 2]
+    
+    occupied, inverse, counts = np.unique(bucket, return_inverse=True, return_counts=True)
+    inverse = inverse.ravel()
+    sums = np.stack([np.bincount(inverse, weights=pixels[:, c], minlength=len(occupied))
+                     for c in range(3)], axis=1)
+    return sums / counts[:, None], counts
+
+def quantize_median_cut(pixels, num_colors):
+    """
+    Median cut over the 3D color histogram
+    
+    The box with the widest channel range (scaled by its pixel count) is
+    repeatedly split at the weighted median of that channel until there are
+    num_colors boxes. Each box contributes its weighted mean color.
+    """
+    colors, counts = color_histogram(pixels)
+    boxes = [np.arange(len(colors))]
+    
+    while len(boxes) < num_colors:
+        best, best_score, best_axis = None, 0, 0
+        for i, box in enumerate(boxes):
+            if len(box) < 2:
+                continue
+            ranges = np.ptp(colors[box], axis=0)
+            axis = int(np.argmax(ranges))
+            score = ranges[axis] * counts[box].sum()
+            if score > best_score:
+                best, best_score, best_axis = i, score, axis
+        
+        if best is None:
+            # Every box holds a single bucket, nothing left to split
+            break
+        
+        box = boxes.pop(best)
+        box = box[np.argsort(colors[box, best_axis], kind='stable')]
+        cumulative = np.cumsum(counts[box])
+        split = int(np.searchsorted(cumulative, cumulative[-1] / 2))
+        split = min(max(split, 1), len(box) - 1)
+        boxes.extend([box[:split], box[split:]])
+    
+    return np.array([np.average(colors[box], axis=0, weights=counts[box]) for box in boxes])
+
+def quantize_histogram_kmeans(pixels, num_colors):
+    """
+    Single k-means++ run over the histogram buckets
+    
+    Clustering the weighted bucket means instead of the raw pixels keeps the
+    sample count bounded by the histogram size.
+    """
+    colors, counts = color_histogram(pixels)
+    if len(colors) <= num_colors:
+        return colors
+    
+    kmeans = KMeans(n_clusters=num_colors, init='k-means++', random_state=42, n_init=1)
+    kmeans.fit(colors, sample_weight=counts)
+    return kmeans.cluster_centers_
+
+# Available quantizer backends, selected with Config.QUANTIZER
+QUANTIZERS = {
+    'kmeans': quantize_kmeans,
+    'minibatch': quantize_minibatch,
+    'median_cut': quantize_median_cut,
+    'histogram_kmeans': quantize_histogram_kmeans,
+}
+
+def quantize(pixels, num_colors, method=None):
+    """
+    Reduce pixels to a small set of representative colors
+    
+    Args:
+        pixels: (N, 3) array of RGB pixels
+        num_colors: Number of colors to return
+        method: Name of a backend in QUANTIZERS (defaults to Config.QUANTIZER)
+    
+    Returns:
+        (num_colors, 3) int array of RGB cluster centers
+    """
+    method = method or Config.QUANTIZER
+    if method not in QUANTIZERS:
+        raise ValueError(f"Unknown quantizer: {method}")
+    
+    centers = QUANTIZERS[method](pixels, num_colors)
+    return np.clip(np.asarray(centers), 0, 255).astype(int)
+
+# PIL resampling filters for the resize-based sampling modes
+RESIZE_FILTERS = {
+    'lanczos': Image.LANCZOS,
+    'box': Image.BOX,
+    'nearest': Image.NEAREST,
+}
+
+SAMPLING_MODES = tuple(RESIZE_FILTERS) + ('reduce', 'random', 'stratified')
+
+def sample_pixels(img, resize_width, mode=None, budget=None):
+    """
+    Reduce an RGB image to the pixels that get clustered
+    
+    Modes:
+        lanczos, box, nearest: resize to resize_width with that filter
+        reduce: Image.reduce by the largest integer factor that keeps the
+            image at least resize_width wide
+        random: uniform random pixels, up to a fixed pixel budget
+        stratified: one random pixel per cell of a grid sized to the budget
+    
+    Args:
+        img: PIL Image in RGB mode
+        resize_width: Target width for the resize-based modes
+        mode: One of SAMPLING_MODES (defaults to Config.SAMPLING_MODE)
+        budget: Pixel budget for random/stratified (defaults to
+            Config.SAMPLE_PIXEL_BUDGET)
+    
+    Returns:
+        (N, 3) uint8 array of RGB pixels
+    """
+    mode = mode or Config.SAMPLING_MODE
+    budget = budget or Config.SAMPLE_PIXEL_BUDGET
+    width, height = img.size
+    
+    if mode in RESIZE_FILTERS:
+        new_height = int(height * resize_width / width)
+        img = img.resize((resize_width, new_height), RESIZE_FILTERS[mode])
+        return np.asarray(img).reshape(-1, 3)
+    
+    if mode == 'reduce':
+        factor = max(1, width // resize_width)
+        if factor > 1:
+            img = img.reduce(factor)
+        return np.asarray(img).reshape(-1, 3)
+    
+    if mode not in ('random', 'stratified'):
+        raise ValueError(f"Unknown sampling mode: {mode}")
+    
+    img_array = np.asarray(img)
+    # Fixed seed so the same image always yields the same palette
+    rng = np.random.default_rng(0)
+    
+    if width * height <= budget:
+        return img_array.reshape(-1, 3)
+    
+    if mode == 'random':
+        index = rng.choice(width * height, size=budget, replace=False)
+        return img_array.reshape(-1, 3)[index]
+    
+    # Jittered grid: square cells, one pixel picked at random inside each
+    step = np.sqrt(width * height / budget)
+    ys = np.arange(0, height - step / 2, step)
+    xs = np.arange(0, width - step / 2, step)
+    ys = np.minimum((ys + rng.uniform(0, step, len(ys))).astype(int), height - 1)
+    xs = np.minimum((xs + rng.uniform(0, step, len(xs))).astype(int), width - 1)
+    return img_array[ys[:, None], xs[None, :]].reshape(-1, 3)
+
+def open_image(source, resize_width):
+    """
+    Open an image for extraction from a path, raw bytes or a file-like object
+    
+    JPEGs are decoded straight at a reduced scale (1/2, 1/4 or 1/8 in the
+    DCT domain) that is still at least resize_width wide, so large
+    thumbnails are never fully decoded.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    
+    img = Image.open(source)
+    if img.format == 'JPEG':
+        width, height = img.size
+        img.draft('RGB', (resize_width, max(1, height * resize_width // width)))
+    return img
+
+def extract_palette(source, num_colors=5, resize_width=200, timings=None):
     """
-    Extract dominant colors from an image using K-means clustering
+    Extract dominant colors from an image, raising on failure
+    
+    This is the core of extract_colors_from_image without the error
+    handling, so batch callers can report per-image failures.
+    
+    Args:
+        source: Image path, raw encoded bytes or a file-like object
+        timings: Optional dict that receives the seconds spent in the
+            decode, resize, filter and cluster stages
+    
+    Returns:
+        List of hex color codes ordered by visual appeal
+    """
+    clock = Stopwatch(timings if timings is not None else {})
+    
+    # Open and decode the image
+    img = open_image(source, resize_width)
+    img.load()
+    
+    # Convert to RGB if needed
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    clock.lap('decode')
+    
+    # Downscale or subsample to speed up processing
+    pixels = sample_pixels(img, resize_width)
+    clock.lap('resize')
+    
+    # Remove white, black, and near-white/black pixels
+    filtered_pixels = filter_pixels(pixels)
+    clock.lap('filter')
+    
+    # Cluster the pixels with the configured quantizer
+    colors = quantize(filtered_pixels, num_colors)
+    
+    # Order colors by visual appeal
+    ordered = order_colors_by_appeal(colors)
+    clock.lap('cluster')
+    return ordered
+
+def palette_cache_key(source, num_colors, resize_width):
+    """
+    Palette cache key of an image for the current algorithm
+    
+    Args:
+        source: Image path or raw encoded bytes; both hash the same content
+            the same way
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        content_hash = hashlib.md5(source).hexdigest()
+    else:
+        content_hash = calculate_file_hash(source)
+    return (content_hash, num_colors, algorithm_version(), resize_width)
+
+def extract_colors_from_image(image_path, num_colors=5, resize_width=200, use_cache=True):
+    """
+    Extract dominant colors from an image using the configured quantizer
     
     Args:
         image_path: Path to the image file
         num_colors: Number of colors to extract
         resize_width: Width to resize the image to before processing
+        use_cache: Look up and store the palette in the palette cache
     
     Returns:
         List of hex color codes
@@ -25,58 +345,18 @@ def extract_colors_from_image(image_path, num_colors=5, resize_width=200):
             logger.error(f"Image file not found: {image_path}")
             return []
         
-        # Open the image
-        img = Image.open(image_path)
-        
-        # Convert to RGB if needed
-        if img.mode != 'RGB':
-            img = img.convert('RGB')
-        
-        # Resize to speed up processing
-        width, height = img.size
-        new_height = int(height * resize_width / width)
-        img = img.resize((resize_width, new_height), Image.LANCZOS)
-        
-        # Convert to numpy array
-        img_array = np.array(img)
-        
-        # Reshape to a list of RGB pixels
-        pixels = img_array.reshape(-1, 3)
-        
-        # Remove white, black, and near-white/black pixels
-        filtered_pixels = []
-        for pixel in pixels:
-            r, g, b = pixel
-            # Skip near-white pixels
-            if r > 240 and g > 240 and b > 240:
-                continue
-            # Skip near-black pixels
-            if r < 15 and g < 15 and b < 15:
-                continue
-            filtered_pixels.append(pixel)
+        cache = get_palette_cache() if use_cache else None
+        if cache is not None:
+            key = palette_cache_key(image_path, num_colors, resize_width)
+            cached = cache.get(*key)
+            if cached is not None:
+                logger.info(f"Palette cache hit for {image_path}")
+                return cached
         
-        if len(filtered_pixels) < 100:
-            # Not enough pixels after filtering, use original pixels
-            filtered_pixels = pixels
-        else:
-            filtered_pixels = np.array(filtered_pixels)
+        ordered_colors = extract_palette(image_path, num_colors, resize_width)
         
-        # Apply K-means clustering
-        kmeans = KMeans(n_clusters=num_colors, random_state=42, n_init=10)
-        kmeans.fit(filtered_pixels)
-        
-        # Get the RGB values of the cluster centers
-        colors = kmeans.cluster_centers_.astype(int)
-        
-        # Convert to hex color codes
-        hex_colors = []
-        for color in colors:
-            r, g, b = color
-            hex_color = f"#{r:02x}{g:02x}{b:02x}"
-            hex_colors.append(hex_color)
-        
-        # Order colors by visual appeal
-        ordered_colors = order_colors_by_appeal(colors)
+        if cache is not None and ordered_colors:
+            cache.put(*key, ordered_colors)
         
         logger.info(f"Extracted {len(ordered_colors)} colors from {image_path}")
         return ordered_colors
@@ -85,6 +365,115 @@ def extract_colors_from_image(image_path, num_colors=5, resize_width=200):
         logger.exception(f"Error extracting colors from {image_path}: {e}")
         return []
 
+@dataclass
+class ExtractionResult:
+    """Outcome of extracting one image in a batch"""
+    path: str
+    colors: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    # Seconds per extraction stage, measured in the worker process
+    timings: Dict[str, float] = field(default_factory=dict)
+
+def extract_result(source, num_colors, resize_width, path=None):
+    """
+    Process pool entry point, turns exceptions into a failed ExtractionResult
+    
+    Args:
+        source: Image path or raw encoded bytes
+        path: Path reported in the result (defaults to source)
+    """
+    path = path if path is not None else source
+    timings = {}
+    try:
+        return ExtractionResult(path, extract_palette(source, num_colors, resize_width, timings), timings=timings)
+    except Exception as e:
+        return ExtractionResult(path, error=f"{type(e).__name__}: {e}", timings=timings)
+
+def extract_colors_batch(paths, workers=None, num_colors=5, resize_width=200, use_cache=True):
+    """
+    Extract palettes for many images in a process pool
+    
+    Results are yielded in completion order, not input order. A failing image
+    produces a result with ``error`` set and never stops the batch. Cache
+    lookups and stores happen in the calling process.
+    
+    Args:
+        paths: Iterable of image paths
+        workers: Number of worker processes (defaults to the CPU count)
+        num_colors: Number of colors to extract per image
+        resize_width: Width to resize each image to before processing
+        use_cache: Look up and store palettes in the palette cache
+    
+    Yields:
+        ExtractionResult for each path
+    """
+    cache = get_palette_cache() if use_cache else None
+    if cache is None:
+        yield from _extract_uncached(paths, workers, num_colors, resize_width)
+        return
+    
+    keys = {}
+    
+    def misses():
+        for path in paths:
+            try:
+                key = palette_cache_key(path, num_colors, resize_width)
+            except OSError:
+                # Let the extraction itself report the unreadable file
+                yield path
+                continue
+            
+            cached = cache.get(*key)
+            if cached is not None:
+                hits.append(ExtractionResult(path, cached))
+            else:
+                keys[path] = key
+                yield path
+    
+    hits = []
+    for result in _extract_uncached(misses(), workers, num_colors, resize_width):
+        while hits:
+            yield hits.pop()
+        if not result.error and result.colors and result.path in keys:
+            cache.put(*keys.pop(result.path), result.colors)
+        yield result
+    yield from hits
+
+def _extract_uncached(paths, workers, num_colors, resize_width):
+    """Run extract_palette over paths in a process pool, see extract_colors_batch"""
+    workers = workers or os.cpu_count() or 1
+    
+    if workers == 1:
+        for path in paths:
+            yield extract_result(path, num_colors, resize_width)
+        return
+    
+    paths = iter(paths)
+    # Keep a bounded number of images in flight so huge batches stream
+    max_pending = workers * 4
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = {}
+        
+        def submit_next():
+            for path in paths:
+                pending[executor.submit(extract_result, path, num_colors, resize_width)] = path
+                if len(pending) >= max_pending:
+                    break
+        
+        submit_next()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = pending.pop(future)
+                try:
+                    yield future.result()
+                except Exception as e:
+                    # The worker process itself died (e.g. killed by the OS)
+                    logger.exception(f"Worker failed on {path}: {e}")
+                    yield ExtractionResult(path, error=f"{type(e).__name__}: {e}")
+            submit_next()
+
 def order_colors_by_appeal(colors):
     """
     Order colors by visual appeal
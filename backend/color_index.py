@@ -0,0 +1,155 @@
+import numpy as np
+
+from color_math import DE2000_MAX_SL, delta_e2000, hex_to_rgb_array, rgb_to_lab
+from config import Config
+
+METRICS = ('rgb', 'de76', 'de2000')
+
+# Upper bounds on the distance between two sRGB colors, larger thresholds match everything.
+# rgb: the cube diagonal; de76: the diagonal of the gamut's CIELAB bounding box;
+# de2000: the largest value over the gamut is about 119
+MAX_DISTANCE = {'rgb': 255 * np.sqrt(3), 'de76': 291.6, 'de2000': 130.0}
+
+class UniformGrid:
+    """
+    Uniform grid over 3D points for fixed-radius neighbour queries
+    
+    Points are bucketed into cubic cells and sorted by cell key, so each
+    neighbouring cell is one searchsorted range instead of a scan. Queries
+    only visit cells inside the occupied extent, and fall back to returning
+    every point once that would mean more cells than points.
+    """
+    
+    # Cell coordinates are packed into one int64 key, 2**20 cells per axis
+    _AXIS_BITS = 20
+    _OFFSET = 1 << (_AXIS_BITS - 1)
+    
+    def __init__(self, points, cell_size):
+        self.cell_size = float(cell_size)
+        cells = np.floor(points / self.cell_size).astype(np.int64)
+        keys = self._keys(cells)
+        self.size = len(points)
+        self.lo = cells.min(axis=0) if self.size else np.zeros(3, dtype=np.int64)
+        self.hi = cells.max(axis=0) if self.size else np.zeros(3, dtype=np.int64)
+        self.order = np.argsort(keys, kind='stable')
+        self.sorted_keys = keys[self.order]
+    
+    def _keys(self, cells):
+        cells = cells + self._OFFSET
+        return (cells[..., 0] << (2 * self._AXIS_BITS)) | (cells[..., 1] << self._AXIS_BITS) | cells[..., 2]
+    
+    def candidates(self, center, radius):
+        """Indices of all points in cells that intersect the query ball"""
+        cell = np.floor(np.asarray(center) / self.cell_size).astype(np.int64)
+        reach = int(np.ceil(radius / self.cell_size))
+        # Cells of the ball clipped to the occupied extent, per axis
+        first = np.maximum(cell - reach, self.lo)
+        last = np.minimum(cell + reach, self.hi)
+        if (last < first).any():
+            return np.empty(0, dtype=np.int64)
+        if np.prod(last - first + 1) > self.size:
+            return np.arange(self.size)
+        
+        axes = [np.arange(a, b + 1) for a, b in zip(first, last)]
+        cells = np.stack(np.meshgrid(*axes, indexing='ij'), axis=-1).reshape(-1, 3)
+        keys = self._keys(cells)
+        
+        starts = np.searchsorted(self.sorted_keys, keys, side='left')
+        ends = np.searchsorted(self.sorted_keys, keys, side='right')
+        nonempty = ends > starts
+        if not nonempty.any():
+            return np.empty(0, dtype=np.int64)
+        
+        return np.concatenate([self.order[s:e] for s, e in zip(starts[nonempty], ends[nonempty])])
+
+class ColorIndex:
+    """
+    Index of every palette color in the catalog
+    
+    Palette colors are kept as flat RGB and CIELAB arrays with the catalog
+    position of the website each color belongs to. Color queries are radius
+    lookups through a uniform grid, so only nearby colors are compared.
+    """
+    
+    def __init__(self, rgb, owner):
+        self.rgb = rgb.astype(np.float64)
+        self.lab = rgb_to_lab(self.rgb)
+        self.owner = owner
+        self._grids = {}
+        self._lightness_order = None
+    
+    @classmethod
+    def build(cls, palettes, start=0):
+        """
+        Index the colors of a PaletteArray
+        
+        Args:
+            palettes: PaletteArray rows in catalog order
+            start: Catalog position of the first row
+        """
+        return cls(*palettes.flat(start))
+    
+    def extend(self, palettes, start):
+        """Return a new index with palette rows appended at catalog position start"""
+        added = ColorIndex.build(palettes, start)
+        index = ColorIndex.__new__(ColorIndex)
+        index.rgb = np.concatenate([self.rgb, added.rgb])
+        index.lab = np.concatenate([self.lab, added.lab])
+        index.owner = np.concatenate([self.owner, added.owner])
+        index._grids = {}
+        index._lightness_order = None
+        return index
+    
+    def _grid(self, space):
+        grid = self._grids.get(space)
+        if grid is None:
+            points = self.rgb if space == 'rgb' else self.lab
+            grid = self._grids[space] = UniformGrid(points, Config.COLOR_INDEX_CELL_SIZE)
+        return grid
+    
+    def _lightness_band(self, lightness, half_width):
+        """Indices of colors whose L* lies within half_width of lightness"""
+        if self._lightness_order is None:
+            self._lightness_order = np.argsort(self.lab[:, 0], kind='stable')
+        sorted_l = self.lab[self._lightness_order, 0]
+        lo = np.searchsorted(sorted_l, lightness - half_width, side='left')
+        hi = np.searchsorted(sorted_l, lightness + half_width, side='right')
+        return self._lightness_order[lo:hi]
+    
+    def query(self, hex_color, threshold=None, metric=None):
+        """
+        Find websites with a palette color close to the given color
+        
+        Args:
+            hex_color: Query color as '#rrggbb' or 'rrggbb'
+            threshold: Maximum distance in units of the metric, clamped to
+                MAX_DISTANCE of the metric
+            metric: 'rgb' (Euclidean RGB), 'de76' or 'de2000'
+        
+        Returns:
+            Sorted array of catalog positions of matching websites
+        """
+        threshold = Config.COLOR_SEARCH_THRESHOLD if threshold is None else threshold
+        metric = metric or Config.COLOR_SEARCH_METRIC
+        if metric not in METRICS:
+            raise ValueError(f"Unknown color metric: {metric}")
+        threshold = min(threshold, MAX_DISTANCE[metric])
+        
+        if len(self.owner) == 0:
+            return np.empty(0, dtype=np.int64)
+        
+        rgb = hex_to_rgb_array([hex_color])[0].astype(np.float64)
+        lab = rgb_to_lab(rgb)
+        
+        if metric == 'rgb':
+            candidates = self._grid('rgb').candidates(rgb, threshold)
+            distances = np.sqrt(((self.rgb[candidates] - rgb) ** 2).sum(axis=1))
+        elif metric == 'de76':
+            candidates = self._grid('lab').candidates(lab, threshold)
+            distances = np.sqrt(((self.lab[candidates] - lab) ** 2).sum(axis=1))
+        else:
+            # ΔE2000 has no grid-friendly bound, but lightness alone rules out most colors
+            candidates = self._lightness_band(lab[0], threshold * DE2000_MAX_SL)
+            distances = delta_e2000(self.lab[candidates], lab)
+        
+        return np.unique(self.owner[candidates[distances <= threshold]])
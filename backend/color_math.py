@@ -0,0 +1,197 @@
+import numpy as np
+
+# D65 reference white used for the sRGB -> CIELAB conversion
+_XYZ_WHITE = np.array([0.95047, 1.0, 1.08883])
+
+_RGB_TO_XYZ = np.array([
+    [0.4124564, 0.3575761, 0.1804375],
+    [0.2126729, 0.7151522, 0.0721750],
+    [0.0193339, 0.1191920, 0.9503041],
+])
+
+# WCAG 2.0 sRGB -> linear light for every 8-bit channel value. WCAG uses
+# 0.03928 as the threshold of the linear segment, slightly below sRGB's 0.04045.
+_WCAG_LINEAR = np.where(
+    np.arange(256) / 255.0 <= 0.03928,
+    np.arange(256) / 255.0 / 12.92,
+    ((np.arange(256) / 255.0 + 0.055) / 1.055) ** 2.4,
+)
+
+_LUMINANCE_WEIGHTS = np.array([0.2126, 0.7152, 0.0722])
+
+# Perceived brightness weights (per mille) for picking black or white text
+_BRIGHTNESS_WEIGHTS = np.array([299, 587, 114])
+
+_BLACK = np.array([0, 0, 0], dtype=np.uint8)
+_WHITE = np.array([255, 255, 255], dtype=np.uint8)
+
+def hex_to_rgb_array(hex_colors):
+    """
+    Convert a list of hex color codes to an RGB array
+    
+    Args:
+        hex_colors: Iterable of '#rrggbb' strings (the '#' is optional)
+    
+    Returns:
+        (N, 3) uint8 array
+    """
+    values = [int(c.lstrip('#')[:6], 16) for c in hex_colors]
+    packed = np.array(values, dtype=np.uint32)
+    return np.stack([(packed >> 16) & 0xff, (packed >> 8) & 0xff, packed & 0xff], axis=-1).astype(np.uint8)
+
+def rgb_array_to_hex(rgb):
+    """
+    Convert an (N, 3) RGB array to a list of '#rrggbb' strings
+    """
+    return [f"#{r:02x}{g:02x}{b:02x}" for r, g, b in np.asarray(rgb, dtype=int)]
+
+def srgb_to_linear(rgb):
+    """
+    Convert 0-255 sRGB values to linear light in [0, 1]
+    """
+    c = np.asarray(rgb, dtype=np.float64) / 255.0
+    return np.where(c <= 0.04045, c / 12.92, ((c + 0.055) / 1.055) ** 2.4)
+
+def rgb_to_lab(rgb):
+    """
+    Convert sRGB colors to CIELAB (D65)
+    
+    Args:
+        rgb: Array of shape (..., 3) with 0-255 channel values
+    
+    Returns:
+        float64 array of the same shape holding L*, a*, b*
+    """
+    xyz = srgb_to_linear(rgb) @ _RGB_TO_XYZ.T / _XYZ_WHITE
+    f = np.where(xyz > (6 / 29) ** 3, np.cbrt(xyz), xyz / (3 * (6 / 29) ** 2) + 4 / 29)
+    
+    lab = np.empty_like(f)
+    lab[..., 0] = 116 * f[..., 1] - 16
+    lab[..., 1] = 500 * (f[..., 0] - f[..., 1])
+    lab[..., 2] = 200 * (f[..., 1] - f[..., 2])
+    return lab
+
+def delta_e76(lab1, lab2):
+    """
+    CIE76 color difference (Euclidean distance in CIELAB), broadcasting
+    """
+    return np.sqrt(((np.asarray(lab1) - np.asarray(lab2)) ** 2).sum(axis=-1))
+
+def delta_e2000(lab1, lab2):
+    """
+    CIEDE2000 color difference, broadcasting over leading dimensions
+    
+    Args:
+        lab1, lab2: Arrays of shape (..., 3) in CIELAB
+    
+    Returns:
+        Array of ΔE2000 values
+    """
+    lab1, lab2 = np.asarray(lab1, dtype=np.float64), np.asarray(lab2, dtype=np.float64)
+    L1, a1, b1 = lab1[..., 0], lab1[..., 1], lab1[..., 2]
+    L2, a2, b2 = lab2[..., 0], lab2[..., 1], lab2[..., 2]
+    
+    c_bar = (np.hypot(a1, b1) + np.hypot(a2, b2)) / 2
+    c_bar7 = c_bar ** 7
+    g = 0.5 * (1 - np.sqrt(c_bar7 / (c_bar7 + 25.0 ** 7)))
+    a1p, a2p = a1 * (1 + g), a2 * (1 + g)
+    c1p, c2p = np.hypot(a1p, b1), np.hypot(a2p, b2)
+    h1p = np.degrees(np.arctan2(b1, a1p)) % 360
+    h2p = np.degrees(np.arctan2(b2, a2p)) % 360
+    
+    dLp = L2 - L1
+    dCp = c2p - c1p
+    dhp = h2p - h1p
+    dhp = np.where(dhp > 180, dhp - 360, dhp)
+    dhp = np.where(dhp < -180, dhp + 360, dhp)
+    dhp = np.where(c1p * c2p == 0, 0, dhp)
+    dHp = 2 * np.sqrt(c1p * c2p) * np.sin(np.radians(dhp) / 2)
+    
+    L_bar = (L1 + L2) / 2
+    cp_bar = (c1p + c2p) / 2
+    h_sum = h1p + h2p
+    hp_bar = np.where(np.abs(h1p - h2p) > 180, (h_sum + 360) / 2, h_sum / 2)
+    hp_bar = np.where(c1p * c2p == 0, h_sum, hp_bar)
+    
+    t = (1 - 0.17 * np.cos(np.radians(hp_bar - 30)) + 0.24 * np.cos(np.radians(2 * hp_bar))
+         + 0.32 * np.cos(np.radians(3 * hp_bar + 6)) - 0.20 * np.cos(np.radians(4 * hp_bar - 63)))
+    d_theta = 30 * np.exp(-(((hp_bar - 275) / 25) ** 2))
+    cp_bar7 = cp_bar ** 7
+    r_c = 2 * np.sqrt(cp_bar7 / (cp_bar7 + 25.0 ** 7))
+    s_l = 1 + 0.015 * (L_bar - 50) ** 2 / np.sqrt(20 + (L_bar - 50) ** 2)
+    s_c = 1 + 0.045 * cp_bar
+    s_h = 1 + 0.015 * cp_bar * t
+    r_t = -np.sin(np.radians(2 * d_theta)) * r_c
+    
+    dl, dc, dh = dLp / s_l, dCp / s_c, dHp / s_h
+    return np.sqrt(dl ** 2 + dc ** 2 + dh ** 2 + r_t * dc * dh)
+
+# Largest value of the ΔE2000 lightness weight S_L over L* in [0, 100].
+# Since ΔE2000 >= |ΔL*| / S_L, a match within t needs |ΔL*| <= t * this.
+DE2000_MAX_SL = 1 + 0.015 * 50 ** 2 / np.sqrt(20 + 50 ** 2)
+
+def relative_luminance(rgb):
+    """
+    WCAG 2.0 relative luminance
+    
+    Args:
+        rgb: Array of shape (..., 3) with 0-255 channel values
+    
+    Returns:
+        float64 array of shape (...) in [0, 1]
+    """
+    rgb = np.asarray(rgb)
+    if rgb.dtype == np.uint8:
+        linear = _WCAG_LINEAR[rgb]
+    else:
+        c = rgb / 255.0
+        linear = np.where(c <= 0.03928, c / 12.92, ((c + 0.055) / 1.055) ** 2.4)
+    return linear @ _LUMINANCE_WEIGHTS
+
+def _luminance_ratio(l1, l2):
+    return (np.maximum(l1, l2) + 0.05) / (np.minimum(l1, l2) + 0.05)
+
+def contrast_ratio(rgb1, rgb2):
+    """
+    WCAG 2.0 contrast ratio between colors, broadcasting
+    
+    Returns:
+        Array of ratios from 1 to 21
+    """
+    return _luminance_ratio(relative_luminance(rgb1), relative_luminance(rgb2))
+
+def contrast_matrix(rgb):
+    """
+    Pairwise WCAG contrast ratios within each palette
+    
+    Args:
+        rgb: Array of shape (..., N, 3), e.g. one (N, 3) palette or a
+            (sites, N, 3) batch
+    
+    Returns:
+        Array of shape (..., N, N)
+    """
+    luminance = relative_luminance(rgb)
+    return _luminance_ratio(luminance[..., :, None], luminance[..., None, :])
+
+def perceived_brightness(rgb):
+    """
+    Perceived brightness (0-255) as (299 R + 587 G + 114 B) / 1000
+    """
+    return (np.asarray(rgb, dtype=np.int64) @ _BRIGHTNESS_WEIGHTS) / 1000
+
+def text_colors(rgb):
+    """
+    Black or white text color for each background color
+    
+    White is used on backgrounds with a perceived brightness below 128.
+    
+    Args:
+        rgb: Array of shape (..., 3) with 0-255 channel values
+    
+    Returns:
+        uint8 array of the same shape
+    """
+    # Integer comparison, so the cut-off is exact
+    dark = np.asarray(rgb, dtype=np.int64) @ _BRIGHTNESS_WEIGHTS < 128000
+    return np.where(dark[..., None], _WHITE, _BLACK)
@@ -17,14 +17,83 @@ class Config:
     DEBUG = os.environ.get('FLASK_DEBUG', 'false').lower() == 'true'
     
     # Scraping settings
+    AWWWARDS_BASE_URL = os.environ.get('AWWWARDS_BASE_URL', 'https://www.awwwards.com/')
+    # Listing page parser: lxml (falls back to soup if lxml is missing) or soup
+    HTML_PARSER = os.environ.get('HTML_PARSER', 'lxml')
     SCRAPE_PAGES = int(os.environ.get('SCRAPE_PAGES', 5))
     SCRAPE_SECTION = os.environ.get('SCRAPE_SECTION', 'websites')
+    # Send conditional requests and stop at the first page without new websites
+    SCRAPE_INCREMENTAL = os.environ.get('SCRAPE_INCREMENTAL', 'true').lower() == 'true'
+    # Scrape pipeline: image download threads, extraction processes (0 = CPU count)
+    # and the bound on records waiting in each stage
+    DOWNLOAD_WORKERS = int(os.environ.get('DOWNLOAD_WORKERS', 4))
+    EXTRACT_WORKERS = int(os.environ.get('EXTRACT_WORKERS', 0))
+    PIPELINE_QUEUE_SIZE = int(os.environ.get('PIPELINE_QUEUE_SIZE', 32))
+    # Scrape journal: compact into the store every N websites or T seconds,
+    # and fsync every appended record
+    JOURNAL_COMPACT_EVERY = int(os.environ.get('JOURNAL_COMPACT_EVERY', 50))
+    JOURNAL_COMPACT_INTERVAL = float(os.environ.get('JOURNAL_COMPACT_INTERVAL', 30))
+    JOURNAL_FSYNC = os.environ.get('JOURNAL_FSYNC', 'true').lower() == 'true'
+    # Finished background jobs kept for /api/jobs
+    JOB_HISTORY_SIZE = int(os.environ.get('JOB_HISTORY_SIZE', 100))
+    # Profile scrape runs: cprofile, sample (all threads) or empty for off;
+    # output goes to DATA_DIR/profiles
+    PROFILE_SCRAPE = os.environ.get('PROFILE_SCRAPE', '').lower()
+    
+    # Width of the grid card image derivatives (the retina ones are twice as wide)
+    IMAGE_CARD_WIDTH = int(os.environ.get('IMAGE_CARD_WIDTH', 400))
+    # Let a front server (Apache mod_xsendfile, lighttpd) send image files
+    USE_X_SENDFILE = os.environ.get('USE_X_SENDFILE', 'false').lower() == 'true'
+    
+    # HTTP client: timeouts (seconds), retries of transient failures with
+    # exponential backoff, and keep-alive connections kept per host
+    HTTP_CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', 10))
+    HTTP_READ_TIMEOUT = float(os.environ.get('HTTP_READ_TIMEOUT', 30))
+    HTTP_RETRIES = int(os.environ.get('HTTP_RETRIES', 3))
+    HTTP_BACKOFF = float(os.environ.get('HTTP_BACKOFF', 1.0))
+    HTTP_BACKOFF_MAX = float(os.environ.get('HTTP_BACKOFF_MAX', 30))
+    HTTP_POOL_SIZE = int(os.environ.get('HTTP_POOL_SIZE', 10))
     
     # Color extraction settings
     NUM_COLORS = int(os.environ.get('NUM_COLORS', 5))
     
+    # How images are reduced before clustering: lanczos, box, nearest, reduce,
+    # random or stratified (the last two keep SAMPLE_PIXEL_BUDGET pixels)
+    SAMPLING_MODE = os.environ.get('SAMPLING_MODE', 'lanczos')
+    SAMPLE_PIXEL_BUDGET = int(os.environ.get('SAMPLE_PIXEL_BUDGET', 20000))
+    
+    # Pixels brighter than this on every channel are dropped as near-white
+    FILTER_WHITE_THRESHOLD = int(os.environ.get('FILTER_WHITE_THRESHOLD', 240))
+    # Pixels darker than this on every channel are dropped as near-black
+    FILTER_BLACK_THRESHOLD = int(os.environ.get('FILTER_BLACK_THRESHOLD', 15))
+    # Fall back to the unfiltered pixels if fewer than this many survive
+    FILTER_MIN_PIXELS = int(os.environ.get('FILTER_MIN_PIXELS', 100))
+    
+    # Clustering backend: kmeans, minibatch, median_cut or histogram_kmeans
+    QUANTIZER = os.environ.get('QUANTIZER', 'kmeans')
+    # Batch size for the minibatch quantizer
+    MINIBATCH_SIZE = int(os.environ.get('MINIBATCH_SIZE', 1024))
+    # Bits per channel for the histogram-based quantizers
+    HISTOGRAM_BITS = int(os.environ.get('HISTOGRAM_BITS', 5))
+    
+    # Palette cache keyed by image content hash (stored in DATA_DIR)
+    PALETTE_CACHE_ENABLED = os.environ.get('PALETTE_CACHE_ENABLED', 'true').lower() == 'true'
+    PALETTE_CACHE_MAX_ENTRIES = int(os.environ.get('PALETTE_CACHE_MAX_ENTRIES', 100000))
+    
     # Cache settings (in seconds)
     CACHE_TIMEOUT = int(os.environ.get('CACHE_TIMEOUT', 3600))  # 1 hour
+    # Serialized API responses kept in memory, and the smallest body worth compressing
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 256))
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 500))
+    
+    # Color search defaults: metric is rgb, de76 or de2000
+    COLOR_SEARCH_METRIC = os.environ.get('COLOR_SEARCH_METRIC', 'rgb')
+    COLOR_SEARCH_THRESHOLD = float(os.environ.get('COLOR_SEARCH_THRESHOLD', 30))
+    # Cell edge of the color index grid, in RGB levels or ΔE units
+    COLOR_INDEX_CELL_SIZE = float(os.environ.get('COLOR_INDEX_CELL_SIZE', 10))
+    
+    # Upper bound on the per_page query parameter of paginated endpoints
+    MAX_PER_PAGE = int(os.environ.get('MAX_PER_PAGE', 100))
     
     # Rate limiting (requests per minute)
     RATE_LIMIT = int(os.environ.get('RATE_LIMIT', 10))
@@ -0,0 +1,166 @@
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import Config
+from metrics import STAGE_SECONDS, timed
+
+logger = logging.getLogger(__name__)
+
+# Headers to mimic a real browser
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+    'DNT': '1',
+}
+
+# Responses worth retrying, everything else 4xx/5xx fails right away
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class HostThrottle:
+    """
+    Per-host politeness limit shared by every scraping thread
+    
+    Requests to the same host run one at a time, each starting a random
+    delay after the previous one to that host finished, which is the rate
+    of the old sequential scraper. Requests to different hosts don't wait
+    for each other.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts = {}
+    
+    def _host_state(self, host):
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                # [lock serializing the host, end time of the last request]
+                state = self._hosts[host] = [threading.Lock(), None]
+            return state
+    
+    @contextmanager
+    def slot(self, url, delay):
+        """
+        Hold the host of url for the duration of one request
+        
+        Args:
+            url: URL about to be requested
+            delay: (min, max) seconds to wait after the previous request to
+                this host before starting this one
+        """
+        state = self._host_state(urlparse(url).netloc)
+        start = time.perf_counter()
+        with state[0]:
+            if state[1] is not None:
+                wait = state[1] + random.uniform(*delay) - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+            # Time spent queueing for the host, including the politeness delay
+            STAGE_SECONDS.observe(time.perf_counter() - start, 'throttle_wait')
+            try:
+                yield
+            finally:
+                state[1] = time.monotonic()
+
+class HttpClient:
+    """
+    Pooled HTTP client for the scraper
+    
+    One requests.Session is shared by every thread, so connections are kept
+    alive and reused per host. Each request goes through the HostThrottle,
+    has connect/read timeouts, and transient failures (connection errors,
+    timeouts, 429 and 5xx) are retried with exponential backoff and full
+    jitter.
+    """
+    
+    def __init__(self, headers=None, timeout=None, retries=None, backoff=None, pool_size=None, throttle=None):
+        self.timeout = timeout or (Config.HTTP_CONNECT_TIMEOUT, Config.HTTP_READ_TIMEOUT)
+        self.retries = Config.HTTP_RETRIES if retries is None else retries
+        self.backoff = Config.HTTP_BACKOFF if backoff is None else backoff
+        self.throttle = throttle or HostThrottle()
+        
+        pool_size = pool_size or Config.HTTP_POOL_SIZE
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS if headers is None else headers)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+    
+    def _backoff_delay(self, attempt, response=None):
+        """
+        Seconds to wait before retry number attempt (0-based)
+        
+        Returns:
+            Delay in seconds, at most Config.HTTP_BACKOFF_MAX, or None if the
+            response's Retry-After asks for longer than that
+        """
+        if response is not None and response.headers.get('Retry-After', '').isdigit():
+            retry_after = float(response.headers['Retry-After'])
+            return retry_after if retry_after <= Config.HTTP_BACKOFF_MAX else None
+        return random.uniform(0, min(Config.HTTP_BACKOFF_MAX, self.backoff * 2 ** attempt))
+    
+    def get(self, url, delay=(0, 0), stage='http_request', **kwargs):
+        """
+        GET a URL, retrying transient failures
+        
+        Args:
+            url: URL to fetch
+            delay: (min, max) politeness delay after the previous request to
+                the same host
+            stage: Stage name the request time (without the politeness
+                delay) is recorded under in metrics
+            **kwargs: Passed on to requests.Session.get
+        
+        Returns:
+            requests.Response; non-retryable error statuses, and retryable
+            ones whose Retry-After exceeds Config.HTTP_BACKOFF_MAX, are
+            returned as-is for the caller to check
+        
+        Raises:
+            requests.RequestException once all retries are used up
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        
+        for attempt in range(self.retries + 1):
+            response = None
+            try:
+                with self.throttle.slot(url, delay), timed(stage):
+                    response = self.session.get(url, **kwargs)
+                if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                    return response
+                reason = f"HTTP {response.status_code}"
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.retries:
+                    raise
+                reason = f"{type(e).__name__}: {e}"
+            
+            wait = self._backoff_delay(attempt, response)
+            if wait is None:
+                # Don't hold a download thread (and its job) for a long Retry-After
+                logger.warning(f"Giving up on {url} after {reason}, Retry-After "
+                               f"{response.headers['Retry-After']}s exceeds {Config.HTTP_BACKOFF_MAX:g}s")
+                return response
+            logger.warning(f"Retrying {url} in {wait:.1f}s after {reason} "
+                           f"(attempt {attempt + 1} of {self.retries})")
+            time.sleep(wait)
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_http_client():
+    """Return the process-wide HttpClient"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
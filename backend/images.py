@@ -0,0 +1,96 @@
+import hashlib
+import io
+import logging
+import os
+import threading
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Subdirectory of the image directory holding the derivatives
+DERIVED_DIR = 'derived'
+
+# Pillow format, file extension and encoder options of each derivative format
+FORMATS = {
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+}
+
+def image_dir(data_dir=None):
+    """Directory of the downloaded images"""
+    return os.path.join(data_dir or Config.DATA_DIR, 'images')
+
+def derivative_widths():
+    """Target width of each derivative size: grid card and retina (2x) card"""
+    return {'card': Config.IMAGE_CARD_WIDTH, 'retina': 2 * Config.IMAGE_CARD_WIDTH}
+
+def derivative_names(content_hash):
+    """
+    Content-addressed derivative paths of an image
+    
+    Names combine the hash of the original bytes with the width and
+    format, so a name always refers to the same bytes and can be cached
+    forever.
+    
+    Returns:
+        Dict of size -> format -> path relative to the image directory
+    """
+    return {
+        size: {fmt: f"{DERIVED_DIR}/{content_hash}.{width}w.{ext}" for fmt, (_, ext, _) in FORMATS.items()}
+        for size, width in derivative_widths().items()
+    }
+
+def _resized(image, width):
+    from PIL import Image
+    
+    if image.width <= width:
+        return image
+    height = max(1, round(image.height * width / image.width))
+    return image.resize((width, height), Image.LANCZOS)
+
+def build_derivatives(source, data_dir=None):
+    """
+    Build the card, retina and WebP derivatives of an image once
+    
+    Derivatives already on disk are not rebuilt, so re-running this for an
+    image is cheap. Images are never upscaled.
+    
+    Args:
+        source: Image path or raw encoded bytes
+        data_dir: Data directory (default: Config.DATA_DIR)
+    
+    Returns:
+        Dict of size -> format -> path relative to the image directory, as
+        produced by derivative_names()
+    """
+    if not isinstance(source, (bytes, bytearray, memoryview)):
+        with open(source, 'rb') as f:
+            source = f.read()
+    
+    names = derivative_names(hashlib.md5(source).hexdigest())
+    root = image_dir(data_dir)
+    missing = [(size, fmt) for size, formats in names.items() for fmt in formats
+               if not os.path.exists(os.path.join(root, names[size][fmt]))]
+    if not missing:
+        return names
+    
+    # Pillow is only needed here, the API imports this module for the paths alone
+    from PIL import Image
+    
+    os.makedirs(os.path.join(root, DERIVED_DIR), exist_ok=True)
+    with Image.open(io.BytesIO(source)) as image:
+        widths = derivative_widths()
+        # Let the JPEG decoder scale down while decoding when it can
+        widest = min(max(widths.values()), image.width)
+        image.draft('RGB', (widest, -(-image.height * widest // image.width)))
+        image = image.convert('RGB')
+        
+        for size, fmt in missing:
+            path = os.path.join(root, names[size][fmt])
+            pil_format, _, options = FORMATS[fmt]
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            _resized(image, widths[size]).save(temp_path, pil_format, **options)
+            os.replace(temp_path, path)
+    
+    return names
@@ -0,0 +1,290 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+from config import Config
+from metrics import REGISTRY, CallbackMetric
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+class Job:
+    """
+    One unit of background work and its progress
+    
+    Handlers receive the job and report progress through update(); they
+    should check ``cancel_event`` between steps and stop early once it is
+    set.
+    """
+    
+    def __init__(self, kind, params, source='api'):
+        self.id = str(uuid.uuid4())
+        self.kind = kind
+        self.params = params
+        self.source = source
+        self.status = QUEUED
+        self.progress = {}
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self._lock = threading.Lock()
+    
+    def update(self, name, value):
+        """Record a progress counter, safe to call from any thread"""
+        with self._lock:
+            self.progress[name] = value
+    
+    def to_dict(self):
+        """Status, progress counters and throughput as a JSON-friendly dict"""
+        with self._lock:
+            progress = dict(self.progress)
+        
+        elapsed = None
+        throughput = {}
+        if self.started_at is not None:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+            if elapsed > 0:
+                for name, key in (('pages_per_s', 'pages_done'), ('images_per_s', 'downloaded'),
+                                  ('palettes_per_s', 'extracted'), ('websites_per_s', 'persisted')):
+                    if key in progress:
+                        throughput[name] = round(progress[key] / elapsed, 2)
+        
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'params': self.params,
+            'source': self.source,
+            'status': self.status,
+            'progress': progress,
+            'throughput': throughput,
+            'elapsed': round(elapsed, 2) if elapsed is not None else None,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'result': self.result,
+            'error': self.error
+        }
+
+def run_scrape(job, pages=5, section='websites', incremental=None):
+    """
+    Job handler for scraper.scrape_awwwards
+    
+    Fails the job, keeping the scrape report as its result, when every
+    requested page errored.
+    """
+    # Imported on the first scrape so API workers never load the extraction
+    # stack (scikit-learn, Pillow, BeautifulSoup) just to serve reads
+    from scraper import scrape_awwwards
+    
+    report = scrape_awwwards(pages=pages, section=section, incremental=incremental,
+                             progress=job.update, cancel_event=job.cancel_event)
+    # Page errors are logged and skipped; a scrape where every page failed did nothing
+    if report['pages_requested'] and report['pages_failed'] == report['pages_requested']:
+        job.result = report
+        raise RuntimeError(f"All {report['pages_requested']} requested pages failed, see the log for the errors")
+    return report
+
+# Job kinds: handler and the default parameters identical jobs are compared with
+HANDLERS = {
+    'scrape': (run_scrape, {'pages': 5, 'section': 'websites', 'incremental': None}),
+}
+
+class JobManager:
+    """
+    Single-writer queue for background jobs
+    
+    One worker thread runs jobs in submission order, so two scrapes never
+    write to the store at the same time. Submitting a job identical to one
+    that is still queued returns the queued job instead of adding another.
+    Finished jobs are kept for status queries up to Config.JOB_HISTORY_SIZE.
+    
+    Jobs only exist in the memory of this process, so the API has to run as
+    a single process per data directory, see claim_job_queue.
+    """
+    
+    def __init__(self, handlers=None, history_size=None):
+        self.handlers = handlers or HANDLERS
+        self.history_size = history_size or Config.JOB_HISTORY_SIZE
+        self._jobs = OrderedDict()
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._worker = None
+    
+    def submit(self, kind, params=None, source='api'):
+        """
+        Queue a job
+        
+        Args:
+            kind: Job kind, a key of the handlers
+            params: Keyword arguments for the handler
+            source: Who asked for the job, e.g. 'api' or 'scheduler'
+        
+        Returns:
+            Tuple of (Job, whether a new job was queued)
+        
+        Raises:
+            ValueError: For an unknown kind or parameter
+        """
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        _, defaults = self.handlers[kind]
+        unknown = set(params or {}) - set(defaults)
+        if unknown:
+            raise ValueError(f"Unknown parameters for {kind} jobs: {', '.join(sorted(unknown))}")
+        params = {**defaults, **{k: v for k, v in (params or {}).items() if v is not None}}
+        
+        with self._condition:
+            for queued in self._queue:
+                if queued.kind == kind and queued.params == params:
+                    logger.info(f"Job {queued.id} with the same parameters is already queued")
+                    return queued, False
+            
+            job = Job(kind, params, source)
+            self._jobs[job.id] = job
+            self._queue.append(job)
+            self._trim_history()
+            self._ensure_worker()
+            self._condition.notify()
+        
+        logger.info(f"Queued {kind} job {job.id} from {source} with {params}")
+        return job, True
+    
+    def get(self, job_id):
+        """Job by id, or None"""
+        with self._condition:
+            return self._jobs.get(job_id)
+    
+    def list(self):
+        """All known jobs, newest first"""
+        with self._condition:
+            return list(reversed(self._jobs.values()))
+    
+    def cancel(self, job_id):
+        """
+        Cancel a queued or running job
+        
+        A queued job is removed from the queue; a running job is asked to
+        stop and finishes as cancelled once its handler returns.
+        
+        Returns:
+            The Job, or None if there is no such job
+        """
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINISHED:
+                return job
+            
+            job.cancel_event.set()
+            if job.status == QUEUED:
+                self._queue.remove(job)
+                job.status = CANCELLED
+                job.finished_at = time.time()
+        
+        logger.info(f"Cancellation requested for job {job_id}")
+        return job
+    
+    def _trim_history(self):
+        # Drop the oldest finished jobs, never queued or running ones
+        excess = len(self._jobs) - self.history_size
+        for job_id in [j.id for j in self._jobs.values() if j.status in FINISHED][:max(excess, 0)]:
+            del self._jobs[job_id]
+    
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="job-worker", daemon=True)
+            self._worker.start()
+    
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queue:
+                    self._condition.wait()
+                job = self._queue.popleft()
+                job.status = RUNNING
+                job.started_at = time.time()
+            
+            handler, _ = self.handlers[job.kind]
+            logger.info(f"Running {job.kind} job {job.id}")
+            try:
+                job.result = handler(job, **job.params)
+                # A cancel that arrived after the last step doesn't make the job cancelled
+                if isinstance(job.result, dict) and 'cancelled' in job.result:
+                    cancelled = job.result['cancelled']
+                else:
+                    cancelled = job.cancel_event.is_set()
+                status = CANCELLED if cancelled else SUCCEEDED
+            except Exception as e:
+                logger.exception(f"Job {job.id} failed: {e}")
+                job.error = str(e)
+                status = FAILED
+            
+            with self._condition:
+                job.status = status
+                job.finished_at = time.time()
+            logger.info(f"Job {job.id} {status} in {job.finished_at - job.started_at:.1f}s")
+
+_manager = None
+_manager_lock = threading.Lock()
+
+# Open lock files of the job queues this process owns, by data directory
+_queue_locks = {}
+
+def claim_job_queue(data_dir):
+    """
+    Make this process the only one serving the job queue of a data directory
+    
+    A second API process would run its own queue: its scrapes could overlap
+    this one's and it would answer 404 for this one's jobs. The claim is an
+    exclusive lock on DATA_DIR/jobs.lock, held until the process exits, so
+    run gunicorn with one worker and threads for concurrency.
+    
+    Raises:
+        RuntimeError: If another process owns the job queue
+    """
+    path = os.path.abspath(os.path.join(data_dir, 'jobs.lock'))
+    if fcntl is None or path in _queue_locks:
+        return
+    
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    lock_file = open(path, 'a')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        raise RuntimeError(f"Another process serves the job queue of {data_dir}; "
+                           f"the API must run as a single process (one gunicorn worker)")
+    _queue_locks[path] = lock_file
+
+def get_job_manager():
+    """Return the process-wide JobManager"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager()
+        return _manager
+
+def _count_jobs(status):
+    return sum(1 for job in get_job_manager().list() if job.status == status)
+
+REGISTRY.register(CallbackMetric('awwwards_jobs_queued', 'Background jobs waiting to run',
+                                 lambda: _count_jobs(QUEUED)))
+REGISTRY.register(CallbackMetric('awwwards_jobs_running', 'Background jobs running',
+                                 lambda: _count_jobs(RUNNING)))
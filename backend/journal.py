@@ -0,0 +1,212 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+# Store meta key of the checkpoint of the last interrupted scrape
+CHECKPOINT_KEY = 'scrape_checkpoint'
+
+class ScrapeJournal:
+    """
+    Append-only NDJSON journal of websites processed by a scrape
+    
+    Every processed website is appended as one line together with the
+    scrape's checkpoint at that moment, so the cost of recording a website
+    doesn't depend on the catalog size. The journal is compacted into the
+    website store in one transaction every ``compact_every`` records or
+    ``compact_interval`` seconds, then truncated.
+    
+    After a crash, recover() replays whatever the journal still holds into
+    the store; a torn last line from an interrupted write is skipped.
+    
+    The journal file is held open under an exclusive lock from recover()
+    (or the first append()) until close(), so a scrape started by another
+    process can't replay and truncate the journal of a running one.
+    """
+    
+    def __init__(self, path, store, compact_every=None, compact_interval=None, fsync=None):
+        self.path = path
+        self.store = store
+        self.compact_every = compact_every or Config.JOURNAL_COMPACT_EVERY
+        self.compact_interval = compact_interval if compact_interval is not None else Config.JOURNAL_COMPACT_INTERVAL
+        self.fsync = fsync if fsync is not None else Config.JOURNAL_FSYNC
+        self._pending = []
+        self._checkpoint = None
+        self._last_compaction = time.monotonic()
+        self._file = None
+    
+    def _open(self):
+        """Open the journal for appending and lock it, once"""
+        if self._file is not None:
+            return
+        
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        journal_file = open(self.path, 'a', encoding='utf-8')
+        if fcntl is not None:
+            try:
+                fcntl.flock(journal_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                journal_file.close()
+                raise RuntimeError(f"Another scrape is running with the journal {self.path}")
+        self._file = journal_file
+    
+    def _read(self):
+        """Websites and last checkpoint in the journal file"""
+        websites = []
+        checkpoint = None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return websites, checkpoint
+        
+        for number, line in enumerate(lines, 1):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Normally only the last line, torn by a crash mid-write
+                logger.warning(f"Ignoring unreadable record on line {number} of {self.path}")
+                continue
+            if record.get('website') is not None:
+                websites.append(record['website'])
+            checkpoint = record.get('checkpoint')
+        return websites, checkpoint
+    
+    def recover(self):
+        """
+        Replay a journal left behind by an interrupted scrape into the store
+        
+        Returns:
+            Checkpoint dict of the interrupted scrape, or None
+        
+        Raises:
+            RuntimeError: If another scrape holds the journal
+        """
+        self._open()
+        websites, checkpoint = self._read()
+        if websites or checkpoint is not None:
+            self._pending, self._checkpoint = websites, checkpoint
+            logger.info(f"Recovering {len(websites)} websites from {self.path}")
+            self.compact()
+        return self.store.get_meta(CHECKPOINT_KEY)
+    
+    def append(self, website, checkpoint=None):
+        """
+        Record a processed website
+        
+        Args:
+            website: Website dict as it should be stored
+            checkpoint: Position the scrape can resume from once this record
+                is durable
+        """
+        self._open()
+        self._file.write(json.dumps({'website': website, 'checkpoint': checkpoint}) + '\n')
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self._pending.append(website)
+        self._checkpoint = checkpoint
+    
+    def should_compact(self):
+        """Whether enough records or time have accumulated since the last compaction"""
+        if not self._pending:
+            return False
+        return (len(self._pending) >= self.compact_every
+                or time.monotonic() - self._last_compaction >= self.compact_interval)
+    
+    def compact(self, finished=False):
+        """
+        Write the pending records and checkpoint to the store, then truncate the journal
+        
+        The records and the checkpoint are committed in one transaction.
+        Truncating afterwards is safe to interrupt: replaying records that
+        are already stored just upserts them again.
+        
+        Args:
+            finished: The scrape is over, clear the checkpoint instead of
+                storing the last appended one
+        
+        Returns:
+            Number of websites written
+        """
+        checkpoint = None if finished else self._checkpoint
+        
+        if self._pending:
+            written = self.store.upsert_many(self._pending, meta={CHECKPOINT_KEY: checkpoint})
+        else:
+            written = 0
+            self.store.set_meta(CHECKPOINT_KEY, checkpoint)
+        
+        if self._file is not None:
+            self._file.truncate(0)
+        elif os.path.exists(self.path):
+            os.truncate(self.path, 0)
+        
+        self._pending = []
+        self._checkpoint = checkpoint
+        self._last_compaction = time.monotonic()
+        if written:
+            logger.info(f"Compacted {written} journaled websites into the store")
+        return written
+    
+    def close(self, finished=False):
+        """Compact what is left, then close and unlock the journal file"""
+        self.compact(finished)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+class ScrapeCheckpoint:
+    """
+    Position a scrape can resume from: (section, page, item index)
+    
+    Websites finish out of order in the scrape pipeline, so the checkpoint
+    is the earliest submitted website that isn't processed yet, or else the
+    position after the last listing item the scraper has looked at. Items
+    before the checkpoint have all been processed.
+    """
+    
+    def __init__(self, section):
+        self.section = section
+        self._in_flight = {}
+        self._next = (1, 0)
+        self._lock = threading.Lock()
+    
+    def advance(self, page, item):
+        """Mark every listing item before (page, item) as seen"""
+        with self._lock:
+            self._next = max(self._next, (page, item))
+    
+    def submitted(self, website_id, page, item):
+        """Track a website handed to the pipeline from position (page, item)"""
+        with self._lock:
+            self._in_flight[website_id] = (page, item)
+            self._next = max(self._next, (page, item + 1))
+    
+    def done(self, website_id):
+        """
+        Mark a website as processed
+        
+        Returns:
+            The checkpoint dict after this website
+        """
+        with self._lock:
+            self._in_flight.pop(website_id, None)
+            page, item = min(self._in_flight.values(), default=self._next)
+        return {'section': self.section, 'page': page, 'item': item}
+
+def journal_path(data_dir=None):
+    """Path of the scrape journal in a data directory"""
+    return os.path.join(data_dir or Config.DATA_DIR, 'scrape.journal')
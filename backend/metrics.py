@@ -0,0 +1,254 @@
+import cProfile
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter as _StackCounter
+from contextlib import contextmanager
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in seconds, from sub-millisecond steps to page fetches
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """Monotonic counter with optional labels"""
+    
+    type = 'counter'
+    
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+    
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+    
+    type = 'histogram'
+    
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._series = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+    
+    def samples(self):
+        with self._lock:
+            series = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._series.items()}
+        for labels, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield (f"{self.name}_bucket",
+                       _format_labels(self.labelnames, labels, [('le', _format_value(bound))]), cumulative)
+            yield f"{self.name}_sum", _format_labels(self.labelnames, labels), total
+            yield f"{self.name}_count", _format_labels(self.labelnames, labels), count
+
+class CallbackMetric:
+    """Gauge or counter whose value is read from a callable at scrape time"""
+    
+    def __init__(self, name, documentation, func, type='gauge'):
+        self.name = name
+        self.documentation = documentation
+        self.func = func
+        self.type = type
+    
+    def samples(self):
+        yield self.name, '', self.func()
+
+class Registry:
+    """Set of metrics rendered together in the Prometheus text format"""
+    
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+    
+    def register(self, metric):
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+    
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        
+        lines = []
+        for metric in metrics:
+            try:
+                samples = list(metric.samples())
+            except Exception as e:
+                logger.warning(f"Could not collect metric {metric.name}: {e}")
+                continue
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(f"{name}{labels} {_format_value(value)}" for name, labels, value in samples)
+        return '\n'.join(lines) + '\n'
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    'awwwards_stage_seconds', 'Time spent in each scrape and extraction stage', ['stage']))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'awwwards_http_request_seconds', 'API request latency by endpoint', ['endpoint', 'method', 'status']))
+SCRAPE_RECORDS = REGISTRY.register(Counter(
+    'awwwards_scrape_records_total', 'Website records through the scrape pipeline by outcome', ['outcome']))
+
+@contextmanager
+def timed(stage):
+    """Observe the duration of a block in the stage histogram"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage)
+
+def observe_stages(timings):
+    """Record stage durations measured elsewhere, e.g. in an extraction worker process"""
+    for stage, seconds in (timings or {}).items():
+        STAGE_SECONDS.observe(seconds, stage)
+
+class Stopwatch:
+    """
+    Lap timer filling a dict of stage -> seconds
+    
+    For code that can't report to the registry directly because it runs in
+    another process; the dict travels back with its result.
+    """
+    
+    def __init__(self, timings):
+        self.timings = timings
+        self._last = time.perf_counter()
+    
+    def lap(self, stage):
+        now = time.perf_counter()
+        self.timings[stage] = self.timings.get(stage, 0.0) + now - self._last
+        self._last = now
+
+class SamplingProfiler:
+    """
+    Statistical profiler sampling the stacks of every thread
+    
+    A background thread records the stack of each running thread every
+    ``interval`` seconds. The result is written in the collapsed-stack
+    format read by flamegraph.pl and speedscope, one ``frame;frame;... count``
+    line per distinct stack.
+    """
+    
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.stacks = _StackCounter()
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+    
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[';'.join(reversed(stack))] += 1
+    
+    def dump(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+@contextmanager
+def profiled(name, mode=None):
+    """
+    Profile a block if profiling is turned on
+    
+    Args:
+        name: Prefix of the output file in DATA_DIR/profiles
+        mode: 'cprofile' (deterministic, calling thread only, writes a
+            .prof file for pstats/snakeviz), 'sample' (all threads, writes
+            collapsed stacks) or '' for off; defaults to Config.PROFILE_SCRAPE
+    """
+    mode = Config.PROFILE_SCRAPE if mode is None else mode
+    if not mode:
+        yield
+        return
+    if mode not in ('cprofile', 'sample'):
+        raise ValueError(f"Unknown profiling mode: {mode}")
+    
+    directory = os.path.join(Config.DATA_DIR, 'profiles')
+    os.makedirs(directory, exist_ok=True)
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    
+    if mode == 'cprofile':
+        profiler = cProfile.Profile()
+        path = os.path.join(directory, f"{name}-{stamp}.prof")
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(path)
+            logger.info(f"Wrote cProfile stats to {path}")
+    else:
+        profiler = SamplingProfiler()
+        path = os.path.join(directory, f"{name}-{stamp}.collapsed.txt")
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            profiler.dump(path)
+            logger.info(f"Wrote sampled stacks to {path}")
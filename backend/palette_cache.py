@@ -0,0 +1,139 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class PaletteCache:
+    """
+    Persistent palette cache keyed by image content
+    
+    Entries are keyed by (content hash, num_colors, algorithm version,
+    resize_width) and stored in SQLite, so identical artwork under several
+    listings and re-runs over the same thumbnails skip extraction. When the
+    cache grows past ``max_entries`` the least recently used entries are
+    evicted.
+    """
+    
+    def __init__(self, db_path, max_entries=None):
+        self.db_path = db_path
+        self.max_entries = max_entries if max_entries is not None else Config.PALETTE_CACHE_MAX_ENTRIES
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS palettes (
+                content_hash TEXT NOT NULL,
+                num_colors INTEGER NOT NULL,
+                algorithm TEXT NOT NULL,
+                resize_width INTEGER NOT NULL,
+                colors TEXT NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (content_hash, num_colors, algorithm, resize_width)
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_palettes_last_used ON palettes (last_used)')
+        self._conn.commit()
+    
+    def get(self, content_hash, num_colors, algorithm, resize_width):
+        """
+        Look up a cached palette
+        
+        Returns:
+            List of hex color codes, or None on a miss
+        """
+        key = (content_hash, num_colors, algorithm, resize_width)
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT colors FROM palettes WHERE content_hash = ? AND num_colors = ? '
+                'AND algorithm = ? AND resize_width = ?', key
+            ).fetchone()
+            
+            if row is None:
+                self.misses += 1
+                return None
+            
+            self.hits += 1
+            self._conn.execute(
+                'UPDATE palettes SET last_used = ? WHERE content_hash = ? AND num_colors = ? '
+                'AND algorithm = ? AND resize_width = ?', (time.time(),) + key
+            )
+            self._conn.commit()
+            return json.loads(row[0])
+    
+    def put(self, content_hash, num_colors, algorithm, resize_width, colors):
+        """Store a palette, evicting old entries if the cache is full"""
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO palettes VALUES (?, ?, ?, ?, ?, ?)',
+                (content_hash, num_colors, algorithm, resize_width, json.dumps(colors), time.time())
+            )
+            self._evict()
+            self._conn.commit()
+    
+    def _evict(self):
+        """Drop least recently used entries down to 90% of max_entries"""
+        if not self.max_entries:
+            return
+        
+        count = self._conn.execute('SELECT COUNT(*) FROM palettes').fetchone()[0]
+        if count <= self.max_entries:
+            return
+        
+        # Evict in chunks so a full cache doesn't pay for eviction on every put
+        excess = count - int(self.max_entries * 0.9)
+        self._conn.execute(
+            'DELETE FROM palettes WHERE rowid IN '
+            '(SELECT rowid FROM palettes ORDER BY last_used LIMIT ?)', (excess,)
+        )
+        self.evictions += excess
+        logger.info(f"Evicted {excess} entries from the palette cache")
+    
+    def stats(self):
+        """Hit/miss counters for this process and the current cache size"""
+        with self._lock:
+            entries = self._conn.execute('SELECT COUNT(*) FROM palettes').fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'entries': entries,
+            'max_entries': self.max_entries,
+        }
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_palette_cache():
+    """
+    Return the process-wide palette cache, or None if caching is disabled
+    """
+    global _cache
+    
+    if not Config.PALETTE_CACHE_ENABLED:
+        return None
+    
+    with _cache_lock:
+        db_path = os.path.join(Config.DATA_DIR, 'palette_cache.db')
+        if _cache is None or _cache.db_path != db_path:
+            _cache = PaletteCache(db_path)
+        return _cache
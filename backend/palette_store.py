@@ -0,0 +1,206 @@
+import glob
+import logging
+import os
+
+import numpy as np
+
+from color_math import hex_to_rgb_array
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Two hex digits for every channel value, so formatting a color is three lookups
+_HEX_DIGITS = [f"{v:02x}" for v in range(256)]
+
+class PaletteArray:
+    """
+    Columnar palettes of the catalog
+    
+    Row i belongs to the website at catalog position i and holds its id,
+    its number of colors and the colors themselves as uint8 RGB in an
+    ``(n_sites, width, 3)`` array, padded with zeros past the count. Hex
+    strings are only produced when a palette is serialized.
+    
+    Arrays loaded with load() are memory-mapped and read-only; the update
+    methods always return a new PaletteArray held in RAM.
+    """
+    
+    def __init__(self, ids, counts, colors):
+        self.ids = ids
+        self.counts = counts
+        self.colors = colors
+    
+    @classmethod
+    def build(cls, websites, width=None):
+        """
+        Build the palette rows of a list of websites
+        
+        Args:
+            websites: Website dicts in catalog order
+            width: Minimum number of color slots per row (default: Config.NUM_COLORS)
+        """
+        palettes = [website.get('palette') or [] for website in websites]
+        width = max([width or Config.NUM_COLORS] + [len(p) for p in palettes])
+        
+        counts = np.array([len(p) for p in palettes], dtype=np.uint8)
+        colors = np.zeros((len(palettes), width, 3), dtype=np.uint8)
+        flat = [color for palette in palettes for color in palette]
+        if flat:
+            colors[np.arange(width) < counts[:, None]] = hex_to_rgb_array(flat)
+        
+        ids = np.array([website['id'].encode() for website in websites], dtype=np.bytes_)
+        return cls(ids, counts, colors)
+    
+    def __len__(self):
+        return len(self.counts)
+    
+    @property
+    def width(self):
+        return self.colors.shape[1]
+    
+    @property
+    def nbytes(self):
+        return self.ids.nbytes + self.counts.nbytes + self.colors.nbytes
+    
+    def rows(self, start, stop=None):
+        """PaletteArray view of a range of rows"""
+        rows = slice(start, stop)
+        return PaletteArray(self.ids[rows], self.counts[rows], self.colors[rows])
+    
+    def hex(self, position):
+        """Palette of one row as a list of '#rrggbb' strings"""
+        rows = self.colors[position, :self.counts[position]].tolist()
+        return [f"#{_HEX_DIGITS[r]}{_HEX_DIGITS[g]}{_HEX_DIGITS[b]}" for r, g, b in rows]
+    
+    def positions(self):
+        """Sorted positions of the rows that have a palette"""
+        return np.flatnonzero(self.counts)
+    
+    def flat(self, start=0):
+        """
+        All palette colors as one array
+        
+        Args:
+            start: Catalog position of the first row
+        
+        Returns:
+            Tuple of ((N, 3) uint8 colors, (N,) int64 catalog position of each color)
+        """
+        mask = np.arange(self.width) < self.counts[:, None]
+        owner = np.repeat(np.arange(start, start + len(self), dtype=np.int64), self.counts)
+        return self.colors[mask], owner
+    
+    def _padded(self, width):
+        if width == self.width:
+            return self.colors
+        colors = np.zeros((len(self), width, 3), dtype=np.uint8)
+        colors[:, :self.width] = self.colors
+        return colors
+    
+    def with_changes(self, updated, appended):
+        """
+        Return a new PaletteArray with rows replaced and appended
+        
+        Args:
+            updated: Dict of catalog position -> website dict
+            appended: Website dicts added after the last row
+        """
+        added = PaletteArray.build(list(updated.values()) + list(appended), self.width)
+        width = added.width
+        
+        colors = self._padded(width)
+        counts = self.counts
+        ids = self.ids
+        if updated:
+            # Copy before writing, loaded arrays are read-only memory maps
+            colors = np.array(colors)
+            counts = np.array(counts)
+            rows = np.fromiter(updated.keys(), dtype=np.int64, count=len(updated))
+            colors[rows] = added.colors[:len(updated)]
+            counts[rows] = added.counts[:len(updated)]
+        
+        tail = slice(len(updated), None)
+        return PaletteArray(
+            np.concatenate([ids, added.ids[tail]]),
+            np.concatenate([counts, added.counts[tail]]),
+            np.concatenate([colors, added.colors[tail]]),
+        )
+    
+    def save(self, path):
+        """Write the rows as one structured .npy file (atomically)"""
+        records = np.empty(len(self), dtype=[
+            ('id', self.ids.dtype),
+            ('count', np.uint8),
+            ('colors', np.uint8, (self.width, 3)),
+        ])
+        records['id'] = self.ids
+        records['count'] = self.counts
+        records['colors'] = self.colors
+        
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, records)
+        os.replace(tmp_path, path)
+    
+    @classmethod
+    def load(cls, path):
+        """Memory-map a file written by save()"""
+        records = np.load(path, mmap_mode='r')
+        return cls(records['id'], records['count'], records['colors'])
+
+def palette_path(data_dir, version):
+    """Path of the palette file for a store version"""
+    return os.path.join(data_dir, f"palettes.{version}.npy")
+
+def load_palettes(data_dir, version, websites):
+    """
+    Memory-map the palette file of a store version, building it if needed
+    
+    The file is trusted only if its rows line up with the websites' ids.
+    
+    Args:
+        data_dir: Directory holding the palette files
+        version: Store version the websites were read at
+        websites: Website dicts in catalog order
+    
+    Returns:
+        PaletteArray
+    """
+    path = palette_path(data_dir, version)
+    ids = np.array([website['id'].encode() for website in websites], dtype=np.bytes_)
+    
+    if os.path.exists(path):
+        try:
+            palettes = PaletteArray.load(path)
+            if len(palettes) == len(ids) and np.array_equal(palettes.ids, ids):
+                return palettes
+            logger.warning(f"Palette file {path} doesn't match the store, rebuilding it")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load palette file {path}: {e}")
+    
+    palettes = PaletteArray.build(websites)
+    if len(palettes) and save_palettes(data_dir, version, palettes):
+        return PaletteArray.load(path)
+    return palettes
+
+def save_palettes(data_dir, version, palettes):
+    """
+    Persist palettes for a store version and remove files of older versions
+    
+    Returns:
+        True if the file was written
+    """
+    path = palette_path(data_dir, version)
+    try:
+        palettes.save(path)
+    except OSError as e:
+        logger.warning(f"Could not write palette file {path}: {e}")
+        return False
+    
+    for old_path in glob.glob(os.path.join(data_dir, 'palettes.*.npy')):
+        if old_path != path:
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+    return True
@@ -0,0 +1,218 @@
+import logging
+import uuid
+from datetime import datetime
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+try:
+    from lxml import etree, html as lxml_html
+except ImportError:  # pragma: no cover - lxml is optional
+    etree = lxml_html = None
+
+def website_from_fields(fields, base_url=None):
+    """
+    Build a website record from the fields of one listing item
+    
+    Args:
+        fields: Dict with title, url, image_src, description, tags and award
+            (missing or empty values are left out)
+        base_url: Base for resolving relative image URLs
+    
+    Returns:
+        Website dict, or None if the item has no URL
+    """
+    if fields.get('url') is None:
+        # Skip items without URLs
+        return None
+    
+    # Main website data
+    website = {
+        'id': str(uuid.uuid4()),
+        'scraped_at': datetime.now().isoformat()
+    }
+    
+    if fields.get('title') is not None:
+        website['title'] = fields['title']
+    
+    website['url'] = fields['url']
+    
+    if fields.get('image_src'):
+        website['image_url'] = urljoin(base_url or Config.AWWWARDS_BASE_URL, fields['image_src'])
+    
+    if fields.get('description') is not None:
+        website['description'] = fields['description']
+    
+    if fields.get('tags'):
+        website['tags'] = fields['tags']
+    
+    if fields.get('award') is not None:
+        website['award'] = fields['award']
+    
+    return website
+
+def extract_website_data(item, base_url=None):
+    """Extract website data from a BeautifulSoup HTML item"""
+    try:
+        fields = {}
+        
+        # Title
+        title_element = item.select_one('.title')
+        if title_element:
+            fields['title'] = title_element.get_text(strip=True)
+        
+        # URL
+        url_element = item.select_one('a.js-visit-item')
+        if url_element:
+            fields['url'] = url_element.get('href')
+        
+        # Image URL
+        image_element = item.select_one('figure img')
+        if image_element:
+            fields['image_src'] = image_element.get('data-src') or image_element.get('src')
+        
+        # Description
+        desc_element = item.select_one('.description')
+        if desc_element:
+            fields['description'] = desc_element.get_text(strip=True)
+        
+        # Tags
+        fields['tags'] = [tag for tag in (el.get_text(strip=True) for el in item.select('.tags a')) if tag]
+        
+        # Award status
+        award_element = item.select_one('.box-award')
+        if award_element:
+            fields['award'] = award_element.get_text(strip=True)
+        
+        return website_from_fields(fields, base_url)
+    
+    except Exception as e:
+        logger.exception(f"Error extracting website data: {e}")
+        return None
+
+class SoupParser:
+    """BeautifulSoup listing parser (the original implementation)"""
+    
+    name = 'soup'
+    
+    def __init__(self, features='html.parser'):
+        self.features = features
+    
+    def parse(self, html, base_url=None):
+        """
+        Parse a listing page
+        
+        Returns:
+            Tuple of (number of grid items, list of website dicts)
+        """
+        soup = BeautifulSoup(html, self.features)
+        items = soup.select('.grid-item')
+        websites = [extract_website_data(item, base_url) for item in items]
+        return len(items), [w for w in websites if w]
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+class LxmlParser:
+    """
+    lxml listing parser with precompiled XPath selectors
+    
+    Equivalent to SoupParser but the document is parsed by libxml2 and each
+    field is found with an XPath compiled once per process.
+    """
+    
+    name = 'lxml'
+    
+    if etree is not None:
+        _items = etree.XPath(f"//*[{_has_class('grid-item')}]")
+        _title = etree.XPath(f".//*[{_has_class('title')}][1]")
+        _url = etree.XPath(f".//a[{_has_class('js-visit-item')}][1]")
+        _image = etree.XPath(".//figure//img[1]")
+        _description = etree.XPath(f".//*[{_has_class('description')}][1]")
+        _tags = etree.XPath(f".//*[{_has_class('tags')}]//a")
+        _award = etree.XPath(f".//*[{_has_class('box-award')}][1]")
+    
+    @staticmethod
+    def _text(element):
+        """Same as BeautifulSoup's get_text(strip=True)"""
+        return ''.join(s.strip() for s in element.itertext() if s.strip())
+    
+    def _first(self, xpath, item):
+        # XPath [1] applies per parent, so keep only the first in document order
+        found = xpath(item)
+        return found[0] if found else None
+    
+    def extract(self, item, base_url=None):
+        """Extract website data from an lxml element"""
+        try:
+            fields = {}
+            
+            title = self._first(self._title, item)
+            if title is not None:
+                fields['title'] = self._text(title)
+            
+            url = self._first(self._url, item)
+            if url is not None:
+                fields['url'] = url.get('href')
+            
+            image = self._first(self._image, item)
+            if image is not None:
+                fields['image_src'] = image.get('data-src') or image.get('src')
+            
+            description = self._first(self._description, item)
+            if description is not None:
+                fields['description'] = self._text(description)
+            
+            fields['tags'] = [tag for tag in (self._text(el) for el in self._tags(item)) if tag]
+            
+            award = self._first(self._award, item)
+            if award is not None:
+                fields['award'] = self._text(award)
+            
+            return website_from_fields(fields, base_url)
+        
+        except Exception as e:
+            logger.exception(f"Error extracting website data: {e}")
+            return None
+    
+    def parse(self, html, base_url=None):
+        """
+        Parse a listing page
+        
+        Returns:
+            Tuple of (number of grid items, list of website dicts)
+        """
+        items = self._items(lxml_html.fromstring(html))
+        websites = [self.extract(item, base_url) for item in items]
+        return len(items), [w for w in websites if w]
+
+PARSERS = {
+    'soup': SoupParser,
+    'lxml': LxmlParser,
+}
+
+_fallback_logged = False
+
+def get_parser(name=None):
+    """
+    Return a listing parser by name (defaults to Config.HTML_PARSER)
+    
+    Falls back to the BeautifulSoup parser when lxml isn't installed.
+    """
+    global _fallback_logged
+    
+    name = name or Config.HTML_PARSER
+    if name not in PARSERS:
+        raise ValueError(f"Unknown HTML parser: {name}")
+    
+    if name == 'lxml' and etree is None:
+        if not _fallback_logged:
+            logger.warning("lxml is not installed, falling back to the html.parser backend")
+            _fallback_logged = True
+        name = 'soup'
+    
+    return PARSERS[name]()
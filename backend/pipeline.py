@@ -0,0 +1,205 @@
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from color_extractor import PALETTE_SETTINGS, algorithm_version, extract_result, palette_cache_key
+from config import Config
+from images import build_derivatives
+from metrics import SCRAPE_RECORDS, observe_stages, timed
+from palette_cache import get_palette_cache
+
+logger = logging.getLogger(__name__)
+
+# Extraction processes start from a fresh server process instead of a fork of
+# this one, which runs the job, download and writer threads: a forked child
+# could inherit a lock held by one of them and never see it released
+_MP_CONTEXT = multiprocessing.get_context(
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn')
+
+# Config values copied into the extraction processes, which don't inherit this
+# process's Config the way forked ones did
+_WORKER_SETTINGS = ('QUANTIZER', 'SAMPLING_MODE') + PALETTE_SETTINGS
+
+def _init_worker(settings):
+    """Process pool initializer, applies the parent's extraction settings"""
+    for name, value in settings.items():
+        setattr(Config, name, value)
+
+class ScrapePipeline:
+    """
+    Staged pipeline for the scraper: download, extract, persist
+    
+    The page fetcher submits new website records. A pool of download
+    threads fetches their images and builds their resized derivatives, a
+    process pool extracts palettes and a single writer thread persists the
+    finished records. The stages are connected by bounded queues, so a fast
+    stage blocks instead of buffering the whole scrape.
+    """
+    
+    _DONE = object()
+    
+    def __init__(self, download, persist, download_workers=None, extract_workers=None,
+                 queue_size=None, num_colors=None, resize_width=200, progress=None):
+        """
+        Args:
+            download: Callable (image_url, website_id) -> (local filename,
+                image bytes), see scraper.download_image
+            persist: Callable (website_data) -> None, only called from one thread
+            download_workers: Number of image download threads
+            extract_workers: Number of palette extraction processes
+            queue_size: Bound on records waiting in each stage
+            num_colors: Number of colors to extract per image
+            resize_width: Width to resize images to before extraction
+            progress: Optional callable (stat name, new value) called on
+                every change of ``stats``, from any pipeline thread
+        """
+        self.download = download
+        self.persist = persist
+        self.num_colors = num_colors or Config.NUM_COLORS
+        self.resize_width = resize_width
+        self.progress = progress
+        self.stats = {'submitted': 0, 'downloaded': 0, 'extracted': 0, 'cached': 0, 'persisted': 0, 'failed': 0}
+        self._stats_lock = threading.Lock()
+        
+        queue_size = queue_size or Config.PIPELINE_QUEUE_SIZE
+        self._downloads = queue.Queue(maxsize=queue_size)
+        self._results = queue.Queue(maxsize=queue_size)
+        # Bounds the number of images queued or running in the process pool
+        self._extract_slots = threading.BoundedSemaphore(queue_size)
+        self._pool = ProcessPoolExecutor(
+            max_workers=extract_workers or Config.EXTRACT_WORKERS or os.cpu_count(),
+            mp_context=_MP_CONTEXT,
+            initializer=_init_worker,
+            initargs=({name: getattr(Config, name) for name in _WORKER_SETTINGS},),
+        )
+        self._cache = get_palette_cache()
+        
+        self._downloaders = [
+            threading.Thread(target=self._download_loop, name=f"scrape-download-{i}", daemon=True)
+            for i in range(download_workers or Config.DOWNLOAD_WORKERS)
+        ]
+        self._writer = threading.Thread(target=self._persist_loop, name="scrape-persist", daemon=True)
+        for thread in self._downloaders + [self._writer]:
+            thread.start()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+            value = self.stats[key]
+        SCRAPE_RECORDS.inc(key)
+        if self.progress is not None:
+            self.progress(key, value)
+    
+    def submit(self, website_data):
+        """Queue a new website record, blocks while the download stage is full"""
+        self._count('submitted')
+        self._downloads.put(website_data)
+    
+    def _download_loop(self):
+        while True:
+            website_data = self._downloads.get()
+            if website_data is self._DONE:
+                return
+            
+            try:
+                self._process(website_data)
+            except Exception as e:
+                logger.exception(f"Error processing {website_data.get('url')}: {e}")
+                self._count('failed')
+                self._results.put((website_data, None))
+    
+    def _process(self, website_data):
+        image_filename = data = None
+        if 'image_url' in website_data:
+            image_filename, data = self.download(website_data['image_url'], website_data['id'])
+        
+        if not image_filename:
+            self._results.put((website_data, None))
+            return
+        
+        self._count('downloaded')
+        website_data['local_image'] = image_filename
+        image_path = os.path.join(Config.DATA_DIR, 'images', image_filename)
+        # Extract from the downloaded bytes, the file is only read if it was already on disk
+        source = data if data is not None else image_path
+        
+        try:
+            with timed('derivatives'):
+                website_data['images'] = build_derivatives(source)
+        except Exception as e:
+            logger.error(f"Error building image derivatives for {image_filename}: {e}")
+        
+        key = None
+        if self._cache is not None:
+            key = palette_cache_key(source, self.num_colors, self.resize_width)
+            cached = self._cache.get(*key)
+            if cached is not None:
+                self._count('cached')
+                self._set_palette(website_data, cached)
+                self._results.put((website_data, None))
+                return
+        
+        self._extract_slots.acquire()
+        future = self._pool.submit(extract_result, source, self.num_colors, self.resize_width, image_path)
+        future.add_done_callback(lambda f: self._extracted(website_data, key, f))
+    
+    def _extracted(self, website_data, key, future):
+        self._extract_slots.release()
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.exception(f"Extraction worker failed for {website_data['url']}: {e}")
+            self._count('failed')
+            self._results.put((website_data, None))
+            return
+        
+        observe_stages(result.timings)
+        if result.error:
+            logger.error(f"Error extracting colors from {result.path}: {result.error}")
+            self._count('failed')
+        elif result.colors:
+            self._count('extracted')
+            self._set_palette(website_data, result.colors)
+        self._results.put((website_data, key if result.colors else None))
+    
+    def _set_palette(self, website_data, palette):
+        website_data['palette'] = palette
+        website_data['palette_version'] = algorithm_version()
+    
+    def _persist_loop(self):
+        while True:
+            item = self._results.get()
+            if item is self._DONE:
+                return
+            
+            website_data, key = item
+            try:
+                if key is not None:
+                    self._cache.put(*key, website_data['palette'])
+                with timed('persist'):
+                    self.persist(website_data)
+                self._count('persisted')
+            except Exception as e:
+                logger.exception(f"Error persisting {website_data.get('url')}: {e}")
+                self._count('failed')
+    
+    def close(self):
+        """Drain every stage and stop the workers"""
+        for _ in self._downloaders:
+            self._downloads.put(self._DONE)
+        for thread in self._downloaders:
+            thread.join()
+        
+        # Every record is now either persisted, queued or being extracted
+        self._pool.shutdown(wait=True)
+        self._results.put(self._DONE)
+        self._writer.join()
@@ -0,0 +1,185 @@
+import gzip
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, current_app, request
+from werkzeug.http import http_date, parse_date
+
+from catalog import get_catalog
+from config import Config
+from metrics import REGISTRY, CallbackMetric
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+class ResponseCache:
+    """
+    Thread-safe LRU of serialized (and compressed) API responses
+    
+    Keys include the catalog version, so entries of older snapshots are
+    never served again and simply age out.
+    """
+    
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+    
+    def put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self):
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries
+            }
+
+_cache = ResponseCache(Config.RESPONSE_CACHE_MAX_ENTRIES)
+
+def get_response_cache():
+    """Return the process-wide response cache"""
+    return _cache
+
+REGISTRY.register(CallbackMetric('awwwards_response_cache_hits_total', 'Response cache hits',
+                                 lambda: _cache.hits, type='counter'))
+REGISTRY.register(CallbackMetric('awwwards_response_cache_misses_total', 'Response cache misses',
+                                 lambda: _cache.misses, type='counter'))
+REGISTRY.register(CallbackMetric('awwwards_response_cache_entries', 'Responses held in the response cache',
+                                 lambda: _cache.stats()['entries']))
+
+def negotiate_encoding():
+    """Best content coding supported by both sides: br, gzip or None"""
+    accepted = request.accept_encodings
+    if brotli is not None and accepted.quality('br') > 0:
+        return 'br'
+    if accepted.quality('gzip') > 0:
+        return 'gzip'
+    return None
+
+def compress(body, encoding):
+    """Encode a response body with 'br', 'gzip' or None (identity)"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    return body
+
+def _etag_matches(header, etag):
+    """Whether an If-None-Match header names the etag (any encoding variant)"""
+    for candidate in header.split(','):
+        candidate = candidate.strip()
+        if candidate == '*':
+            return True
+        candidate = candidate.removeprefix('W/').strip('"')
+        for suffix in ('-br', '-gzip'):
+            candidate = candidate.removesuffix(suffix)
+        if candidate == etag:
+            return True
+    return False
+
+def _not_modified(etag, last_modified):
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match:
+        return _etag_matches(if_none_match, etag)
+    
+    if_modified_since = parse_date(request.headers.get('If-Modified-Since'))
+    if if_modified_since is not None and last_modified is not None:
+        # HTTP dates have one second resolution
+        return int(last_modified) <= if_modified_since.timestamp()
+    return False
+
+def _cache_headers(response, etag, encoding, last_modified):
+    response.headers['ETag'] = f'"{etag}-{encoding}"' if encoding else f'"{etag}"'
+    response.headers['Cache-Control'] = f'public, max-age={Config.CACHE_TIMEOUT}'
+    response.headers['Vary'] = 'Accept-Encoding'
+    if last_modified is not None:
+        response.headers['Last-Modified'] = http_date(last_modified)
+    return response
+
+def cached_response(view):
+    """
+    HTTP caching for a GET endpoint whose output depends only on the catalog
+    
+    The ETag is derived from the catalog version and the request path and
+    query, so it changes exactly when the data or the query does, plus the
+    content coding of the body. A matching If-None-Match (or
+    If-Modified-Since) gets a 304 without a body, carrying the same
+    validators as the 200 it revalidates. Successful JSON responses are
+    compressed for the client's Accept-Encoding and memoized in the response
+    cache, so the view only runs on a cache miss; streamed responses only
+    get the validators. Error responses pass through untouched.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        catalog = get_catalog(current_app.config['DATA_DIR'])
+        query = '&'.join(sorted(f"{k}={v}" for k, values in request.args.lists() for v in values))
+        etag = hashlib.sha1(f"{catalog.version}:{request.path}?{query}".encode()).hexdigest()[:32]
+        last_modified = catalog.updated_at
+        not_modified = _not_modified(etag, last_modified)
+        
+        key = (etag, negotiate_encoding())
+        entry = _cache.get(key)
+        
+        if entry is None:
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            if response.is_streamed:
+                if not_modified:
+                    response.close()
+                    response = Response(status=304)
+                return _cache_headers(response, etag, None, last_modified)
+            
+            body = response.get_data()
+            # Small bodies are stored and sent as they are, without the coding suffix
+            encoding = key[1] if len(body) >= Config.COMPRESS_MIN_SIZE else None
+            entry = (compress(body, encoding), response.mimetype, encoding)
+            _cache.put(key, entry)
+        
+        body, mimetype, encoding = entry
+        if not_modified:
+            # The suffix comes from the stored body, as on the 200
+            return _cache_headers(Response(status=304), etag, encoding, last_modified)
+        
+        response = Response(body, status=200, mimetype=mimetype)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        return _cache_headers(response, etag, encoding, last_modified)
+    
+    return wrapper
@@ -1,222 +1,279 @@
-import requests
-from bs4 import BeautifulSoup
-import json
 import os
-import time
-import random
 import logging
-import uuid
-from datetime import datetime
-from urllib.parse import urljoin
+import re
+from urllib.parse import urljoin, urlparse
 import io
 from PIL import Image
-import threading
-from color_extractor import extract_colors_from_image
+import catalog
 from config import Config
+from palette_cache import get_palette_cache
+from http_client import get_http_client
+from journal import ScrapeCheckpoint, ScrapeJournal, journal_path
+from metrics import profiled, timed
+from parsers import get_parser
+from pipeline import ScrapePipeline
+from storage import get_store
 
 logger = logging.getLogger(__name__)
 
-# Headers to mimic a real browser
-HEADERS = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-    'Accept-Language': 'en-US,en;q=0.5',
-    'Connection': 'keep-alive',
-    'Upgrade-Insecure-Requests': '1',
-    'DNT': '1',
-}
-
 # Base URL for Awwwards
-BASE_URL = 'https://www.awwwards.com/'
+BASE_URL = Config.AWWWARDS_BASE_URL
 
-# Lock for thread-safe file operations
-file_lock = threading.Lock()
+# Random delay ranges (seconds) between requests to the same host
+PAGE_DELAY = (1, 3)
+IMAGE_DELAY = (0.5, 1.5)
 
-def scrape_awwwards(pages=5, section='websites'):
+@profiled('scrape')
+def scrape_awwwards(pages=5, section='websites', incremental=None, progress=None, cancel_event=None):
     """
     Scrape Awwwards websites
     
+    In incremental mode, listing pages are requested with the ETag and
+    Last-Modified validators saved by the previous run, and pagination stops
+    at the first page that is unchanged (304) or has no new websites.
+    
+    Processed websites are appended to the scrape journal and compacted
+    into the store periodically. If the previous scrape of the same section
+    was interrupted, its journal is replayed first and this scrape resumes
+    from the interrupted one's checkpoint (page and item index).
+    
     Args:
         pages: Number of pages to scrape
-        section: Section to scrape (websites, nominees, etc.)
+        section: Section to scrape (websites, nominees, etc.), a slug of
+            lowercase letters, digits and hyphens
+        incremental: Use conditional requests and stop early (defaults to
+            Config.SCRAPE_INCREMENTAL)
+        progress: Optional callable (name, value) receiving ``pages_total``,
+            ``pages_done`` and the pipeline's stats as they change
+        cancel_event: Optional threading.Event; once set, no further pages
+            are requested and websites already queued are finished
+    
+    Returns:
+        Scrape report dict. ``pages_requested`` counts pages this run
+        tried, of which ``pages_failed`` raised an error. ``pages_skipped``
+        counts pages never requested after an incremental early stop and
+        ``requests_saved`` counts full page downloads avoided (skipped plus
+        not modified). ``cancelled`` is True if the scrape was stopped
+        through cancel_event, the pages it never requested are counted in
+        ``pages_cancelled`` instead. ``resumed_from`` is the checkpoint the
+        scrape resumed from, or None.
+    
+    Raises:
+        ValueError: For an invalid section
+        RuntimeError: If another scrape, e.g. from another process, is running
+    
+    With Config.PROFILE_SCRAPE set, the run is profiled, see metrics.profiled.
     """
-    logger.info(f"Starting scraping of {pages} pages from {section} section")
+    if not isinstance(section, str) or not re.fullmatch(r'[a-z0-9-]+', section):
+        raise ValueError(f"Invalid section: {section!r}")
+    if incremental is None:
+        incremental = Config.SCRAPE_INCREMENTAL
+    
+    logger.info(f"Starting {'incremental ' if incremental else ''}scraping of {pages} pages from {section} section")
     
     # Create data directory if it doesn't exist
     os.makedirs(Config.DATA_DIR, exist_ok=True)
     os.makedirs(os.path.join(Config.DATA_DIR, 'images'), exist_ok=True)
     
-    # Check if websites.json exists
-    json_file = os.path.join(Config.DATA_DIR, 'websites.json')
-    websites = []
+    store = get_store()
+    journal = ScrapeJournal(journal_path(), store)
+    resume = journal.recover()
+    catalog.invalidate()
+    logger.info(f"Loaded {store.count()} existing websites from the store")
     
-    if os.path.exists(json_file):
-        with open(json_file, 'r') as f:
-            websites = json.load(f)
-            logger.info(f"Loaded {len(websites)} existing websites from JSON")
+    start_page, start_item = 1, 0
+    if resume and resume.get('section') == section and resume['page'] <= pages:
+        start_page, start_item = resume['page'], resume['item']
+        logger.info(f"Resuming the interrupted scrape at page {start_page}, item {start_item}")
+    else:
+        resume = None
     
     # Track URLs to avoid duplicates
-    existing_urls = {website['url'] for website in websites}
+    existing_urls = store.urls()
     
-    # Process each page
-    for page in range(1, pages + 1):
-        logger.info(f"Scraping page {page} of {pages}")
-        
-        try:
-            # Construct the page URL
-            if page == 1:
-                url = urljoin(BASE_URL, section)
-            else:
-                url = urljoin(BASE_URL, f"{section}/page-{page}")
-            
-            # Make the request with a random delay to be respectful
-            time.sleep(random.uniform(1, 3))
-            response = requests.get(url, headers=HEADERS, timeout=30)
-            response.raise_for_status()
-            
-            # Parse the HTML
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Find website entries
-            website_items = soup.select('.grid-item')
-            
-            if not website_items:
-                logger.warning(f"No website items found on page {page}")
-                continue
+    report = {
+        'pages_fetched': 0,
+        'pages_not_modified': 0,
+        'pages_failed': 0,
+        'pages_skipped': 0,
+        'pages_cancelled': 0,
+        'requests_saved': 0,
+        'cancelled': False,
+        'resumed_from': resume,
+    }
+    if progress is not None:
+        progress('pages_total', pages)
+    
+    # Validators are only saved once the pages' websites are persisted
+    validators = {}
+    
+    checkpoint = ScrapeCheckpoint(section)
+    checkpoint.advance(start_page, start_item)
+    
+    def persist(website_data):
+        # One journal line per website, the store is written in batches
+        journal.append(website_data, checkpoint.done(website_data['id']))
+        if journal.should_compact():
+            with timed('compact'):
+                journal.compact()
+            catalog.invalidate()
+    
+    last_page = start_page - 1
+    finished = False
+    parser = get_parser()
+    pipeline = ScrapePipeline(download_image, persist, progress=progress)
+    try:
+        # Process each page
+        for page in range(start_page, pages + 1):
+            if cancel_event is not None and cancel_event.is_set():
+                logger.info(f"Scrape cancelled before page {page}")
+                report['cancelled'] = True
+                break
             
-            logger.info(f"Found {len(website_items)} website items on page {page}")
+            last_page = page
+            logger.info(f"Scraping page {page} of {pages}")
             
-            # Process each website entry
-            for item in website_items:
-                try:
-                    # Extract website data
-                    website_data = extract_website_data(item)
-                    
-                    if not website_data or website_data['url'] in existing_urls:
+            try:
+                # Construct the page URL
+                if page == 1:
+                    url = urljoin(BASE_URL, section)
+                else:
+                    url = urljoin(BASE_URL, f"{section}/page-{page}")
+                
+                headers = {}
+                if incremental:
+                    saved = store.get_meta(f"page_validators:{url}", {})
+                    if saved.get('etag'):
+                        headers['If-None-Match'] = saved['etag']
+                    if saved.get('last_modified'):
+                        headers['If-Modified-Since'] = saved['last_modified']
+                
+                # Make the request with a random delay to be respectful
+                response = get_http_client().get(url, delay=PAGE_DELAY, stage='page_fetch', headers=headers)
+                
+                if response.status_code == 304:
+                    report['pages_not_modified'] += 1
+                    logger.info(f"Page {page} not modified since the last scrape, stopping")
+                    break
+                
+                response.raise_for_status()
+                report['pages_fetched'] += 1
+                
+                # Parse the HTML into website records
+                with timed('html_parse'):
+                    item_count, page_websites = parser.parse(response.text, base_url=BASE_URL)
+                
+                if not item_count:
+                    logger.warning(f"No website items found on page {page}")
+                    continue
+                
+                logger.info(f"Found {item_count} website items on page {page}")
+                
+                # Hand new websites to the download/extract/persist stages
+                new_on_page = 0
+                for item, website_data in enumerate(page_websites):
+                    # Items before the checkpoint were processed by the interrupted scrape
+                    if page == start_page and item < start_item:
+                        continue
+                    if website_data['url'] in existing_urls:
+                        checkpoint.advance(page, item + 1)
                         continue
                     
-                    # Download and process image
-                    if 'image_url' in website_data:
-                        image_filename = download_image(website_data['image_url'], website_data['id'])
-                        
-                        if image_filename:
-                            website_data['local_image'] = image_filename
-                            
-                            # Extract color palette
-                            image_path = os.path.join(Config.DATA_DIR, 'images', image_filename)
-                            palette = extract_colors_from_image(image_path)
-                            
-                            if palette:
-                                website_data['palette'] = palette
-                    
-                    # Add to our list and update existing_urls
-                    websites.append(website_data)
                     existing_urls.add(website_data['url'])
-                    
-                    # Save periodically to avoid losing data if the process crashes
-                    if len(websites) % 10 == 0:
-                        with file_lock:
-                            with open(json_file, 'w') as f:
-                                json.dump(websites, f, indent=2)
+                    checkpoint.submitted(website_data['id'], page, item)
+                    pipeline.submit(website_data)
+                    new_on_page += 1
+                checkpoint.advance(page + 1, 0)
                 
-                except Exception as e:
-                    logger.exception(f"Error processing website item: {e}")
-        
-        except Exception as e:
-            logger.exception(f"Error scraping page {page}: {e}")
+                if response.headers.get('ETag') or response.headers.get('Last-Modified'):
+                    validators[url] = {
+                        'etag': response.headers.get('ETag'),
+                        'last_modified': response.headers.get('Last-Modified'),
+                    }
+                
+                # The page a scrape resumes on may hold only websites it already has
+                if incremental and new_on_page == 0 and not (resume and page == start_page):
+                    logger.info(f"No new websites on page {page}, stopping")
+                    break
+            
+            except Exception as e:
+                logger.exception(f"Error scraping page {page}: {e}")
+                report['pages_failed'] += 1
+            
+            finally:
+                if progress is not None:
+                    progress('pages_done', page)
+        finished = True
+    finally:
+        pipeline.close()
+        # Keep the checkpoint unless the loop ran to its end
+        journal.close(finished=finished)
+        catalog.invalidate()
     
-    # Final save
-    with file_lock:
-        with open(json_file, 'w') as f:
-            json.dump(websites, f, indent=2)
+    for url, page_validators in validators.items():
+        store.set_meta(f"page_validators:{url}", page_validators)
     
-    logger.info(f"Scraping complete. {len(websites)} websites in the database.")
-    return len(websites)
-
-def extract_website_data(item):
-    """Extract website data from a HTML item"""
-    try:
-        # Main website data
-        website = {
-            'id': str(uuid.uuid4()),
-            'scraped_at': datetime.now().isoformat()
-        }
-        
-        # Title
-        title_element = item.select_one('.title')
-        if title_element:
-            website['title'] = title_element.get_text(strip=True)
-        
-        # URL
-        url_element = item.select_one('a.js-visit-item')
-        if url_element:
-            website['url'] = url_element.get('href')
-        else:
-            # Skip items without URLs
-            return None
-        
-        # Image URL
-        image_element = item.select_one('figure img')
-        if image_element:
-            image_url = image_element.get('data-src') or image_element.get('src')
-            if image_url:
-                website['image_url'] = urljoin(BASE_URL, image_url)
-        
-        # Description
-        desc_element = item.select_one('.description')
-        if desc_element:
-            website['description'] = desc_element.get_text(strip=True)
-        
-        # Tags
-        tags = []
-        tag_elements = item.select('.tags a')
-        for tag_el in tag_elements:
-            tag = tag_el.get_text(strip=True)
-            if tag:
-                tags.append(tag)
-        
-        if tags:
-            website['tags'] = tags
-        
-        # Award status
-        award_element = item.select_one('.box-award')
-        if award_element:
-            award_text = award_element.get_text(strip=True)
-            website['award'] = award_text
-        
-        return website
+    report['pages_requested'] = last_page - start_page + 1
+    # Pages left after a cancel weren't saved by the incremental early stop
+    report['pages_cancelled' if report['cancelled'] else 'pages_skipped'] = pages - last_page
+    report['requests_saved'] = report['pages_skipped'] + report['pages_not_modified']
+    report['new_websites'] = pipeline.stats['persisted']
+    report['total_websites'] = store.count()
+    report['pipeline'] = dict(pipeline.stats)
     
-    except Exception as e:
-        logger.exception(f"Error extracting website data: {e}")
-        return None
+    logger.info(f"Scraping complete. {report['new_websites']} new websites, "
+                f"{report['total_websites']} websites in the database.")
+    logger.info(f"Requested {report['pages_requested']} of {pages} pages, {report['pages_failed']} failed, "
+                f"{report['pages_not_modified']} not modified, "
+                f"{report['pages_skipped']} skipped, {report['pages_cancelled']} cancelled, "
+                f"{report['requests_saved']} requests saved")
+    logger.info(f"Pipeline: {pipeline.stats}")
+    
+    cache = get_palette_cache()
+    if cache is not None:
+        logger.info(f"Palette cache: {cache.stats()}")
+    return report
 
 def download_image(url, website_id):
-    """Download an image from a URL and save it locally"""
+    """
+    Download an image from a URL and save it locally
+    
+    The downloaded bytes are written to disk unchanged, so the image is
+    never decoded and re-encoded here.
+    
+    Returns:
+        Tuple of (filename, image bytes). The bytes are None if the file was
+        already on disk, and both are None if the download failed.
+    """
     try:
         # Generate a filename based on the website ID
-        ext = os.path.splitext(url)[1] or '.jpg'
+        ext = os.path.splitext(urlparse(url).path)[1] or '.jpg'
         filename = f"{website_id}{ext}"
         local_path = os.path.join(Config.DATA_DIR, 'images', filename)
         
         # Don't re-download if file exists
         if os.path.exists(local_path):
-            return filename
+            return filename, None
         
-        # Download the image
-        time.sleep(random.uniform(0.5, 1.5))
-        response = requests.get(url, headers=HEADERS, timeout=30)
+        # Download the image, spaced out from other requests to the same host
+        response = get_http_client().get(url, delay=IMAGE_DELAY, stage='image_download')
         response.raise_for_status()
+        data = response.content
+        
+        # Only read the header to reject anything that isn't an image
+        Image.open(io.BytesIO(data))
         
-        # Open and save the image using PIL
-        img = Image.open(io.BytesIO(response.content))
-        img.save(local_path)
+        temp_path = f"{local_path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, local_path)
         
         logger.info(f"Downloaded image: {filename}")
-        return filename
+        return filename, data
     
     except Exception as e:
         logger.exception(f"Error downloading image {url}: {e}")
-        return None
+        return None, None
 
 if __name__ == "__main__":
     # For testing the scraper directly
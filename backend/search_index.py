@@ -0,0 +1,125 @@
+import bisect
+import re
+
+TOKEN_RE = re.compile(r'\w+')
+
+# Score of a query token matching a field, exact token match vs prefix only
+WEIGHTS = {
+    ('title', True): 3.0,
+    ('title', False): 2.0,
+    ('tags', True): 1.5,
+    ('tags', False): 1.0,
+}
+
+def tokenize(text):
+    """Lowercase word tokens of a string"""
+    return TOKEN_RE.findall((text or '').lower())
+
+def normalize_tag(tag):
+    """Normalized form used for exact tag filtering"""
+    return (tag or '').strip().lower()
+
+class TextIndex:
+    """
+    Inverted index over website titles and tags
+    
+    Maps title tokens, tag tokens and normalized tags to posting lists of
+    catalog positions. Posting lists are append-only and sorted, so websites
+    appended by the scraper extend the index without a rebuild.
+    """
+    
+    def __init__(self, postings=None, tags=None):
+        # field -> token -> sorted list of catalog positions
+        self.postings = postings or {'title': {}, 'tags': {}}
+        # normalized tag -> sorted list of catalog positions
+        self.tags = tags or {}
+        self._vocabulary = {}
+    
+    @classmethod
+    def build(cls, websites, start=0):
+        index = cls()
+        index._add(websites, start, copied=None)
+        return index
+    
+    def extend(self, websites, start):
+        """
+        Return a new index with websites appended at catalog position start
+        
+        Only the posting lists that change are copied, the rest are shared
+        with this index, which stays valid for readers of older snapshots.
+        """
+        index = TextIndex({field: dict(tokens) for field, tokens in self.postings.items()}, dict(self.tags))
+        index._add(websites, start, copied=set())
+        return index
+    
+    def _add(self, websites, start, copied):
+        def append(mapping, key, position):
+            postings = mapping.get(key)
+            if postings is None:
+                mapping[key] = [position]
+                if copied is not None:
+                    copied.add((id(mapping), key))
+                return
+            if copied is not None and (id(mapping), key) not in copied:
+                postings = mapping[key] = list(postings)
+                copied.add((id(mapping), key))
+            if postings[-1] != position:
+                postings.append(position)
+        
+        for position, website in enumerate(websites, start):
+            for token in tokenize(website.get('title')):
+                append(self.postings['title'], token, position)
+            for tag in website.get('tags', []):
+                for token in tokenize(tag):
+                    append(self.postings['tags'], token, position)
+                append(self.tags, normalize_tag(tag), position)
+        
+        self._vocabulary = {}
+    
+    def _matching_tokens(self, field, prefix):
+        """Indexed tokens of a field that start with prefix"""
+        vocabulary = self._vocabulary.get(field)
+        if vocabulary is None:
+            vocabulary = self._vocabulary[field] = sorted(self.postings[field])
+        lo = bisect.bisect_left(vocabulary, prefix)
+        hi = bisect.bisect_left(vocabulary, prefix + '\uffff')
+        return vocabulary[lo:hi]
+    
+    def score(self, query):
+        """
+        Match a free-text query against titles and tags
+        
+        Every query token must prefix-match a token of the title or of a tag.
+        Each token contributes the weight of its best match (see WEIGHTS).
+        
+        Returns:
+            Dict of catalog position -> relevance score (empty if the query
+            has no word characters)
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return {}
+        
+        scores = None
+        for query_token in tokens:
+            best = {}
+            for field in self.postings:
+                for token in self._matching_tokens(field, query_token):
+                    weight = WEIGHTS[(field, token == query_token)]
+                    for position in self.postings[field][token]:
+                        if weight > best.get(position, 0):
+                            best[position] = weight
+            
+            if scores is None:
+                scores = best
+            else:
+                scores = {p: s + best[p] for p, s in scores.items() if p in best}
+            
+            if not scores:
+                break
+        
+        return scores
+    
+    def with_tag(self, tag):
+        """Set of catalog positions of websites with an exact (normalized) tag"""
+        return set(self.tags.get(normalize_tag(tag), ()))
@@ -0,0 +1,208 @@
+from itertools import permutations
+
+import numpy as np
+
+from color_math import rgb_to_lab
+
+# Up to this many colors the minimal matching is found exactly by trying
+# every permutation (720 at 6 colors); wider palettes are matched greedily
+MAX_EXACT_WIDTH = 6
+
+# Slack for the float32 lower bounds when pruning candidates
+_BOUND_EPSILON = 1e-3
+
+_PERMUTATIONS = {}
+
+def _permutations(width):
+    perms = _PERMUTATIONS.get(width)
+    if perms is None:
+        perms = _PERMUTATIONS[width] = np.array(list(permutations(range(width))), dtype=np.intp)
+    return perms
+
+def padded_lab(colors, counts, width):
+    """
+    CIELAB colors of palettes padded to a fixed width
+    
+    Shorter palettes repeat their colors cyclically, so every palette has
+    exactly ``width`` colors and two palettes can always be matched one to
+    one.
+    
+    Args:
+        colors: (N, W, 3) uint8 RGB, valid up to each count
+        counts: (N,) number of colors per palette (at least 1)
+        width: Number of colors to pad to
+    
+    Returns:
+        (N, width, 3) float64 CIELAB array
+    """
+    slots = np.arange(width)[None, :] % np.maximum(counts, 1)[:, None]
+    rgb = colors[np.arange(len(colors))[:, None], slots]
+    return rgb_to_lab(rgb)
+
+def embed(lab):
+    """
+    Palette embeddings for lower-bounding the matching distance
+    
+    Each row holds the palette's L*, a* and b* values, each channel sorted
+    on its own. For any one-to-one matching, the mean absolute difference
+    of a channel is at least that of its sorted values, and the mean ΔE76
+    is at least the norm of the three channel means, so the embeddings give
+    a lower bound on the matching distance without solving the matching.
+    
+    Args:
+        lab: (N, width, 3) padded CIELAB palettes
+    
+    Returns:
+        (N, 3 * width) float32 array
+    """
+    count, width = lab.shape[:2]
+    # Explicit width, a -1 can't be inferred when there are no palettes
+    return np.sort(lab, axis=1).transpose(0, 2, 1).reshape(count, 3 * width).astype(np.float32)
+
+def lower_bound(query, embeddings, width):
+    """Lower bounds of the matching distance from one embedding to many"""
+    diff = embeddings - query
+    np.abs(diff, out=diff)
+    # Per-channel means as one matrix product, cheaper than reshape + sum
+    channel_means = diff @ (np.kron(np.eye(3), np.ones((width, 1))) / width).astype(np.float32)
+    return np.sqrt(np.einsum('ij,ij->i', channel_means, channel_means))
+
+def matching_distance(query, candidates):
+    """
+    Minimal-matching palette distance
+    
+    The mean ΔE76 over the one-to-one pairing of query and candidate colors
+    that minimizes it. Exact up to MAX_EXACT_WIDTH colors, greedy (an upper
+    bound) beyond.
+    
+    Args:
+        query: (width, 3) padded CIELAB palette
+        candidates: (M, width, 3) padded CIELAB palettes
+    
+    Returns:
+        (M,) array of distances
+    """
+    width = query.shape[0]
+    # cost[m, i, j]: ΔE76 between query color i and color j of candidate m
+    cost = np.sqrt(((candidates[:, None, :, :] - query[:, None, :]) ** 2).sum(axis=-1))
+    
+    if width <= MAX_EXACT_WIDTH:
+        perms = _permutations(width)
+        return cost[:, np.arange(width), perms].sum(axis=-1).min(axis=1) / width
+    
+    total = np.zeros(len(cost))
+    rows = np.arange(len(cost))
+    for _ in range(width):
+        flat = cost.reshape(len(cost), -1).argmin(axis=1)
+        i, j = np.divmod(flat, width)
+        total += cost[rows, i, j]
+        cost[rows, i, :] = np.inf
+        cost[rows, :, j] = np.inf
+    return total / width
+
+class SimilarityIndex:
+    """
+    Nearest-palette index over the catalog
+    
+    Stores one embedding per website with a palette. A query computes the
+    embedding lower bound for every palette, the exact matching distance
+    for the most promising candidates, and then, in bound order, for any
+    other candidate whose bound is still below the k-th best distance.
+    Results are the same as matching against every palette.
+    """
+    
+    # Candidates matched exactly before the bound is checked, per result
+    CANDIDATES_PER_RESULT = 8
+    MIN_CANDIDATES = 256
+    # Candidates matched at a time while the bound is being tightened
+    BATCH_SIZE = 256
+    
+    def __init__(self, embeddings, positions, width):
+        self.embeddings = embeddings
+        self.positions = positions
+        self.width = width
+    
+    @classmethod
+    def build(cls, palettes, start=0):
+        """
+        Embed the palettes of a PaletteArray
+        
+        Args:
+            palettes: PaletteArray rows in catalog order
+            start: Catalog position of the first row
+        """
+        rows = palettes.positions()
+        if not len(rows):
+            return cls(np.empty((0, 3 * palettes.width), dtype=np.float32), np.empty(0, dtype=np.int64),
+                       palettes.width)
+        lab = padded_lab(palettes.colors[rows], palettes.counts[rows], palettes.width)
+        return cls(embed(lab), rows.astype(np.int64) + start, palettes.width)
+    
+    def extend(self, palettes, start):
+        """Return a new index with palette rows appended at catalog position start"""
+        added = SimilarityIndex.build(palettes, start)
+        return SimilarityIndex(
+            np.concatenate([self.embeddings, added.embeddings]),
+            np.concatenate([self.positions, added.positions]),
+            self.width,
+        )
+    
+    def __len__(self):
+        return len(self.positions)
+    
+    def query(self, palettes, rgb, limit=10, exclude=None):
+        """
+        Find the palettes closest to a query palette
+        
+        Args:
+            palettes: The catalog's PaletteArray
+            rgb: (M, 3) query colors, M between 1 and the index width
+            limit: Number of results
+            exclude: Catalog position to leave out (e.g. the query website)
+        
+        Returns:
+            List of (catalog position, distance) tuples, closest first
+        """
+        if not len(self) or limit <= 0:
+            return []
+        
+        rgb = np.asarray(rgb, dtype=np.uint8).reshape(1, -1, 3)
+        query = padded_lab(rgb, np.array([rgb.shape[1]]), self.width)
+        bounds = lower_bound(embed(query)[0], self.embeddings, self.width)
+        query = query[0]
+        
+        if exclude is not None:
+            bounds[self.positions == exclude] = np.inf
+        available = int(np.isfinite(bounds).sum())
+        limit = min(limit, available)
+        if limit <= 0:
+            return []
+        
+        def distances(indices):
+            rows = self.positions[indices]
+            lab = padded_lab(palettes.colors[rows], palettes.counts[rows], self.width)
+            return matching_distance(query, lab)
+        
+        # Exact distances for the most promising candidates
+        pool = min(max(limit * self.CANDIDATES_PER_RESULT, self.MIN_CANDIDATES), available)
+        checked = np.argpartition(bounds, pool - 1)[:pool]
+        exact = distances(checked)
+        kth = np.partition(exact, limit - 1)[limit - 1]
+        
+        # Anything bounded below the k-th best so far could still beat it.
+        # Visit those in bound order, tightening the k-th best as we go.
+        mask = bounds < kth + _BOUND_EPSILON
+        mask[checked] = False
+        extra = np.flatnonzero(mask)
+        extra = extra[np.argsort(bounds[extra], kind='stable')]
+        for batch_start in range(0, len(extra), self.BATCH_SIZE):
+            batch = extra[batch_start:batch_start + self.BATCH_SIZE]
+            if bounds[batch[0]] >= kth + _BOUND_EPSILON:
+                break
+            checked = np.concatenate([checked, batch])
+            exact = np.concatenate([exact, distances(batch)])
+            kth = np.partition(exact, limit - 1)[limit - 1]
+        
+        positions = self.positions[checked]
+        best = np.lexsort((positions, exact))[:limit]
+        return [(int(positions[i]), float(exact[i])) for i in best]
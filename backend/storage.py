@@ -0,0 +1,236 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS websites (
+    id TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    title TEXT,
+    has_palette INTEGER NOT NULL DEFAULT 0,
+    seq INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_websites_url ON websites (url);
+CREATE INDEX IF NOT EXISTS idx_websites_seq ON websites (seq);
+CREATE INDEX IF NOT EXISTS idx_websites_palette ON websites (has_palette);
+
+CREATE TABLE IF NOT EXISTS website_tags (
+    website_id TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (website_id, tag)
+);
+CREATE INDEX IF NOT EXISTS idx_website_tags_tag ON website_tags (tag);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+'''
+
+class WebsiteStore:
+    """
+    SQLite storage for scraped websites
+    
+    Each website is kept as its JSON document plus indexed columns for id,
+    url, title and tags, so inserts, upserts and keyed lookups don't touch
+    the rest of the catalog. Rows keep their insertion order (rowid), and
+    every write bumps a monotonic ``seq`` so readers can pick up changes
+    incrementally.
+    """
+    
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        conn = self._connection()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.executescript(SCHEMA)
+        conn.commit()
+    
+    def _connection(self):
+        """One connection per thread, SQLite connections can't be shared"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+    
+    def upsert(self, website):
+        """Insert or update a single website (dict or models.Website)"""
+        self.upsert_many([website])
+    
+    def upsert_many(self, websites, meta=None):
+        """
+        Insert or update websites in a single transaction
+        
+        Args:
+            websites: Iterable of website dicts or models.Website objects
+            meta: Optional dict of meta values written in the same transaction
+        
+        Returns:
+            Number of websites written
+        """
+        conn = self._connection()
+        written = 0
+        
+        with self._write_lock, conn:
+            # Take the database write lock before reading seq, other processes
+            # (CLI, API job worker) write to the same store
+            conn.execute('BEGIN IMMEDIATE')
+            seq = self._get_meta(conn, 'seq', 0)
+            for website in websites:
+                if hasattr(website, 'to_dict'):
+                    website = website.to_dict()
+                
+                seq += 1
+                conn.execute(
+                    'INSERT INTO websites (id, url, title, has_palette, seq, data) VALUES (?, ?, ?, ?, ?, ?) '
+                    'ON CONFLICT (id) DO UPDATE SET url = excluded.url, title = excluded.title, '
+                    'has_palette = excluded.has_palette, seq = excluded.seq, data = excluded.data',
+                    (website['id'], website['url'], website.get('title'),
+                     int(bool(website.get('palette'))), seq, json.dumps(website))
+                )
+                conn.execute('DELETE FROM website_tags WHERE website_id = ?', (website['id'],))
+                conn.executemany(
+                    'INSERT OR IGNORE INTO website_tags (website_id, tag) VALUES (?, ?)',
+                    [(website['id'], tag.lower()) for tag in website.get('tags', [])]
+                )
+                written += 1
+            
+            self._set_meta(conn, 'seq', seq)
+            self._set_meta(conn, 'updated_at', time.time())
+            for key, value in (meta or {}).items():
+                self._set_meta(conn, key, value)
+        
+        return written
+    
+    def get(self, website_id):
+        """Get a website dict by id, or None"""
+        row = self._connection().execute('SELECT data FROM websites WHERE id = ?', (website_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def get_by_url(self, url):
+        """Get a website dict by url, or None"""
+        row = self._connection().execute('SELECT data FROM websites WHERE url = ?', (url,)).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def urls(self):
+        """Set of all stored website urls"""
+        return {row[0] for row in self._connection().execute('SELECT url FROM websites')}
+    
+    def count(self, with_palette=False):
+        """Number of stored websites, optionally only those with a palette"""
+        sql = 'SELECT COUNT(*) FROM websites'
+        if with_palette:
+            sql += ' WHERE has_palette = 1'
+        return self._connection().execute(sql).fetchone()[0]
+    
+    def iter_all(self, batch_size=1000):
+        """Iterate over all websites in insertion order without loading them at once"""
+        last_rowid = 0
+        while True:
+            rows = self._connection().execute(
+                'SELECT rowid, data FROM websites WHERE rowid > ? ORDER BY rowid LIMIT ?',
+                (last_rowid, batch_size)
+            ).fetchall()
+            if not rows:
+                return
+            for rowid, data in rows:
+                yield json.loads(data)
+            last_rowid = rows[-1][0]
+    
+    def changes_since(self, seq):
+        """
+        Websites written after a given sequence number
+        
+        Args:
+            seq: Sequence number from a previous call to version()
+        
+        Returns:
+            List of website dicts in insertion order
+        """
+        rows = self._connection().execute(
+            'SELECT data FROM websites WHERE seq > ? ORDER BY rowid', (seq,)
+        )
+        return [json.loads(row[0]) for row in rows]
+    
+    def version(self):
+        """Sequence number of the latest write, changes whenever the catalog does"""
+        return self._get_meta(self._connection(), 'seq', 0)
+    
+    def updated_at(self):
+        """Unix time of the latest write, or None for stores written before it was recorded"""
+        return self._get_meta(self._connection(), 'updated_at')
+    
+    def _get_meta(self, conn, key, default=None):
+        row = conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+    
+    def _set_meta(self, conn, key, value):
+        conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, json.dumps(value)))
+    
+    def get_meta(self, key, default=None):
+        """Read a small JSON value stored alongside the catalog"""
+        return self._get_meta(self._connection(), key, default)
+    
+    def set_meta(self, key, value):
+        """Store a small JSON value alongside the catalog"""
+        conn = self._connection()
+        with self._write_lock, conn:
+            self._set_meta(conn, key, value)
+
+def migrate_json(store, json_file):
+    """
+    Import a legacy websites.json file into the store
+    
+    Args:
+        store: WebsiteStore to import into
+        json_file: Path to the websites.json file
+    
+    Returns:
+        Number of websites imported
+    """
+    with open(json_file, 'r') as f:
+        websites = json.load(f)
+    
+    imported = store.upsert_many(websites)
+    store.set_meta('migrated_from', os.path.abspath(json_file))
+    logger.info(f"Migrated {imported} websites from {json_file}")
+    return imported
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_store(data_dir=None):
+    """
+    Return the shared WebsiteStore for a data directory
+    
+    On first use, an existing websites.json is migrated into an empty store.
+    """
+    data_dir = data_dir or Config.DATA_DIR
+    
+    with _stores_lock:
+        store = _stores.get(data_dir)
+        if store is None:
+            store = WebsiteStore(os.path.join(data_dir, 'websites.db'))
+            
+            json_file = os.path.join(data_dir, 'websites.json')
+            if os.path.exists(json_file) and store.count() == 0 and not store.get_meta('migrated_from'):
+                migrate_json(store, json_file)
+            
+            _stores[data_dir] = store
+        return store
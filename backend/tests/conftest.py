@@ -0,0 +1,12 @@
+"""
+Shared test setup
+
+The backend modules import each other as top-level modules (``from config
+import Config``), so the backend directory is put on ``sys.path`` here.
+"""
+import os
+import sys
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
@@ -0,0 +1,53 @@
+"""Catalog snapshots: building, incremental updates and queries"""
+import numpy as np
+
+from catalog import Catalog
+
+PALETTE = ['#112233', '#445566', '#778899', '#aabbcc', '#ddeeff']
+
+
+def website(i, palette=None):
+    record = {'id': f"site-{i}", 'url': f"https://site-{i}.example.com/", 'title': f"Site {i}", 'tags': ['Music']}
+    if palette:
+        record['palette'] = palette
+    return record
+
+
+def test_empty_catalog():
+    catalog = Catalog([], 0)
+    
+    assert len(catalog.similarity_index) == 0
+    assert catalog.similar(colors=PALETTE) == []
+    assert catalog.search(color='112233') == []
+    assert catalog.page_after() == ([], False)
+
+
+def test_catalog_without_palettes():
+    catalog = Catalog([website(i) for i in range(3)], 1)
+    
+    assert catalog.similar(colors=PALETTE) == []
+    assert catalog.serialize(catalog.websites[0]) == website(0)
+
+
+def test_first_palettes_appended_to_empty_catalog():
+    catalog = Catalog([website(0)], 1).with_changes([website(1, PALETTE)], 2)
+    
+    (match, distance), = catalog.similar(colors=PALETTE)
+    assert match['id'] == 'site-1'
+    assert np.isclose(distance, 0)
+
+
+def test_accessibility_of_changed_rows():
+    catalog = Catalog([website(0, PALETTE), website(1, ['#000000', '#ffffff'])], 1)
+    changed = [website(1, ['#ffffff', '#777777']), website(2, ['#ff0000'])]
+    
+    updated = catalog.with_changes(changed, 2)
+    rebuilt = Catalog([website(0, PALETTE)] + changed, 2)
+    assert np.array_equal(updated.contrast, rebuilt.contrast)
+    assert np.array_equal(updated.white_text, rebuilt.white_text)
+    assert updated.accessibility(updated.by_id['site-1']) == {
+        'text_colors': ['#000000', '#ffffff'],
+        'contrast': [[1.0, 4.48], [4.48, 1.0]],
+    }
+    # The previous snapshot is left as it was
+    assert catalog.accessibility(catalog.by_id['site-1'])['contrast'] == [[1.0, 21.0], [21.0, 1.0]]
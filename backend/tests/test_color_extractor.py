@@ -0,0 +1,46 @@
+"""Palette extraction: file and bytes sources, cache keys and the palette cache"""
+import io
+
+import numpy as np
+from PIL import Image
+
+from color_extractor import algorithm_version, extract_colors_from_image, extract_palette, palette_cache_key
+from config import Config
+from palette_cache import get_palette_cache
+
+
+def gradient_image(path, size=64):
+    x = np.linspace(0, 255, size, dtype=np.uint8)
+    pixels = np.stack(np.broadcast_arrays(x[None, :], x[:, None], 255 - x[None, :]), axis=-1)
+    Image.fromarray(pixels).save(path)
+    return str(path)
+
+
+def test_bytes_and_file_give_the_same_palette_and_key(tmp_path):
+    # Big enough for JPEG draft decoding to kick in
+    path = gradient_image(tmp_path / 'gradient.jpg', size=800)
+    with open(path, 'rb') as f:
+        data = f.read()
+    
+    palette = extract_palette(path, 5, 200)
+    assert extract_palette(data, 5, 200) == palette
+    assert extract_palette(io.BytesIO(data), 5, 200) == palette
+    assert palette_cache_key(data, 5, 200) == palette_cache_key(path, 5, 200)
+
+
+def test_palette_settings_change_the_cache_key(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'DATA_DIR', str(tmp_path))
+    monkeypatch.setattr(Config, 'PALETTE_CACHE_ENABLED', True)
+    image = gradient_image(tmp_path / 'gradient.png')
+    cache = get_palette_cache()
+    
+    extract_colors_from_image(image, num_colors=3)
+    extract_colors_from_image(image, num_colors=3)
+    assert (cache.hits, cache.misses) == (1, 1)
+    version, key = algorithm_version(), palette_cache_key(image, 3, 200)
+    
+    monkeypatch.setattr(Config, 'FILTER_WHITE_THRESHOLD', Config.FILTER_WHITE_THRESHOLD - 40)
+    assert algorithm_version() != version
+    assert palette_cache_key(image, 3, 200) != key
+    extract_colors_from_image(image, num_colors=3)
+    assert (cache.hits, cache.misses) == (1, 2)
@@ -0,0 +1,53 @@
+"""Color index lookups against an exhaustive scan"""
+import numpy as np
+import pytest
+
+from color_index import METRICS, ColorIndex
+from color_math import delta_e2000, delta_e76, rgb_array_to_hex, rgb_to_lab
+from palette_store import PaletteArray
+
+# Below the default grid cell (10), several cells wide, and past every distance
+THRESHOLDS = (5, 35, 80, 1e9)
+
+
+def random_palettes(rng, count=300):
+    websites = []
+    for i in range(count):
+        colors = rng.integers(0, 256, size=(rng.integers(0, 6), 3))
+        websites.append({'id': f"site-{i}", 'palette': rgb_array_to_hex(colors)})
+    return PaletteArray.build(websites)
+
+
+def exhaustive(palettes, hex_color, threshold, metric):
+    rgb, owner = palettes.flat()
+    query = np.array([int(hex_color[i:i + 2], 16) for i in (0, 2, 4)])
+    if metric == 'rgb':
+        distances = np.sqrt(((rgb.astype(np.float64) - query) ** 2).sum(axis=1))
+    elif metric == 'de76':
+        distances = delta_e76(rgb_to_lab(rgb), rgb_to_lab(query))
+    else:
+        distances = delta_e2000(rgb_to_lab(rgb), rgb_to_lab(query))
+    return np.unique(owner[distances <= threshold])
+
+
+@pytest.mark.parametrize('metric', METRICS)
+def test_query_matches_exhaustive_scan(metric):
+    rng = np.random.default_rng(7)
+    palettes = random_palettes(rng)
+    index = ColorIndex.build(palettes)
+    
+    for query in rgb_array_to_hex(rng.integers(0, 256, size=(25, 3))):
+        hex_color = query.lstrip('#')
+        for threshold in THRESHOLDS:
+            expected = exhaustive(palettes, hex_color, threshold, metric)
+            assert np.array_equal(index.query(hex_color, threshold, metric), expected), (query, threshold)
+
+
+def test_extended_index_matches_exhaustive_scan():
+    rng = np.random.default_rng(11)
+    palettes = random_palettes(rng)
+    index = ColorIndex.build(palettes.rows(0, 200)).extend(palettes.rows(200), 200)
+    
+    for threshold in THRESHOLDS:
+        assert np.array_equal(index.query('336699', threshold, 'de76'),
+                              exhaustive(palettes, '336699', threshold, 'de76'))
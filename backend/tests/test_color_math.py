@@ -0,0 +1,41 @@
+"""Array accessibility helpers against the per-color functions of color_extractor"""
+import numpy as np
+import pytest
+
+from color_extractor import calculate_color_contrast, generate_accessible_text_color
+from color_math import contrast_matrix, relative_luminance, rgb_array_to_hex, text_colors
+
+
+@pytest.fixture(scope='module')
+def palettes():
+    """Random palettes plus the grays and the text color cut-off (brightness 128)"""
+    rng = np.random.default_rng(0)
+    colors = rng.integers(0, 256, size=(200, 5, 3)).astype(np.uint8)
+    edges = np.array([[0, 0, 0], [255, 255, 255], [10, 10, 10], [128, 128, 128], [127, 128, 128]],
+                     dtype=np.uint8)
+    return np.concatenate([colors, edges[None]])
+
+
+def test_relative_luminance_matches_contrast_with_black(palettes):
+    flat = palettes.reshape(-1, 3)
+    # Contrast with black is (L + 0.05) / 0.05
+    expected = [calculate_color_contrast(c, '#000000') * 0.05 - 0.05 for c in rgb_array_to_hex(flat)]
+    np.testing.assert_allclose(relative_luminance(flat), expected, atol=1e-12)
+    # The lookup table for uint8 input and the formula for other dtypes agree
+    np.testing.assert_allclose(relative_luminance(flat.astype(np.float64)), relative_luminance(flat))
+
+
+def test_contrast_matrix_matches_calculate_color_contrast(palettes):
+    matrices = contrast_matrix(palettes)
+    for palette, matrix in zip(palettes, matrices):
+        hex_colors = rgb_array_to_hex(palette)
+        expected = [[calculate_color_contrast(a, b) for b in hex_colors] for a in hex_colors]
+        np.testing.assert_allclose(matrix, expected, rtol=1e-12)
+
+
+def test_text_colors_match_generate_accessible_text_color(palettes):
+    flat = palettes.reshape(-1, 3)
+    expected = [generate_accessible_text_color(c) for c in rgb_array_to_hex(flat)]
+    assert rgb_array_to_hex(text_colors(flat)) == expected
+    # Batches keep their shape
+    assert text_colors(palettes).shape == palettes.shape
@@ -0,0 +1,157 @@
+"""HTTP client: retries, backoff, Retry-After and per-host throttling against the stub server"""
+import os
+import socket
+import sys
+import threading
+import time
+
+import pytest
+import requests
+
+import http_client
+from config import Config
+from http_client import HostThrottle, HttpClient
+
+BENCHMARKS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'benchmarks'))
+if BENCHMARKS_DIR not in sys.path:
+    sys.path.insert(0, BENCHMARKS_DIR)
+
+from stub_server import StubAwwwards  # noqa: E402
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Backoff waits of the client, recorded instead of slept"""
+    recorded = []
+    monkeypatch.setattr(http_client.time, 'sleep', recorded.append)
+    return recorded
+
+
+@pytest.fixture
+def stub():
+    def start(**kwargs):
+        server = StubAwwwards(items_per_page=2, pages=1, **kwargs).start()
+        servers.append(server)
+        return server
+    
+    servers = []
+    yield start
+    for server in servers:
+        server.stop()
+
+
+def test_transient_failures_are_retried_with_backoff(stub, sleeps):
+    server = stub(fail_first=2)
+    
+    response = HttpClient(retries=3, backoff=0.5).get(f"{server.base_url}websites")
+    assert response.status_code == 200
+    assert server.requests == 3
+    # Full jitter, capped by backoff * 2**attempt
+    assert len(sleeps) == 2
+    assert all(0 <= wait <= 0.5 * 2 ** attempt for attempt, wait in enumerate(sleeps))
+
+
+def test_last_failure_is_returned_when_retries_run_out(stub, sleeps):
+    server = stub(fail_first=5)
+    
+    response = HttpClient(retries=2, backoff=0.1).get(f"{server.base_url}websites")
+    assert response.status_code == 503
+    assert server.requests == 3
+    assert len(sleeps) == 2
+
+
+def test_non_retryable_status_is_returned_right_away(stub, sleeps):
+    server = stub()
+    
+    response = HttpClient(retries=3).get(f"{server.base_url}missing/page/here")
+    assert response.status_code == 404
+    assert server.requests == 1
+    assert sleeps == []
+
+
+def test_retry_after_is_honoured(stub, sleeps, monkeypatch):
+    monkeypatch.setattr(Config, 'HTTP_BACKOFF_MAX', 30)
+    server = stub(fail_first=1, fail_status=429, retry_after=7)
+    
+    response = HttpClient(retries=3, backoff=0.1).get(f"{server.base_url}websites")
+    assert response.status_code == 200
+    assert sleeps == [7.0]
+
+
+def test_retry_after_beyond_the_cap_gives_up(stub, sleeps, monkeypatch):
+    monkeypatch.setattr(Config, 'HTTP_BACKOFF_MAX', 30)
+    server = stub(fail_first=1, fail_status=429, retry_after=86400)
+    
+    response = HttpClient(retries=3, backoff=0.1).get(f"{server.base_url}websites")
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '86400'
+    assert server.requests == 1
+    assert sleeps == []
+
+
+def test_connection_errors_are_retried_then_raised(sleeps):
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    
+    with pytest.raises(requests.ConnectionError):
+        HttpClient(retries=2, backoff=0.1, timeout=(1, 1)).get(f"http://127.0.0.1:{port}/")
+    assert len(sleeps) == 2
+
+
+def test_connections_are_reused(stub):
+    server = stub(image_size=(32, 24))
+    client = HttpClient()
+    
+    for n in range(5):
+        client.get(f"{server.base_url}images/{n}.jpg").raise_for_status()
+    assert server.requests == 5
+    assert server.connections == 1
+
+
+def test_throttle_serializes_requests_per_host():
+    throttle = HostThrottle()
+    inside = threading.Event()
+    release = threading.Event()
+    entered = []
+    
+    def hold(url):
+        with throttle.slot(url, (0, 0)):
+            inside.set()
+            release.wait(5)
+    
+    def request(url):
+        with throttle.slot(url, (0, 0)):
+            entered.append(url)
+    
+    holder = threading.Thread(target=hold, args=('http://a.example.com/1',))
+    holder.start()
+    inside.wait(5)
+    same_host = threading.Thread(target=request, args=('http://a.example.com/2',))
+    other_host = threading.Thread(target=request, args=('http://b.example.com/1',))
+    same_host.start()
+    other_host.start()
+    
+    other_host.join(5)
+    # Another host isn't held up, the same host waits for the running request
+    assert entered == ['http://b.example.com/1']
+    release.set()
+    for thread in (holder, same_host):
+        thread.join(5)
+    assert entered == ['http://b.example.com/1', 'http://a.example.com/2']
+
+
+def test_throttle_waits_the_politeness_delay():
+    throttle = HostThrottle()
+    with throttle.slot('http://a.example.com/1', (0.2, 0.2)):
+        pass
+    finished = time.monotonic()
+    
+    with throttle.slot('http://a.example.com/2', (0.2, 0.2)):
+        started = time.monotonic()
+    assert started - finished >= 0.19
+    
+    # The first request to another host starts right away
+    start = time.monotonic()
+    with throttle.slot('http://b.example.com/1', (0.2, 0.2)):
+        assert time.monotonic() - start < 0.1
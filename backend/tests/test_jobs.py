@@ -0,0 +1,112 @@
+"""Job queue: dedup, cancellation, failed scrapes and the single-process claim"""
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+import jobs
+import scraper
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def wait_finished(job, timeout=5):
+    deadline = time.monotonic() + timeout
+    while job.status not in jobs.FINISHED:
+        assert time.monotonic() < deadline, f"job still {job.status}"
+        time.sleep(0.01)
+    return job
+
+
+@pytest.fixture
+def manager():
+    """JobManager whose 'block' jobs run until released or cancelled"""
+    started = threading.Event()
+    release = threading.Event()
+    
+    def block(job, name=None):
+        started.set()
+        while not release.is_set() and not job.cancel_event.is_set():
+            time.sleep(0.01)
+        return {'name': name}
+    
+    manager = jobs.JobManager(handlers={'block': (block, {'name': None})})
+    manager.started = started
+    yield manager
+    release.set()
+
+
+def test_identical_queued_jobs_are_deduplicated(manager):
+    running, _ = manager.submit('block', {'name': 'a'})
+    assert manager.started.wait(5)
+    
+    queued, created = manager.submit('block', {'name': 'a'})
+    again, created_again = manager.submit('block', {'name': 'a'})
+    other, created_other = manager.submit('block', {'name': 'b'})
+    
+    # Only queued jobs are compared, the running one doesn't count
+    assert created and queued is not running
+    assert again is queued and not created_again
+    assert created_other and other is not queued
+
+
+def test_cancel_queued_job(manager):
+    manager.submit('block', {'name': 'a'})
+    assert manager.started.wait(5)
+    queued, _ = manager.submit('block', {'name': 'b'})
+    
+    assert manager.cancel(queued.id) is queued
+    assert queued.status == jobs.CANCELLED
+    assert queued not in manager._queue
+    # A new identical job isn't deduplicated against the cancelled one
+    assert manager.submit('block', {'name': 'b'})[1]
+
+
+def test_cancel_running_job(manager):
+    running, _ = manager.submit('block', {'name': 'a'})
+    assert manager.started.wait(5)
+    
+    manager.cancel(running.id)
+    assert running.cancel_event.is_set()
+    assert wait_finished(running).status == jobs.CANCELLED
+    assert manager.cancel('unknown') is None
+
+
+def fake_scrape(pages_failed):
+    def scrape_awwwards(pages, section, incremental, progress, cancel_event):
+        return {'pages_requested': pages, 'pages_failed': pages_failed, 'cancelled': False}
+    return scrape_awwwards
+
+
+def test_scrape_fails_when_every_page_failed(monkeypatch):
+    monkeypatch.setattr(scraper, 'scrape_awwwards', fake_scrape(pages_failed=2))
+    job, _ = jobs.JobManager().submit('scrape', {'pages': 2})
+    
+    assert wait_finished(job).status == jobs.FAILED
+    assert 'All 2 requested pages failed' in job.error
+    # The report is kept for the page errors
+    assert job.result['pages_failed'] == 2
+
+
+def test_scrape_with_some_failed_pages_succeeds(monkeypatch):
+    monkeypatch.setattr(scraper, 'scrape_awwwards', fake_scrape(pages_failed=1))
+    job, _ = jobs.JobManager().submit('scrape', {'pages': 2})
+    
+    assert wait_finished(job).status == jobs.SUCCEEDED
+    assert job.error is None
+
+
+@pytest.mark.skipif(jobs.fcntl is None, reason="needs fcntl")
+def test_second_process_cannot_claim_job_queue(tmp_path):
+    jobs.claim_job_queue(str(tmp_path))
+    # Claiming again from the owning process is a no-op
+    jobs.claim_job_queue(str(tmp_path))
+    
+    code = (f"import sys; sys.path.insert(0, {BACKEND_DIR!r}); import jobs; "
+            f"jobs.claim_job_queue({str(tmp_path)!r})")
+    result = subprocess.run([sys.executable, '-c', code], cwd=tmp_path, capture_output=True, text=True)
+    assert result.returncode != 0
+    assert 'single process' in result.stderr
@@ -0,0 +1,103 @@
+"""Scrape journal: crash recovery, checkpoints and the journal lock"""
+import json
+
+import pytest
+
+from journal import CHECKPOINT_KEY, ScrapeCheckpoint, ScrapeJournal, fcntl, journal_path
+from storage import get_store
+
+
+def website(n):
+    return {'id': f"site-{n}", 'url': f"https://example.com/{n}", 'title': f"Site {n}"}
+
+
+def checkpoint(page, item):
+    return {'section': 'websites', 'page': page, 'item': item}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return get_store(str(tmp_path))
+
+
+@pytest.fixture
+def path(tmp_path):
+    return journal_path(str(tmp_path))
+
+
+def test_recover_skips_a_torn_last_line(store, path):
+    lines = [json.dumps({'website': website(n), 'checkpoint': checkpoint(1, n + 1)}) for n in range(2)]
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n' + lines[0][:25])
+    
+    journal = ScrapeJournal(path, store)
+    assert journal.recover() == checkpoint(1, 2)
+    assert store.count() == 2
+    journal.close()
+    
+    # Replayed records are in the store, the journal starts over
+    with open(path, encoding='utf-8') as f:
+        assert f.read() == ''
+
+
+def test_checkpoint_survives_compaction(store, path):
+    journal = ScrapeJournal(path, store, compact_every=2)
+    journal.recover()
+    journal.append(website(0), checkpoint(1, 1))
+    assert not journal.should_compact()
+    journal.append(website(1), checkpoint(1, 2))
+    assert journal.should_compact()
+    
+    assert journal.compact() == 2
+    assert store.get_meta(CHECKPOINT_KEY) == checkpoint(1, 2)
+    # A compaction with nothing pending keeps the checkpoint
+    journal.compact()
+    assert store.get_meta(CHECKPOINT_KEY) == checkpoint(1, 2)
+    
+    # An interrupted scrape, its appended record and checkpoint are recovered by the next one
+    journal.append(website(2), checkpoint(2, 0))
+    journal._file.close()
+    journal._file = None
+    assert ScrapeJournal(path, store).recover() == checkpoint(2, 0)
+    assert store.count() == 3
+
+
+def test_finished_scrape_clears_the_checkpoint(store, path):
+    journal = ScrapeJournal(path, store)
+    journal.recover()
+    journal.append(website(0), checkpoint(1, 1))
+    journal.close(finished=True)
+    
+    assert store.count() == 1
+    assert store.get_meta(CHECKPOINT_KEY) is None
+    assert ScrapeJournal(path, store).recover() is None
+
+
+@pytest.mark.skipif(fcntl is None, reason="needs fcntl")
+def test_journal_is_locked_until_closed(store, path):
+    journal = ScrapeJournal(path, store)
+    journal.recover()
+    journal.append(website(0), checkpoint(1, 1))
+    
+    with pytest.raises(RuntimeError, match="Another scrape"):
+        ScrapeJournal(path, store).recover()
+    # The running scrape's journal wasn't replayed or truncated
+    assert store.count() == 0
+    with open(path, encoding='utf-8') as f:
+        assert len(f.readlines()) == 1
+    
+    journal.close()
+    other = ScrapeJournal(path, store)
+    other.recover()
+    other.close()
+
+
+def test_checkpoint_waits_for_the_earliest_website_in_flight():
+    position = ScrapeCheckpoint('websites')
+    position.submitted('a', 1, 0)
+    position.submitted('b', 1, 1)
+    position.advance(2, 0)
+    
+    # b finishing first doesn't move the checkpoint past a
+    assert position.done('b') == checkpoint(1, 0)
+    assert position.done('a') == checkpoint(2, 0)
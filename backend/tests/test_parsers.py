@@ -0,0 +1,82 @@
+"""Listing page parsers: fields extracted and parity between backends"""
+import os
+
+import pytest
+
+import parsers
+from parsers import LxmlParser, SoupParser, get_parser
+
+BASE_URL = 'https://www.awwwards.com/'
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'awwwards_listing.html')
+
+# Records of the fixture without the generated id and scraped_at
+EXPECTED = [
+    {'title': 'Studio North', 'url': 'https://studio-north.example.com/',
+     'image_url': 'https://www.awwwards.com/media/thumbs/studio.jpg',
+     'description': 'Portfolio of a design studio.', 'tags': ['Portfolio', 'Design Agencies'],
+     'award': 'Site of the Day'},
+    {'title': 'Shop & Co', 'url': 'https://shop.example.com/',
+     'image_url': 'https://cdn.example.com/thumbs/shop.png', 'tags': ['E-commerce']},
+    {'title': 'DeepNestedTitle', 'url': 'https://nested.example.com/',
+     'image_url': 'https://www.awwwards.com/thumbs/relative.webp',
+     'description': 'Line one\n          line two', 'tags': ['Music'], 'award': ''},
+    {'url': 'https://bare.example.com/'},
+    {'url': 'https://similar.example.com/'},
+]
+
+requires_lxml = pytest.mark.skipif(parsers.etree is None, reason="lxml is not installed")
+
+
+def read_fixture():
+    with open(FIXTURE, encoding='utf-8') as f:
+        return f.read()
+
+
+def listing_page(count):
+    """Listing page with ``count`` items cycling through optional fields"""
+    items = []
+    for i in range(count):
+        image = f'<figure><img data-src="/thumbs/{i}.jpg" src="placeholder.gif"></figure>' if i % 2 else ''
+        tags = ''.join(f'<li><a href="/t/{t}/">Tag {t}</a></li>' for t in range(i % 4))
+        award = '<div class="box-award">Honorable Mention</div>' if i % 3 == 0 else ''
+        items.append(f'''
+        <li class="grid-item js-collectable">
+          {image}
+          <h3 class="title"><a href="/sites/{i}">Site &amp; {i} ✓</a></h3>
+          <p class="description">Description {i}</p>
+          <ul class="tags">{tags}</ul>
+          <a class="js-visit-item" href="https://site-{i}.example.com/">Visit</a>
+          {award}
+        </li>''')
+    return f'<html><body><ul class="list-items">{"".join(items)}</ul></body></html>'
+
+
+def comparable(result):
+    item_count, websites = result
+    return item_count, [{k: v for k, v in w.items() if k not in ('id', 'scraped_at')} for w in websites]
+
+
+def test_soup_parser_fixture():
+    item_count, websites = SoupParser().parse(read_fixture(), BASE_URL)
+    
+    assert item_count == 6
+    assert comparable((item_count, websites))[1] == EXPECTED
+    assert len({w['id'] for w in websites}) == len(websites)
+
+
+@requires_lxml
+@pytest.mark.parametrize('html', [
+    pytest.param(read_fixture(), id='fixture'),
+    pytest.param(listing_page(48), id='listing'),
+    pytest.param('<html><body><p>No results</p></body></html>', id='empty'),
+])
+def test_lxml_matches_soup(html):
+    assert comparable(LxmlParser().parse(html, BASE_URL)) == comparable(SoupParser().parse(html, BASE_URL))
+
+
+def test_get_parser_falls_back_without_lxml(monkeypatch):
+    monkeypatch.setattr(parsers, 'etree', None)
+    
+    assert isinstance(get_parser('lxml'), SoupParser)
+    with pytest.raises(ValueError):
+        get_parser('html5')
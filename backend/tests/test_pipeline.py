@@ -0,0 +1,39 @@
+"""Scrape pipeline: download, extract in worker processes, persist"""
+import io
+
+import numpy as np
+from PIL import Image
+
+from color_extractor import algorithm_version, extract_palette
+from config import Config
+from pipeline import ScrapePipeline
+
+
+def png_bytes(seed):
+    rng = np.random.default_rng(seed)
+    pixels = rng.integers(0, 256, size=(8, 8, 3), dtype=np.uint8).repeat(8, axis=0).repeat(8, axis=1)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def test_workers_extract_with_the_parent_settings(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'DATA_DIR', str(tmp_path))
+    monkeypatch.setattr(Config, 'PALETTE_CACHE_ENABLED', False)
+    # Not the default, the worker processes only see it through the pool initializer
+    monkeypatch.setattr(Config, 'QUANTIZER', 'median_cut')
+    images = {f"site-{i}": png_bytes(i) for i in range(3)}
+    persisted = []
+    
+    def download(image_url, website_id):
+        return f"{website_id}.png", images[website_id]
+    
+    with ScrapePipeline(download, persisted.append, download_workers=2, extract_workers=2) as pipeline:
+        for website_id in images:
+            pipeline.submit({'id': website_id, 'url': f"https://{website_id}.example.com/",
+                             'image_url': f"https://cdn.example.com/{website_id}.png"})
+    
+    assert pipeline.stats['extracted'] == pipeline.stats['persisted'] == 3
+    for website in persisted:
+        assert website['palette'] == extract_palette(images[website['id']], Config.NUM_COLORS, 200)
+        assert website['palette_version'] == algorithm_version()
@@ -0,0 +1,134 @@
+"""Response cache: validators, 304s, content coding and LRU eviction"""
+import gzip
+import json
+
+import pytest
+from flask import Flask, Response, jsonify
+from werkzeug.http import http_date
+
+import response_cache
+from config import Config
+from response_cache import ResponseCache, brotli, cached_response
+from storage import get_store
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """Test client of an app with a small and a large cached JSON endpoint"""
+    get_store(str(tmp_path)).upsert_many([{'id': 'site-1', 'url': 'https://site-1.example.com/', 'title': 'Site 1'}])
+    monkeypatch.setattr(response_cache, '_cache', ResponseCache(16))
+    app = Flask(__name__)
+    app.config['DATA_DIR'] = str(tmp_path)
+    app.calls = []
+    
+    @app.route('/small')
+    @cached_response
+    def small():
+        app.calls.append('small')
+        return jsonify({'ok': True})
+    
+    @app.route('/large')
+    @cached_response
+    def large():
+        app.calls.append('large')
+        return jsonify({'items': [f"item-{i}" for i in range(Config.COMPRESS_MIN_SIZE)]})
+    
+    @app.route('/stream')
+    @cached_response
+    def stream():
+        app.calls.append('stream')
+        return Response((line for line in ('a\n', 'b\n')), mimetype='application/x-ndjson')
+    
+    client = app.test_client()
+    client.calls = app.calls
+    return client
+
+
+def test_large_bodies_are_compressed_for_the_client(client):
+    identity = client.get('/large')
+    assert 'Content-Encoding' not in identity.headers
+    assert identity.headers['Vary'] == 'Accept-Encoding'
+    
+    compressed = client.get('/large', headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(compressed.data)) == identity.json
+    assert compressed.headers['ETag'] == identity.headers['ETag'][:-1] + '-gzip"'
+
+
+@pytest.mark.skipif(brotli is None, reason='brotli is not installed')
+def test_brotli_is_preferred(client):
+    response = client.get('/large', headers={'Accept-Encoding': 'gzip, br'})
+    
+    assert response.headers['Content-Encoding'] == 'br'
+    assert json.loads(brotli.decompress(response.data))['items'][0] == 'item-0'
+    assert response.headers['ETag'].endswith('-br"')
+
+
+def test_small_bodies_are_sent_uncompressed(client):
+    response = client.get('/small', headers={'Accept-Encoding': 'gzip'})
+    
+    assert 'Content-Encoding' not in response.headers
+    assert response.json == {'ok': True}
+    assert not response.headers['ETag'].endswith('-gzip"')
+
+
+@pytest.mark.parametrize('path', ['/small', '/large'])
+def test_not_modified_keeps_the_etag(client, path):
+    headers = {'Accept-Encoding': 'gzip'}
+    etag = client.get(path, headers=headers).headers['ETag']
+    
+    response = client.get(path, headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+    # Weak and listed validators match too
+    assert client.get(path, headers={**headers, 'If-None-Match': f'"other", W/{etag}'}).status_code == 304
+    assert client.get(path, headers={**headers, 'If-None-Match': '"other"'}).status_code == 200
+
+
+def test_not_modified_after_eviction_keeps_the_etag(client):
+    etag = client.get('/small', headers={'Accept-Encoding': 'gzip'}).headers['ETag']
+    response_cache.get_response_cache().clear()
+    
+    response = client.get('/small', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+
+
+def test_if_modified_since(client):
+    last_modified = client.get('/small').headers['Last-Modified']
+    
+    assert client.get('/small', headers={'If-Modified-Since': last_modified}).status_code == 304
+    assert client.get('/small', headers={'If-Modified-Since': http_date(0)}).status_code == 200
+
+
+def test_responses_are_served_from_the_cache(client):
+    for _ in range(3):
+        assert client.get('/large', headers={'Accept-Encoding': 'gzip'}).status_code == 200
+    client.get('/large')
+    
+    # Once per content coding
+    assert client.calls == ['large', 'large']
+
+
+def test_streamed_responses_get_validators_only(client):
+    response = client.get('/stream', headers={'Accept-Encoding': 'gzip'})
+    assert response.data == b'a\nb\n'
+    assert 'Content-Encoding' not in response.headers
+    
+    revalidated = client.get('/stream', headers={'If-None-Match': response.headers['ETag']})
+    assert revalidated.status_code == 304
+    assert revalidated.headers['ETag'] == response.headers['ETag']
+
+
+def test_lru_eviction():
+    cache = ResponseCache(2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    
+    # b was the least recently used
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+    assert cache.stats()['entries'] == 2
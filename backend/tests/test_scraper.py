@@ -0,0 +1,90 @@
+"""Scraper runs against the stub server: page counters, cancel and early stop"""
+import os
+import sys
+import threading
+
+import pytest
+
+import scraper
+from config import Config
+from journal import CHECKPOINT_KEY, ScrapeJournal, fcntl, journal_path
+from storage import get_store
+
+BENCHMARKS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'benchmarks'))
+if BENCHMARKS_DIR not in sys.path:
+    sys.path.insert(0, BENCHMARKS_DIR)
+
+from stub_server import StubAwwwards  # noqa: E402
+
+
+@pytest.fixture
+def stub(tmp_path, monkeypatch):
+    """Stub Awwwards with 3 pages of 2 websites, and a scraper pointed at it"""
+    server = StubAwwwards(items_per_page=2, pages=3, image_size=(64, 48)).start()
+    monkeypatch.setattr(scraper, 'BASE_URL', server.base_url)
+    monkeypatch.setattr(scraper, 'PAGE_DELAY', (0, 0))
+    monkeypatch.setattr(scraper, 'IMAGE_DELAY', (0, 0))
+    monkeypatch.setattr(Config, 'DATA_DIR', str(tmp_path))
+    monkeypatch.setattr(Config, 'PALETTE_CACHE_ENABLED', False)
+    monkeypatch.setattr(Config, 'EXTRACT_WORKERS', 1)
+    yield server
+    server.stop()
+
+
+def test_full_scrape(stub):
+    report = scraper.scrape_awwwards(pages=3, incremental=False)
+    
+    assert report['pages_fetched'] == report['pages_requested'] == 3
+    assert report['new_websites'] == get_store().count() == 6
+    assert (report['pages_skipped'], report['pages_cancelled'], report['requests_saved']) == (0, 0, 0)
+
+
+def test_incremental_early_stop_saves_requests(stub):
+    scraper.scrape_awwwards(pages=3, incremental=False)
+    
+    report = scraper.scrape_awwwards(pages=3, incremental=True)
+    assert report['pages_not_modified'] == 1
+    assert report['pages_skipped'] == 2
+    assert report['requests_saved'] == 3
+    assert report['pages_cancelled'] == 0
+
+
+def test_cancelled_pages_are_not_counted_as_saved(stub):
+    cancel_event = threading.Event()
+    
+    def progress(name, value):
+        if name == 'pages_done':
+            cancel_event.set()
+    
+    report = scraper.scrape_awwwards(pages=3, incremental=False, progress=progress,
+                                      cancel_event=cancel_event)
+    assert report['cancelled']
+    assert report['pages_fetched'] == 1
+    assert report['pages_cancelled'] == 2
+    assert report['pages_skipped'] == report['requests_saved'] == 0
+
+
+
+def test_resumes_at_the_saved_checkpoint(stub):
+    store = get_store()
+    store.set_meta(CHECKPOINT_KEY, {'section': 'websites', 'page': 2, 'item': 1})
+    
+    report = scraper.scrape_awwwards(pages=3, incremental=False)
+    assert report['resumed_from'] == {'section': 'websites', 'page': 2, 'item': 1}
+    assert report['pages_requested'] == report['pages_fetched'] == 2
+    # The second website of page 2 and both of page 3
+    assert report['new_websites'] == store.count() == 3
+    # The run finished, the next one starts from the first page
+    assert store.get_meta(CHECKPOINT_KEY) is None
+
+
+@pytest.mark.skipif(fcntl is None, reason="needs fcntl")
+def test_refuses_to_start_while_another_scrape_holds_the_journal(stub):
+    running = ScrapeJournal(journal_path(), get_store())
+    running.recover()
+    try:
+        with pytest.raises(RuntimeError, match="Another scrape"):
+            scraper.scrape_awwwards(pages=1, incremental=False)
+        assert stub.requests == 0
+    finally:
+        running.close()
@@ -0,0 +1,52 @@
+"""Text search: token-prefix matching of q, exact tags and ranking"""
+from catalog import Catalog
+from search_index import TextIndex
+
+WEBSITES = [
+    {'id': 'a', 'title': 'Portfolio of Jane', 'tags': ['Design Agencies']},
+    {'id': 'b', 'title': 'Studio North', 'tags': ['Portfolio']},
+    {'id': 'c', 'title': 'Shop & Co', 'tags': ['E-commerce', 'Fashion']},
+]
+
+
+def test_query_words_prefix_match_title_and_tag_words():
+    index = TextIndex.build(WEBSITES)
+    
+    assert set(index.score('port')) == {0, 1}
+    assert set(index.score('PORTFOLIO')) == {0, 1}
+    # Prefixes of words only, not substrings
+    assert index.score('folio') == {}
+    assert set(index.score('commerce')) == {2}
+    # Every word has to match, in any order
+    assert set(index.score('north stud')) == {1}
+    assert index.score('jane north') == {}
+
+
+def test_title_matches_rank_above_tag_matches():
+    index = TextIndex.build(WEBSITES)
+    
+    assert index.score('portfolio')[0] > index.score('portfolio')[1]
+    # Exact words rank above prefixes
+    assert index.score('portfolio')[0] > index.score('port')[0]
+
+
+def test_query_without_words_matches_nothing():
+    catalog = Catalog(WEBSITES, 1)
+    
+    assert catalog.text_index.score('!!') == {}
+    assert catalog.search(query='!!') == []
+    assert catalog.search(query='') == catalog.websites
+
+
+def test_tag_filter_matches_whole_tags():
+    catalog = Catalog(WEBSITES, 1)
+    
+    assert [w['id'] for w in catalog.search(tag='e-COMMERCE')] == ['c']
+    assert catalog.search(tag='commerce') == []
+    assert [w['id'] for w in catalog.search(query='port', sort='catalog')] == ['a', 'b']
+
+
+def test_extended_index_matches_rebuilt_index():
+    extended = TextIndex.build(WEBSITES[:2]).extend(WEBSITES[2:], 2)
+    
+    assert extended.score('co') == TextIndex.build(WEBSITES).score('co')
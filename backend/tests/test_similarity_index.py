@@ -0,0 +1,78 @@
+"""Similarity index queries against an exact matching over every palette"""
+import numpy as np
+import pytest
+
+from color_math import rgb_array_to_hex
+from palette_store import PaletteArray
+from similarity_index import SimilarityIndex, matching_distance, padded_lab
+
+SITES = 2000
+
+
+@pytest.fixture(scope='module')
+def palettes():
+    # More palettes than the candidate pool, so queries have to prune by the bound.
+    # Palettes are 1 to 5 colors, some websites have none.
+    rng = np.random.default_rng(3)
+    websites = []
+    for i in range(SITES):
+        colors = rng.integers(0, 256, size=(rng.integers(0, 6), 3))
+        websites.append({'id': f"site-{i}", 'palette': rgb_array_to_hex(colors)})
+    return PaletteArray.build(websites)
+
+
+def exact(palettes, query, limit, exclude=None):
+    rows = palettes.positions()
+    lab = padded_lab(palettes.colors[rows], palettes.counts[rows], palettes.width)
+    query_lab = padded_lab(query[None], np.array([len(query)]), palettes.width)[0]
+    distances = matching_distance(query_lab, lab)
+    if exclude is not None:
+        distances[rows == exclude] = np.inf
+    order = np.lexsort((rows, distances))[:limit]
+    return [(int(rows[i]), float(distances[i])) for i in order if np.isfinite(distances[i])]
+
+
+def assert_same(results, expected):
+    assert [p for p, _ in results] == [p for p, _ in expected]
+    assert np.allclose([d for _, d in results], [d for _, d in expected])
+
+
+def test_query_by_website_matches_exact_search(palettes):
+    index = SimilarityIndex.build(palettes)
+    rng = np.random.default_rng(5)
+    
+    for position in rng.choice(palettes.positions(), size=20, replace=False):
+        query = palettes.colors[position, :palettes.counts[position]]
+        results = index.query(palettes, query, 10, exclude=position)
+        assert position not in [p for p, _ in results]
+        assert_same(results, exact(palettes, query, 10, exclude=position))
+
+
+@pytest.mark.parametrize('colors', [1, 2, 5])
+def test_query_by_colors_matches_exact_search(palettes, colors):
+    index = SimilarityIndex.build(palettes)
+    rng = np.random.default_rng(colors)
+    
+    for _ in range(10):
+        query = rng.integers(0, 256, size=(colors, 3)).astype(np.uint8)
+        assert_same(index.query(palettes, query, 10), exact(palettes, query, 10))
+
+
+def test_extended_index_matches_exact_search(palettes):
+    head = SITES - 100
+    index = SimilarityIndex.build(palettes.rows(0, head)).extend(palettes.rows(head), head)
+    
+    position = int(palettes.positions()[-1])
+    query = palettes.colors[position, :palettes.counts[position]]
+    assert_same(index.query(palettes, query, 25), exact(palettes, query, 25))
+
+
+def test_limit_beyond_the_catalog(palettes):
+    small = palettes.rows(0, 20)
+    index = SimilarityIndex.build(small)
+    query = np.array([[200, 40, 40], [0, 0, 0]], dtype=np.uint8)
+    exclude = int(small.positions()[0])
+    
+    results = index.query(small, query, 100, exclude=exclude)
+    assert len(results) == len(small.positions()) - 1
+    assert_same(results, exact(small, query, 100, exclude=exclude))
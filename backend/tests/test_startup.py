@@ -0,0 +1,18 @@
+"""API worker startup: the scraper and extraction stack load lazily"""
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+HEAVY_MODULES = ('scraper', 'color_extractor', 'sklearn', 'scipy', 'PIL', 'bs4', 'lxml', 'requests')
+
+
+def test_app_import_skips_extraction_stack(tmp_path):
+    code = (f"import json, sys; sys.path.insert(0, {BACKEND_DIR!r}); import app; "
+            f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))")
+    # Fresh interpreter, the other tests import the parsers; the scratch cwd takes app.log
+    output = subprocess.run([sys.executable, '-c', code], cwd=tmp_path, capture_output=True,
+                            text=True, check=True).stdout
+    assert json.loads(output.strip().splitlines()[-1]) == []
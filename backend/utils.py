@@ -3,7 +3,6 @@ import json
 import logging
 import shutil
 from typing import List, Dict, Any
-import requests
 from PIL import Image
 from io import BytesIO
 import re
@@ -11,6 +10,8 @@ import time
 from functools import wraps
 import threading
 
+from http_client import get_http_client
+
 logger = logging.getLogger(__name__)
 
 def rate_limited(max_per_minute):
@@ -105,7 +106,7 @@ def download_image_from_url(url, save_path=None):
         PIL Image object and saved path if successful, None otherwise
     """
     try:
-        response = requests.get(url, stream=True, timeout=10)
+        response = get_http_client().get(url)
         response.raise_for_status()
         
         img = Image.open(BytesIO(response.content))
@@ -113,7 +114,9 @@ def download_image_from_url(url, save_path=None):
         if save_path:
             directory = os.path.dirname(save_path)
             ensure_directory(directory)
-            img.save(save_path)
+            # Keep the original encoding instead of re-encoding through PIL
+            with open(save_path, 'wb') as f:
+                f.write(response.content)
             return img, save_path
         
         return img, None
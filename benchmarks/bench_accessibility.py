@@ -0,0 +1,51 @@
+"""
+Benchmark palette accessibility data
+
+Compares computing the WCAG contrast matrix and swatch text colors of
+every palette with the per-pair functions against the array versions in
+color_math. That both give the same values is tested in
+backend/tests/test_color_math.py.
+
+Usage:
+    python benchmarks/bench_accessibility.py [--sites 20000]
+"""
+import argparse
+
+from common import synthetic_websites, time_call
+
+from color_extractor import calculate_color_contrast, generate_accessible_text_color
+from color_math import contrast_matrix, text_colors
+from palette_store import PaletteArray
+
+
+def per_pair(palettes):
+    return [
+        ([[calculate_color_contrast(a, b) for b in palette] for a in palette],
+         [generate_accessible_text_color(c) for c in palette])
+        for palette in palettes
+    ]
+
+
+def batched(colors):
+    return contrast_matrix(colors), text_colors(colors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sites', type=int, default=20000, help='Number of palettes')
+    args = parser.parse_args()
+    
+    websites = synthetic_websites(args.sites)
+    hex_palettes = [w['palette'] for w in websites]
+    colors = PaletteArray.build(websites).colors
+    
+    sample = hex_palettes[:2000]
+    slow = time_call(per_pair, sample, repeat=1) * args.sites / len(sample)
+    fast = time_call(batched, colors, repeat=3)
+    print(f"{args.sites} palettes of {colors.shape[1]} colors")
+    print(f"{'per pair':>10} {slow * 1000:>9.0f} ms (extrapolated from {len(sample)})")
+    print(f"{'batched':>10} {fast * 1000:>9.1f} ms  ({slow / fast:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Benchmark the download-to-pixels path for one thumbnail
+
+Compares the former path (decode the downloaded bytes, re-encode them to
+disk, decode the file again at full size, LANCZOS resize) with extracting
+from the downloaded bytes directly using JPEG draft-mode decoding.
+
+Usage:
+    python benchmarks/bench_decode.py
+"""
+import io
+import os
+import tempfile
+
+from common import synthetic_image, time_call
+
+from PIL import Image
+
+from color_extractor import open_image
+
+RESIZE_WIDTH = 200
+SIZES = ((800, 600), (1600, 1200), (2400, 1800))
+
+
+def legacy_path(data, local_path):
+    img = Image.open(io.BytesIO(data))
+    img.save(local_path)
+    img = Image.open(local_path).convert('RGB')
+    new_height = int(img.height * RESIZE_WIDTH / img.width)
+    return img.resize((RESIZE_WIDTH, new_height), Image.LANCZOS)
+
+
+def bytes_path(data, local_path):
+    with open(local_path, 'wb') as f:
+        f.write(data)
+    img = open_image(data, RESIZE_WIDTH).convert('RGB')
+    new_height = int(img.height * RESIZE_WIDTH / img.width)
+    return img.resize((RESIZE_WIDTH, new_height), Image.LANCZOS)
+
+
+def main():
+    print(f"{'size':>10} {'legacy ms':>10} {'bytes ms':>9} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        local_path = os.path.join(tmp, 'thumb.jpg')
+        for width, height in SIZES:
+            buf = io.BytesIO()
+            synthetic_image(width, height).save(buf, 'JPEG', quality=90)
+            data = buf.getvalue()
+            
+            legacy = time_call(legacy_path, data, local_path, repeat=5)
+            direct = time_call(bytes_path, data, local_path, repeat=5)
+            print(f"{width:>5}x{height:<4} {legacy * 1000:>10.1f} {direct * 1000:>9.1f} {legacy / direct:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Benchmark the pooled HTTP client against one-off requests
+
+Fetches the same thumbnails from the local stub server with bare
+``requests.get`` calls (a new connection each time) and with the pooled
+``HttpClient``, reporting wall time and TCP connections opened. A second
+run makes the stub fail the first request to every path to show retries.
+
+Usage:
+    python benchmarks/bench_http_client.py [num_images]
+
+The client serializes requests per host (see ``HostThrottle``), so both
+sides fetch sequentially.
+"""
+import sys
+import time
+
+from common import BACKEND_DIR  # noqa: F401  (puts the backend on sys.path)
+from stub_server import StubAwwwards
+
+import requests
+
+from http_client import HEADERS, HttpClient
+
+
+def main():
+    num_images = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    
+    print(f"{'client':>14} {'ms/request':>11} {'connections':>12}")
+    for name in ('requests.get', 'HttpClient'):
+        with StubAwwwards(image_size=(320, 240)) as stub:
+            urls = [f"{stub.base_url}images/{n % 8}.jpg" for n in range(num_images)]
+            if name == 'requests.get':
+                fetch = lambda url: requests.get(url, headers=HEADERS, timeout=30)  # noqa: E731
+            else:
+                fetch = HttpClient().get
+            
+            start = time.perf_counter()
+            for url in urls:
+                fetch(url).raise_for_status()
+            elapsed = time.perf_counter() - start
+            print(f"{name:>14} {elapsed / num_images * 1000:>11.2f} {stub.connections:>12}")
+    
+    with StubAwwwards(image_size=(320, 240), fail_first=1) as stub:
+        client = HttpClient(backoff=0.05)
+        response = client.get(f"{stub.base_url}websites")
+        print(f"\nWith a failing first attempt: HTTP {response.status_code} after {stub.requests} requests")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark the cost of recording scraped websites against catalog size
+
+Compares, per website, the former pattern of rewriting websites.json every
+10 websites, one store transaction per website, and the scrape journal
+(one appended line per website, compacted into the store every
+JOURNAL_COMPACT_EVERY websites).
+
+Usage:
+    python benchmarks/bench_journal.py [--sites 200]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from common import synthetic_websites
+
+from config import Config
+from journal import ScrapeJournal
+from storage import WebsiteStore
+from utils import save_json
+
+CATALOG_SIZES = (1000, 10000, 50000)
+
+
+def legacy_dump(tmp, catalog, new_sites):
+    websites = list(catalog)
+    json_file = os.path.join(tmp, 'websites.json')
+    for i, website in enumerate(new_sites, 1):
+        websites.append(website)
+        if i % 10 == 0:
+            save_json(websites, json_file)
+    save_json(websites, json_file)
+
+
+def store_upserts(store, new_sites):
+    for website in new_sites:
+        store.upsert(website)
+
+
+def journaled(tmp, store, new_sites, fsync):
+    journal = ScrapeJournal(os.path.join(tmp, f"scrape-{fsync}.journal"), store, fsync=fsync)
+    for i, website in enumerate(new_sites):
+        journal.append(website, {'section': 'websites', 'page': 1, 'item': i})
+        if journal.should_compact():
+            journal.compact()
+    journal.close(finished=True)
+
+
+def per_site_ms(func, count, *args):
+    start = time.perf_counter()
+    func(*args)
+    return (time.perf_counter() - start) * 1000 / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sites', type=int, default=200, help='Websites recorded per run')
+    args = parser.parse_args()
+    
+    print(f"Per-website cost in ms, {args.sites} websites added, "
+          f"compaction every {Config.JOURNAL_COMPACT_EVERY}")
+    print(f"{'catalog':>8} {'json dump':>10} {'upserts':>8} {'journal':>8} {'+fsync':>8}")
+    for size in CATALOG_SIZES:
+        catalog = synthetic_websites(size)
+        new_sites = synthetic_websites(args.sites, seed=1)
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            timings = [per_site_ms(legacy_dump, args.sites, tmp, catalog, new_sites)]
+            for run in ('upserts', 'journal', 'fsync'):
+                # A fresh store holding the catalog for every run
+                store = WebsiteStore(os.path.join(tmp, f"{run}.db"))
+                store.upsert_many(catalog)
+                if run == 'upserts':
+                    timings.append(per_site_ms(store_upserts, args.sites, store, new_sites))
+                else:
+                    timings.append(per_site_ms(journaled, args.sites, tmp, store, new_sites, run == 'fsync'))
+        
+        print(f"{size:>8} " + " ".join(f"{t:>{w}.3f}" for t, w in zip(timings, (10, 8, 8, 8))))
+
+
+if __name__ == "__main__":
+    main()
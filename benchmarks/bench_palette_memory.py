@@ -0,0 +1,58 @@
+"""
+Benchmark the memory footprint of catalog palettes
+
+Compares palettes kept as lists of '#rrggbb' strings inside the website
+dicts with the columnar PaletteArray (uint8 colors, counts and ids), and
+times serializing every palette back to hex strings.
+
+Usage:
+    python benchmarks/bench_palette_memory.py [--sites 100000]
+"""
+import argparse
+import gc
+import json
+import tracemalloc
+
+from common import synthetic_websites, time_call
+
+from palette_store import PaletteArray
+
+
+def allocated(build):
+    """Bytes still allocated by the object build() returns"""
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sites', type=int, default=100000, help='Number of websites')
+    args = parser.parse_args()
+    
+    # Round-trip through JSON so every string is a separate object, as when loaded from the store
+    websites = json.loads(json.dumps(synthetic_websites(args.sites)))
+    encoded = [json.dumps(w['palette']) for w in websites]
+    
+    lists, list_bytes = allocated(lambda: [json.loads(p) for p in encoded])
+    palettes, array_bytes = allocated(lambda: PaletteArray.build(websites))
+    
+    print(f"{args.sites} websites, {palettes.width} colors each")
+    print(f"{'representation':>22} {'MB':>8} {'bytes/site':>11}")
+    print(f"{'hex string lists':>22} {list_bytes / 2**20:>8.2f} {list_bytes / args.sites:>11.1f}")
+    print(f"{'PaletteArray':>22} {array_bytes / 2**20:>8.2f} {array_bytes / args.sites:>11.1f}")
+    print(f"{'  of which colors':>22} {palettes.colors.nbytes / 2**20:>8.2f} "
+          f"{palettes.colors.nbytes / args.sites:>11.1f}")
+    print(f"reduction: {list_bytes / array_bytes:.1f}x")
+    
+    elapsed = time_call(lambda: [palettes.hex(i) for i in range(len(palettes))], repeat=3)
+    print(f"serialize all palettes to hex: {elapsed * 1000:.0f} ms ({elapsed / args.sites * 1e6:.2f} us/site)")
+    del lists
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Benchmark the listing page parsers
+
+Reports pages/s and items/s for each parser backend on synthetic listing
+pages. Parity between the backends is checked by backend/tests/test_parsers.py.
+
+Usage:
+    python benchmarks/bench_parsers.py [--items 60] [--pages 20]
+"""
+import argparse
+
+from common import synthetic_listing_html, time_call
+
+from parsers import LxmlParser, SoupParser, etree
+
+BASE_URL = 'https://www.awwwards.com/'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--items', type=int, default=60, help='Grid items per synthetic page')
+    parser.add_argument('--pages', type=int, default=20, help='Synthetic pages per run')
+    args = parser.parse_args()
+    
+    backends = [SoupParser()]
+    if etree is not None:
+        backends.append(LxmlParser())
+    else:
+        print("lxml is not installed, skipping the lxml backend")
+    
+    pages = [synthetic_listing_html(args.items, page=p) for p in range(1, args.pages + 1)]
+    
+    def parse_all(backend):
+        for html in pages:
+            backend.parse(html, BASE_URL)
+    
+    print(f"{'backend':>20} {'pages/s':>9} {'items/s':>10} {'speedup':>8}")
+    baseline = None
+    for backend in backends:
+        elapsed = time_call(parse_all, backend, repeat=3)
+        baseline = baseline or elapsed
+        print(f"{backend.name:>20} {args.pages / elapsed:>9.1f} {args.pages * args.items / elapsed:>10.0f} "
+              f"{baseline / elapsed:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Micro-benchmark for the near-white/near-black pixel filter
+
+Compares the former per-pixel Python loop with the vectorized
+``color_extractor.filter_pixels`` at several ``resize_width`` values.
+
+Usage:
+    python benchmarks/bench_pixel_filter.py
+"""
+from common import synthetic_image, time_call
+
+import numpy as np
+from PIL import Image
+
+from color_extractor import filter_pixels
+
+RESIZE_WIDTHS = (100, 200, 400, 800)
+
+
+def legacy_filter(pixels):
+    """The loop previously inlined in extract_colors_from_image"""
+    filtered_pixels = []
+    for pixel in pixels:
+        r, g, b = pixel
+        if r > 240 and g > 240 and b > 240:
+            continue
+        if r < 15 and g < 15 and b < 15:
+            continue
+        filtered_pixels.append(pixel)
+    
+    if len(filtered_pixels) < 100:
+        return pixels
+    return np.array(filtered_pixels)
+
+
+def main():
+    source = synthetic_image()
+    
+    print(f"{'width':>6} {'pixels':>8} {'loop ms':>10} {'vector ms':>10} {'speedup':>8}")
+    for resize_width in RESIZE_WIDTHS:
+        new_height = int(source.height * resize_width / source.width)
+        img = source.resize((resize_width, new_height), Image.LANCZOS)
+        pixels = np.array(img).reshape(-1, 3)
+        
+        assert np.array_equal(legacy_filter(pixels), filter_pixels(pixels))
+        
+        loop = time_call(legacy_filter, pixels, repeat=3)
+        vector = time_call(filter_pixels, pixels, repeat=20)
+        print(f"{resize_width:>6} {len(pixels):>8} {loop * 1000:>10.2f} "
+              f"{vector * 1000:>10.3f} {loop / vector:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Benchmark the palette quantizer backends
+
+Every backend in ``color_extractor.QUANTIZERS`` runs over the same fixed
+corpus of synthetic thumbnails. Wall time is reported per image along with
+palette agreement: the mean CIE76 ΔE between each backend's centers and the
+reference ``kmeans`` centers, under the best one-to-one matching.
+
+Usage:
+    python benchmarks/bench_quantizers.py [num_images]
+"""
+import sys
+import time
+
+from common import palette_distance, synthetic_image
+
+import numpy as np
+from PIL import Image
+
+from color_extractor import QUANTIZERS, filter_pixels, quantize
+
+NUM_COLORS = 5
+RESIZE_WIDTH = 200
+
+
+def corpus(num_images):
+    """Pixels of the fixed benchmark corpus, prepared like the extractor does"""
+    for seed in range(num_images):
+        img = synthetic_image(width=600 + 40 * seed, height=400 + 30 * seed, seed=seed)
+        new_height = int(img.height * RESIZE_WIDTH / img.width)
+        img = img.resize((RESIZE_WIDTH, new_height), Image.LANCZOS)
+        yield filter_pixels(np.array(img).reshape(-1, 3))
+
+
+def main():
+    num_images = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    images = list(corpus(num_images))
+    
+    results = {}
+    for method in QUANTIZERS:
+        palettes, elapsed = [], 0.0
+        for pixels in images:
+            start = time.perf_counter()
+            palettes.append(quantize(pixels, NUM_COLORS, method=method))
+            elapsed += time.perf_counter() - start
+        results[method] = (elapsed / len(images), palettes)
+    
+    reference = results['kmeans'][1]
+    print(f"{'quantizer':>18} {'ms/image':>10} {'mean ΔE':>8} {'max ΔE':>8}")
+    for method, (per_image, palettes) in results.items():
+        deltas = [palette_distance(p, r) for p, r in zip(palettes, reference)]
+        print(f"{method:>18} {per_image * 1000:>10.1f} {np.mean(deltas):>8.2f} {np.max(deltas):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
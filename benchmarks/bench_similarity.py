@@ -0,0 +1,70 @@
+"""
+Benchmark palette similarity search
+
+Times building the similarity index, extending it with new websites, and
+answering nearest-palette queries, against an exact matching over all
+palettes. That the results are identical is tested in
+backend/tests/test_similarity_index.py.
+
+Usage:
+    python benchmarks/bench_similarity.py [--sites 100000] [--queries 20]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from common import synthetic_websites, time_call
+
+from palette_store import PaletteArray
+from similarity_index import SimilarityIndex, matching_distance, padded_lab
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sites', type=int, default=100000, help='Number of websites')
+    parser.add_argument('--queries', type=int, default=20, help='Number of queries')
+    parser.add_argument('--limit', type=int, default=10, help='Results per query')
+    args = parser.parse_args()
+    
+    palettes = PaletteArray.build(synthetic_websites(args.sites))
+    rows = palettes.positions()
+    
+    build = time_call(SimilarityIndex.build, palettes, repeat=3)
+    head = args.sites - args.sites // 100
+    base = SimilarityIndex.build(palettes.rows(0, head))
+    extend = time_call(base.extend, palettes.rows(head), head, repeat=3)
+    index = base.extend(palettes.rows(head), head)
+    print(f"build {len(index)} palettes: {build * 1000:.0f} ms, "
+          f"extend by {args.sites - head}: {extend * 1000:.1f} ms")
+    
+    all_lab = padded_lab(palettes.colors[rows], palettes.counts[rows], palettes.width)
+    
+    def exact_search(query, position):
+        query_lab = padded_lab(query[None], np.array([len(query)]), palettes.width)[0]
+        distances = matching_distance(query_lab, all_lab)
+        distances[rows == position] = np.inf
+        return rows[np.lexsort((rows, distances))[:args.limit]]
+    
+    rng = np.random.default_rng(0)
+    indexed, brute = [], []
+    for _ in range(args.queries):
+        position = int(rows[rng.integers(len(rows))])
+        query = palettes.colors[position, :palettes.counts[position]]
+        
+        start = time.perf_counter()
+        index.query(palettes, query, args.limit, exclude=position)
+        indexed.append(time.perf_counter() - start)
+        
+        start = time.perf_counter()
+        exact_search(query, position)
+        brute.append(time.perf_counter() - start)
+    
+    print(f"{'method':>12} {'median ms':>10} {'p95 ms':>8}")
+    for name, times in (('index', indexed), ('exact scan', brute)):
+        times = np.array(times) * 1000
+        print(f"{name:>12} {np.median(times):>10.1f} {np.percentile(times, 95):>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark API worker startup time and memory
+
+Each scenario runs in a fresh interpreter, the way a gunicorn worker
+starts: import the app, build it with create_app() and serve one
+/api/websites request from a synthetic catalog. Reports wall time and
+resident set size after startup and after the first request, and which
+heavy libraries ended up loaded. The 'api + scraper' scenario also imports
+the scraper, which is what every API worker paid when the job queue
+imported it at module load.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--sites 10000]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from common import BACKEND_DIR, synthetic_websites
+
+from storage import WebsiteStore
+
+HEAVY_MODULES = ('sklearn', 'scipy', 'PIL', 'bs4', 'lxml', 'requests')
+
+SCENARIOS = {
+    'api': '',
+    'api + scraper': 'import scraper',
+}
+
+# Runs in the child interpreter; {extra} is the scenario's extra import
+CHILD = '''
+import json, sys, time
+start = time.perf_counter()
+
+def rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+import app
+{extra}
+flask_app = app.create_app()
+startup = time.perf_counter() - start
+startup_rss = rss_mb()
+
+response = flask_app.test_client().get('/api/websites')
+assert response.status_code == 200, response.status_code
+print(json.dumps({{
+    'startup_ms': startup * 1000,
+    'first_request_ms': (time.perf_counter() - start - startup) * 1000,
+    'startup_rss_mb': startup_rss,
+    'request_rss_mb': rss_mb(),
+    'heavy': [m for m in {heavy!r} if m in sys.modules],
+}}))
+'''
+
+
+def run(extra, data_dir, workdir):
+    env = dict(os.environ, DATA_DIR=data_dir, PYTHONPATH=os.path.abspath(BACKEND_DIR))
+    code = CHILD.format(extra=extra, heavy=HEAVY_MODULES)
+    # Run in a scratch directory, app.py logs to ./app.log
+    output = subprocess.run([sys.executable, '-c', code], cwd=workdir, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters per scenario')
+    parser.add_argument('--sites', type=int, default=10000, help='Websites in the synthetic catalog')
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = os.path.join(tmp, 'data')
+        os.makedirs(data_dir)
+        WebsiteStore(os.path.join(data_dir, 'websites.db')).upsert_many(synthetic_websites(args.sites))
+        # One run to warm the OS file cache and write the palette snapshot
+        run('', data_dir, tmp)
+        
+        print(f"Median of {args.runs} fresh interpreters, {args.sites} websites")
+        print(f"{'scenario':<14} {'startup ms':>10} {'1st req ms':>10} {'RSS MB':>8} {'req RSS':>8}  heavy modules")
+        for name, extra in SCENARIOS.items():
+            runs = [run(extra, data_dir, tmp) for _ in range(args.runs)]
+            median = {key: statistics.median(r[key] for r in runs)
+                      for key in ('startup_ms', 'first_request_ms', 'startup_rss_mb', 'request_rss_mb')}
+            print(f"{name:<14} {median['startup_ms']:>10.0f} {median['first_request_ms']:>10.0f} "
+                  f"{median['startup_rss_mb']:>8.1f} {median['request_rss_mb']:>8.1f}  "
+                  f"{', '.join(runs[0]['heavy']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
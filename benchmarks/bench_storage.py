@@ -0,0 +1,66 @@
+"""
+Benchmark API request latency against catalog size
+
+Compares the former websites.json read pattern (parse the whole file on
+every request) with the SQLite website store, for a paginated listing and
+an id lookup.
+
+Usage:
+    python benchmarks/bench_storage.py
+"""
+import json
+import os
+import tempfile
+
+from common import synthetic_websites, time_call
+
+from storage import WebsiteStore
+
+CATALOG_SIZES = (1000, 10000, 50000)
+
+
+def legacy_page(json_file, page=50, per_page=20):
+    with open(json_file, 'r') as f:
+        websites = json.load(f)
+    start = (page - 1) * per_page
+    return websites[start:start + per_page], len(websites)
+
+
+def legacy_get(json_file, website_id):
+    with open(json_file, 'r') as f:
+        websites = json.load(f)
+    return next((w for w in websites if w['id'] == website_id), None)
+
+
+def store_page(store, page=50, per_page=20):
+    rows = store._connection().execute('SELECT data FROM websites ORDER BY rowid LIMIT ? OFFSET ?',
+                                       (per_page, (page - 1) * per_page))
+    return [json.loads(row[0]) for row in rows], store.count()
+
+
+def main():
+    print(f"{'sites':>7} {'json page ms':>13} {'store page ms':>14} {'json get ms':>12} {'store get ms':>13}")
+    for size in CATALOG_SIZES:
+        websites = synthetic_websites(size)
+        target = websites[size // 2]['id']
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            json_file = os.path.join(tmp, 'websites.json')
+            with open(json_file, 'w') as f:
+                json.dump(websites, f, indent=2)
+            
+            store = WebsiteStore(os.path.join(tmp, 'websites.db'))
+            store.upsert_many(websites)
+            
+            timings = (
+                time_call(legacy_page, json_file, repeat=3),
+                time_call(store_page, store, repeat=20),
+                time_call(legacy_get, json_file, target, repeat=3),
+                time_call(store.get, target, repeat=20),
+            )
+        
+        print(f"{size:>7} " + " ".join(f"{t * 1000:>{w}.2f}" for t, w in zip(timings, (13, 14, 12, 13))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Shared helpers for the benchmark scripts
+
+The backend modules import each other as top-level modules (``from config
+import Config``), so the backend directory is put on ``sys.path`` here.
+"""
+import os
+import sys
+import time
+from itertools import permutations
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend')
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, os.path.abspath(BACKEND_DIR))
+
+import numpy as np
+
+
+def synthetic_image(width=1200, height=900, seed=0):
+    """
+    Build a deterministic RGB thumbnail-like image
+    
+    A horizontal gradient with a few flat blocks, a white margin and some
+    noise, so the pixel filter and the clustering both have work to do.
+    
+    Returns:
+        PIL Image in RGB mode
+    """
+    from PIL import Image
+    
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 1, width, dtype=np.float32)
+    img = np.empty((height, width, 3), dtype=np.float32)
+    img[..., 0] = 255 * x
+    img[..., 1] = 120 + 80 * x[::-1]
+    img[..., 2] = 200 - 150 * x
+    
+    for _ in range(6):
+        x0, y0 = rng.integers(0, width // 2), rng.integers(0, height // 2)
+        img[y0:y0 + height // 4, x0:x0 + width // 4] = rng.integers(0, 256, 3)
+    
+    img[:height // 10] = 255
+    img[-height // 20:] = 0
+    img += rng.normal(0, 6, img.shape)
+    
+    return Image.fromarray(np.clip(img, 0, 255).astype(np.uint8), 'RGB')
+
+
+THUMBNAIL_KINDS = ('gradient', 'flat', 'photo')
+THUMBNAIL_SIZES = ((400, 300), (1200, 900), (2400, 1800))
+
+
+def synthetic_thumbnail(kind, width, height, seed=0):
+    """
+    Build a deterministic thumbnail of one of the THUMBNAIL_KINDS
+    
+    gradient: smooth two-axis color ramps, many distinct colors
+    flat: UI mockup with a header bar, cards and buttons in a few flat colors
+    photo: low-frequency color blobs under per-pixel grain, like a photo
+    
+    Returns:
+        PIL Image in RGB mode
+    """
+    from PIL import Image
+    
+    rng = np.random.default_rng(seed)
+    
+    if kind == 'gradient':
+        y, x = np.mgrid[0:1:height * 1j, 0:1:width * 1j].astype(np.float32)
+        start, end = rng.integers(0, 256, (2, 3))
+        img = start + (end - start) * ((x + y) / 2)[..., None]
+        img[..., rng.integers(3)] *= 0.5 + 0.5 * np.cos(np.pi * x)
+    
+    elif kind == 'flat':
+        colors = rng.integers(0, 256, (6, 3))
+        img = np.empty((height, width, 3), dtype=np.float32)
+        img[:] = colors[0]
+        img[:height // 10] = colors[1]
+        card_w, card_h = width // 4, height // 3
+        for row in range(2):
+            for col in range(3):
+                y0 = height // 6 + row * (card_h + height // 20)
+                x0 = width // 16 + col * (card_w + width // 16)
+                img[y0:y0 + card_h, x0:x0 + card_w] = colors[2 + (row + col) % 2]
+                img[y0 + card_h - card_h // 5:y0 + card_h - card_h // 10,
+                    x0 + card_w // 8:x0 + card_w // 2] = colors[4 + col % 2]
+    
+    elif kind == 'photo':
+        # Upsampled coarse noise gives smooth blobs; fine noise adds the grain
+        coarse = rng.uniform(0, 255, (6, 8, 3)).astype(np.uint8)
+        blobs = Image.fromarray(coarse, 'RGB').resize((width, height), Image.BICUBIC)
+        img = np.asarray(blobs, dtype=np.float32) + rng.normal(0, 12, (height, width, 3))
+    
+    else:
+        raise ValueError(f"Unknown thumbnail kind: {kind}")
+    
+    return Image.fromarray(np.clip(img, 0, 255).astype(np.uint8), 'RGB')
+
+
+def write_thumbnail_corpus(directory, kinds=THUMBNAIL_KINDS, sizes=THUMBNAIL_SIZES, seed=0):
+    """
+    Save one JPEG per thumbnail kind and size
+    
+    Returns:
+        Dict of (kind, (width, height)) -> file path
+    """
+    paths = {}
+    for kind in kinds:
+        for width, height in sizes:
+            path = os.path.join(directory, f"{kind}-{width}x{height}.jpg")
+            synthetic_thumbnail(kind, width, height, seed).save(path, 'JPEG', quality=85)
+            paths[kind, (width, height)] = path
+    return paths
+
+
+def palette_distance(centers, reference):
+    """
+    Mean CIE76 ΔE between two palettes under the best one-to-one matching
+    
+    Args:
+        centers, reference: (k, 3) RGB arrays or lists of hex strings
+    """
+    from color_math import delta_e76, hex_to_rgb_array, rgb_to_lab
+    
+    if len(centers) and isinstance(centers[0], str):
+        centers = hex_to_rgb_array(centers)
+    if len(reference) and isinstance(reference[0], str):
+        reference = hex_to_rgb_array(reference)
+    
+    lab, ref_lab = rgb_to_lab(centers), rgb_to_lab(reference)
+    dist = delta_e76(lab[:, None, :], ref_lab[None, :, :])
+    k = min(len(lab), len(ref_lab))
+    rows = np.arange(k)
+    return min(dist[rows, list(perm)].mean() for perm in permutations(range(len(ref_lab)), k))
+
+
+def time_call(func, *args, repeat=5, **kwargs):
+    """
+    Time a callable
+    
+    Returns:
+        Best wall time in seconds over ``repeat`` runs
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+TAGS = ('Portfolio', 'E-commerce', 'Design Agencies', 'Architecture', 'Fashion',
+        'Technology', 'Photography', 'Music', 'Food & Drink', 'Business')
+
+
+def synthetic_websites(count, seed=0):
+    """
+    Build a deterministic catalog of website dicts shaped like scraper output
+    
+    Returns:
+        List of ``count`` website dicts with tags and five-color palettes
+    """
+    rng = np.random.default_rng(seed)
+    palettes = rng.integers(0, 256, size=(count, 5, 3))
+    websites = []
+    for i in range(count):
+        tags = [TAGS[j] for j in rng.choice(len(TAGS), size=rng.integers(1, 4), replace=False)]
+        websites.append({
+            'id': f"site-{seed}-{i:06d}",
+            'url': f"https://site-{i}.example.com/",
+            'title': f"Studio {i} {tags[0]}",
+            'image_url': f"https://assets.example.com/{i}.jpg",
+            'local_image': f"site-{seed}-{i:06d}.jpg",
+            'tags': tags,
+            'palette': [f"#{r:02x}{g:02x}{b:02x}" for r, g, b in palettes[i]],
+            'scraped_at': '2024-01-01T00:00:00',
+        })
+    return websites
+
+
+def synthetic_listing_html(count, page=1, seed=0, image_prefix='/images/'):
+    """
+    Build a deterministic Awwwards-style listing page
+    
+    Each ``.grid-item`` carries the markup ``parsers.extract_website_data``
+    reads: title, visit link, lazy-loaded image, description, tags and an
+    award badge on every third item.
+    
+    Returns:
+        HTML string with ``count`` grid items
+    """
+    items = []
+    for i in range(count):
+        n = (page - 1) * count + i
+        tags = ''.join(f'<li><a href="/websites/{t.lower()}/">{t}</a></li>'
+                       for t in (TAGS[(n + seed) % len(TAGS)], TAGS[(3 * n + 1) % len(TAGS)]))
+        award = '<div class="box-award"><span>Site of the Day</span></div>' if n % 3 == 0 else ''
+        items.append(f'''
+        <li class="grid-item js-collectable">
+          <div class="box-item">
+            <figure class="rollover">
+              <img class="lazy" data-src="{image_prefix}{n}.jpg" src="data:image/gif;base64,R0lGOD" alt="Site {n}">
+            </figure>
+            <div class="box-info">
+              <div class="content">
+                <h3 class="title"><a href="/sites/site-{n}">Site {n} Studio</a></h3>
+                <p class="description">A synthetic website number {n} for benchmarking.</p>
+                <ul class="tags">{tags}</ul>
+              </div>
+              <a class="js-visit-item" href="https://site-{n}.example.com/" target="_blank">Visit</a>
+              {award}
+            </div>
+          </div>
+        </li>''')
+    
+    return f'''<!DOCTYPE html>
+<html lang="en">
+<head><meta charset="utf-8"><title>Websites - Page {page}</title></head>
+<body>
+  <header class="header"><nav><a href="/">Awwwards</a><a href="/websites/">Websites</a></nav></header>
+  <main>
+    <ul class="list-items grid">{''.join(items)}
+    </ul>
+    <div class="pagination"><a href="/websites/page-{page + 1}/">Next</a></div>
+  </main>
+  <footer><p>Footer links and scripts</p><script>var x = 1;</script></footer>
+</body>
+</html>'''
@@ -0,0 +1,246 @@
+"""
+Run the benchmark suite and write machine-readable results
+
+Times the hot paths on deterministic inputs so runs can be compared across
+commits:
+
+- extract: extract_colors_from_image on synthetic gradient, flat UI and
+  photo-like thumbnails at several sizes (palette cache off)
+- parse: extract_website_data per grid item and full listing pages with
+  each parser backend
+- catalog: snapshot build, Catalog.search and Catalog.similar directly
+  (search/...) and the API handlers under a Flask test client (api/...),
+  with the response cache cleared before every request so the handler
+  itself is measured, at catalog sizes from 1k to 100k websites
+
+Usage:
+    python benchmarks/run_suite.py [--output results.json] [--compare baseline.json]
+                                   [--sizes 1000,10000,100000] [--repeat 5] [--quick]
+                                   [--only extract|parse|catalog]
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import (THUMBNAIL_KINDS, THUMBNAIL_SIZES, synthetic_listing_html, synthetic_websites,
+                    write_thumbnail_corpus)
+
+import numpy as np
+
+from config import Config
+
+BASE_URL = 'https://www.awwwards.com/'
+CATALOG_SIZES = (1000, 10000, 100000)
+QUICK_CATALOG_SIZES = (1000, 10000)
+PAGE_ITEMS = (24, 96)
+QUICK_THUMBNAIL_SIZES = THUMBNAIL_SIZES[:2]
+
+# Relative change of the median reported as a regression or improvement
+COMPARE_TOLERANCE = 0.10
+
+
+def measure(func, repeat):
+    """
+    Time a callable
+    
+    Returns:
+        Dict of min and median wall time in ms over ``repeat`` runs
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    return {'min_ms': round(min(times), 4), 'median_ms': round(statistics.median(times), 4), 'repeat': repeat}
+
+
+def bench_extract(results, repeat, sizes):
+    from color_extractor import extract_colors_from_image
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = write_thumbnail_corpus(tmp, THUMBNAIL_KINDS, sizes)
+        # Pay the import and first-call costs outside the measurements
+        extract_colors_from_image(next(iter(corpus.values())), use_cache=False)
+        for (kind, (width, height)), path in corpus.items():
+            results[f"extract/{kind}/{width}x{height}"] = measure(
+                lambda: extract_colors_from_image(path, use_cache=False), repeat)
+
+
+def bench_parse(results, repeat):
+    from bs4 import BeautifulSoup
+    
+    from parsers import PARSERS, extract_website_data, get_parser
+    
+    for count in PAGE_ITEMS:
+        html = synthetic_listing_html(count)
+        items = BeautifulSoup(html, 'html.parser').select('.grid-item')
+        results[f"parse/extract_website_data/{count}"] = measure(
+            lambda: [extract_website_data(item, BASE_URL) for item in items], repeat)
+        
+        for name in PARSERS:
+            backend = get_parser(name)
+            # get_parser falls back to soup when lxml is missing, don't report that twice
+            if backend.name != name:
+                continue
+            results[f"parse/{name}/{count}"] = measure(lambda: backend.parse(html, BASE_URL), repeat)
+
+
+def bench_catalog(results, repeat, sizes):
+    # app.py opens ./app.log when it is imported, import it from a scratch
+    # directory so the suite doesn't leave logs in the working tree
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as scratch:
+        os.chdir(scratch)
+        try:
+            from app import create_app
+        finally:
+            os.chdir(cwd)
+    from catalog import Catalog, get_catalog
+    from response_cache import get_response_cache
+    from storage import get_store
+    
+    cache = get_response_cache()
+    
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = get_store(tmp)
+            websites = synthetic_websites(size)
+            store.upsert_many(websites)
+            
+            stored = list(store.iter_all())
+            results[f"search/{size}/catalog_build"] = measure(
+                lambda: Catalog(stored, store.version()), max(1, repeat // 2))
+            
+            catalog = get_catalog(tmp)
+            target = websites[size // 2]['id']
+            searches = {
+                'text': {'query': 'studio portfolio'},
+                'tag': {'tag': 'fashion'},
+                'color': {'color': 'ff0000'},
+                'combined': {'query': 'studio', 'tag': 'music', 'color': '336699'},
+            }
+            for name, params in searches.items():
+                results[f"search/{size}/{name}"] = measure(lambda: catalog.search(**params), repeat)
+            results[f"search/{size}/similar"] = measure(
+                lambda: catalog.similar(website_id=target, limit=10), repeat)
+            
+            config = type('BenchConfig', (Config,), {'DATA_DIR': tmp})
+            client = create_app(config).test_client()
+            last_page = (size + 19) // 20
+            
+            def get(url):
+                cache.clear()
+                response = client.get(url)
+                assert response.status_code == 200, f"{url}: {response.status_code}"
+            
+            requests = {
+                'websites_first_page': '/api/websites?page=1',
+                'websites_last_page': f"/api/websites?page={last_page}",
+                'websites_cursor': '/api/websites?cursor=',
+                'website': f"/api/websites/{target}",
+                'palettes': '/api/palettes?page=1',
+                'search_text': '/api/search?q=studio+portfolio',
+                'search_tag': '/api/search?tag=fashion',
+                'search_color': '/api/search?color=ff0000',
+                'similar': f"/api/websites/{target}/similar",
+            }
+            for name, url in requests.items():
+                get(url)
+                results[f"api/{size}/{name}"] = measure(lambda: get(url), repeat)
+    
+    cache.clear()
+
+
+def git_commit():
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=root, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=root,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f"{commit}-dirty" if dirty else commit
+
+
+def compare(results, baseline):
+    """Print the median of every shared benchmark against a baseline run"""
+    print(f"\n{'benchmark':<44} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        ratio = result['median_ms'] / before['median_ms'] if before['median_ms'] else float('inf')
+        flag = ''
+        if ratio > 1 + COMPARE_TOLERANCE:
+            flag = ' slower'
+        elif ratio < 1 - COMPARE_TOLERANCE:
+            flag = ' faster'
+        print(f"{name:<44} {before['median_ms']:>10.3f} {result['median_ms']:>10.3f} {ratio:>6.2f}x{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    parser.add_argument('--compare', help='JSON results of a baseline run to compare against')
+    parser.add_argument('--sizes', help='Comma-separated catalog sizes (default: 1000,10000,100000)')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per benchmark')
+    parser.add_argument('--only', choices=('extract', 'parse', 'catalog'), action='append',
+                        help='Run only these groups (repeatable)')
+    parser.add_argument('--quick', action='store_true', help='Smaller catalogs and thumbnails')
+    args = parser.parse_args()
+    
+    logging.disable(logging.CRITICAL)
+    if args.sizes:
+        sizes = [int(size) for size in args.sizes.split(',')]
+    else:
+        sizes = QUICK_CATALOG_SIZES if args.quick else CATALOG_SIZES
+    thumbnail_sizes = QUICK_THUMBNAIL_SIZES if args.quick else THUMBNAIL_SIZES
+    groups = args.only or ('extract', 'parse', 'catalog')
+    
+    results = {}
+    if 'extract' in groups:
+        bench_extract(results, args.repeat, thumbnail_sizes)
+    if 'parse' in groups:
+        bench_parse(results, args.repeat)
+    if 'catalog' in groups:
+        bench_catalog(results, args.repeat, sizes)
+    
+    for name, result in results.items():
+        print(f"{name:<44} min {result['min_ms']:>10.3f} ms  median {result['median_ms']:>10.3f} ms")
+    
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'quantizer': Config.QUANTIZER,
+            'catalog_sizes': list(sizes),
+            'repeat': args.repeat,
+            'argv': sys.argv[1:],
+        },
+        'results': results,
+    }
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {len(results)} results to {args.output}")
+    
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f)['results'])
+
+
+if __name__ == "__main__":
+    main()
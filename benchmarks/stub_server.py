@@ -0,0 +1,137 @@
+"""
+Local stand-in for awwwards.com
+
+Serves synthetic listing pages at ``/<section>`` and ``/<section>/page-N``
+and JPEG thumbnails at ``/images/<n>.jpg``, so the scraper and HTTP client
+can run against it without network access (point ``AWWWARDS_BASE_URL`` at
+the server's ``base_url``). It counts requests and TCP connections, and can
+fail the first requests to each path to exercise retries, with 503 or any
+other status and an optional Retry-After header.
+
+Usage:
+    python benchmarks/stub_server.py [port]
+"""
+import hashlib
+import io
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from common import synthetic_image, synthetic_listing_html
+
+
+class StubAwwwards:
+    def __init__(self, items_per_page=24, pages=5, image_size=(800, 600), fail_first=0,
+                 fail_status=503, retry_after=None, port=0):
+        self.items_per_page = items_per_page
+        self.pages = pages
+        self.image_size = image_size
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        # Retry-After header value sent with the failures, if any
+        self.retry_after = retry_after
+        self.requests = 0
+        self.connections = 0
+        self.not_modified = 0
+        # Bump to change the listing content (and so the page ETags)
+        self.revision = 0
+        self._failures = {}
+        self._images = {}
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self.server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}/"
+    
+    def _image(self, n):
+        with self._lock:
+            data = self._images.get(n)
+        if data is None:
+            buf = io.BytesIO()
+            synthetic_image(*self.image_size, seed=n).save(buf, 'JPEG', quality=85)
+            data = buf.getvalue()
+            with self._lock:
+                self._images[n] = data
+        return data
+    
+    def _should_fail(self, path):
+        with self._lock:
+            self.requests += 1
+            seen = self._failures.get(path, 0)
+            self._failures[path] = seen + 1
+            return seen < self.fail_first
+    
+    def _handler(self):
+        stub = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body go out in separate writes, avoid Nagle stalls on keep-alive
+            disable_nagle_algorithm = True
+            
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+            
+            def do_GET(self):
+                path = self.path.split('?')[0].rstrip('/')
+                if stub._should_fail(path):
+                    headers = {} if stub.retry_after is None else {'Retry-After': str(stub.retry_after)}
+                    return self._send(stub.fail_status, b'Try again later', 'text/plain', headers=headers)
+                
+                parts = path.strip('/').split('/')
+                if len(parts) == 2 and parts[0] == 'images' and parts[1].endswith('.jpg'):
+                    return self._send(200, stub._image(int(parts[1][:-4])), 'image/jpeg')
+                
+                page = 1
+                if len(parts) == 2 and parts[1].startswith('page-'):
+                    page = int(parts[1][5:])
+                if len(parts) in (1, 2) and parts[0] and 1 <= page <= stub.pages:
+                    html = synthetic_listing_html(stub.items_per_page, page=page, seed=stub.revision)
+                    etag = f'"{hashlib.md5(html.encode()).hexdigest()}"'
+                    if self.headers.get('If-None-Match') == etag:
+                        with stub._lock:
+                            stub.not_modified += 1
+                        return self._send(304, b'', None, etag)
+                    return self._send(200, html.encode(), 'text/html; charset=utf-8', etag)
+                
+                self._send(404, b'Not Found', 'text/plain')
+            
+            def _send(self, status, body, content_type, etag=None, headers=None):
+                self.send_response(status)
+                if content_type:
+                    self.send_header('Content-Type', content_type)
+                if etag:
+                    self.send_header('ETag', etag)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, *args):
+                pass
+        
+        return Handler
+    
+    def start(self):
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        return self
+    
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8000
+    stub = StubAwwwards(port=port)
+    print(f"Serving stub Awwwards at {stub.base_url}")
+    stub.server.serve_forever()
@@ -17,6 +17,7 @@ const WebsiteCard = ({ website }) => {
     title,
     url,
     local_image,
+    images,
     palette = [],
     tags = []
   } = website;
@@ -25,6 +26,14 @@ const WebsiteCard = ({ website }) => {
   const displayUrl = url ? url.replace(/https?:\/\/(www\.)?/, '').split('/')[0] : '';
   const displayTitle = title || displayUrl;
   
+  // Resized derivatives (card, retina, WebP) are served from the same route as the original image
+  const imageUrl = (path) => `/api/images/${path}`;
+  
+  const handleImageError = (e) => {
+    e.target.onerror = null;
+    e.target.src = `https://via.placeholder.com/300x200?text=${displayTitle.charAt(0)}`;
+  };
+  
   // Handle click on the "Visit Website" button
   const handleVisitClick = (e) => {
     e.stopPropagation();
@@ -34,15 +43,28 @@ const WebsiteCard = ({ website }) => {
   return (
     <div className="website-card">
       <div className="card-header">
-        {local_image ? (
+        {images ? (
+          <picture>
+            <source
+              type="image/webp"
+              srcSet={`${imageUrl(images.card.webp)} 1x, ${imageUrl(images.retina.webp)} 2x`}
+            />
+            <img 
+              src={imageUrl(images.card.jpeg)}
+              srcSet={`${imageUrl(images.card.jpeg)} 1x, ${imageUrl(images.retina.jpeg)} 2x`}
+              alt={displayTitle}
+              className="website-image"
+              loading="lazy"
+              onError={handleImageError}
+            />
+          </picture>
+        ) : local_image ? (
           <img 
-            src={`/api/images/${local_image}`}
+            src={imageUrl(local_image)}
             alt={displayTitle}
             className="website-image"
-            onError={(e) => {
-              e.target.onerror = null;
-              e.target.src = `https://via.placeholder.com/300x200?text=${displayTitle.charAt(0)}`;
-            }}
+            loading="lazy"
+            onError={handleImageError}
           />
         ) : (
           <div className="website-image placeholder-image">